@@ -0,0 +1,28 @@
+_tw_syncall_daemon_completion() {
+    local IFS=$'\n'
+    local response
+
+    response=$(env COMP_WORDS="${COMP_WORDS[*]}" COMP_CWORD=$COMP_CWORD _TW_SYNCALL_DAEMON_COMPLETE=bash_complete $1)
+
+    for completion in $response; do
+        IFS=',' read type value <<< "$completion"
+
+        if [[ $type == 'dir' ]]; then
+            COMPREPLY=()
+            compopt -o dirnames
+        elif [[ $type == 'file' ]]; then
+            COMPREPLY=()
+            compopt -o default
+        elif [[ $type == 'plain' ]]; then
+            COMPREPLY+=($value)
+        fi
+    done
+
+    return 0
+}
+
+_tw_syncall_daemon_completion_setup() {
+    complete -o nosort -F _tw_syncall_daemon_completion tw_syncall_daemon
+}
+
+_tw_syncall_daemon_completion_setup;
@@ -1,110 +1,168 @@
-"""__init__"""
+"""__init__
 
+The exports are loaded lazily, on first access, so that e.g., `tw_notion_sync --help` doesn't
+pay for importing the SDKs of Google Calendar and Google Keep, nor the sides of the package it
+doesn't use.
+"""
 
-from taskwarrior_syncall.aggregator import Aggregator
-from taskwarrior_syncall.app_utils import (
-    app_name,
-    cache_or_reuse_cached_combination,
-    fetch_app_configuration,
-    fetch_from_pass_manager,
-    get_config_name_for_args,
-    get_resolution_strategy,
-    inform_about_app_extras,
-    inform_about_combination_name_usage,
-    list_named_combinations,
-    name_to_resolution_strategy_type,
-    report_toplevel_exception,
-)
-from taskwarrior_syncall.cli import (
-    opt_combination,
-    opt_custom_combination_savename,
-    opt_gcal_calendar,
-    opt_gkeep_note,
-    opt_gkeep_passwd_pass_path,
-    opt_gkeep_user_pass_path,
-    opt_google_oauth_port,
-    opt_google_secret_override,
-    opt_list_combinations,
-    opt_notion_page_id,
-    opt_notion_token_pass_path,
-    opt_resolution_strategy,
-    opt_tw_project,
-    opt_tw_tags,
-)
-from taskwarrior_syncall.sync_side import ItemType, SyncSide
-from taskwarrior_syncall.taskwarrior_side import TaskWarriorSide
+import importlib
+import importlib.util
+from typing import TYPE_CHECKING, Any, Dict, List
 
-__all__ = [
-    "Aggregator",
-    "ItemType",
-    "SyncSide",
-    "TaskWarriorSide",
-    "app_name",
-    "cache_or_reuse_cached_combination",
-    "fetch_app_configuration",
-    "fetch_from_pass_manager",
-    "get_config_name_for_args",
-    "inform_about_app_extras",
-    "inform_about_combination_name_usage",
-    "list_named_combinations",
-    "get_resolution_strategy",
-    "name_to_resolution_strategy_type",
-    "opt_combination",
-    "opt_custom_combination_savename",
-    "opt_gcal_calendar",
-    "opt_gkeep_note",
-    "opt_gkeep_passwd_pass_path",
-    "opt_gkeep_user_pass_path",
-    "opt_google_oauth_port",
-    "opt_google_secret_override",
-    "opt_list_combinations",
-    "opt_notion_page_id",
-    "opt_notion_token_pass_path",
-    "opt_resolution_strategy",
-    "opt_tw_project",
-    "opt_tw_tags",
-    "report_toplevel_exception",
-]
-
-# Notion --------------------------------------------------------------------------------------
-try:
-    from taskwarrior_syncall.notion_side import NotionSide
-    from taskwarrior_syncall.tw_notion_utils import convert_notion_to_tw, convert_tw_to_notion
-
-    __all__.extend(["NotionSide", "convert_notion_to_tw", "convert_tw_to_notion"])
-except ImportError:
-    pass
-
-# Gcal ----------------------------------------------------------------------------------------
-try:
-    from taskwarrior_syncall.google.gcal_side import GCalSide
-    from taskwarrior_syncall.tw_gcal_utils import convert_gcal_to_tw, convert_tw_to_gcal
-except ImportError:
-    __all__.extend(
-        [
-            "GCalSide",
-            "convert_gcal_to_tw",
-            "convert_tw_to_gcal",
-        ]
+if TYPE_CHECKING:
+    from taskwarrior_syncall.aggregator import Aggregator
+    from taskwarrior_syncall.app_utils import (
+        app_name,
+        cache_or_reuse_cached_combination,
+        fetch_app_configuration,
+        fetch_from_pass_manager,
+        get_config_name_for_args,
+        get_resolution_strategy,
+        inform_about_app_extras,
+        inform_about_combination_name_usage,
+        list_named_combinations,
+        name_to_resolution_strategy_type,
+        report_toplevel_exception,
     )
-
-try:
+    from taskwarrior_syncall.async_aggregator import AsyncAggregator
+    from taskwarrior_syncall.async_sync_side import AsyncSyncSide, ExecutorAsyncSide
+    from taskwarrior_syncall.cli import (
+        opt_batch_writes,
+        opt_combination,
+        opt_custom_combination_savename,
+        opt_gcal_calendar,
+        opt_gkeep_note,
+        opt_gkeep_passwd_pass_path,
+        opt_gkeep_state_cache,
+        opt_gkeep_user_pass_path,
+        opt_google_oauth_port,
+        opt_google_secret_override,
+        opt_incremental,
+        opt_list_combinations,
+        opt_notion_page_id,
+        opt_notion_token_pass_path,
+        opt_resolution_strategy,
+        opt_tw_project,
+        opt_tw_read_mode,
+        opt_tw_tags,
+        opt_watch,
+        opt_watch_interval,
+        opt_write_workers,
+    )
+    from taskwarrior_syncall.google.gcal_side import AsyncGCalSide, GCalSide
+    from taskwarrior_syncall.google.gkeep_session import GKeepSession
     from taskwarrior_syncall.google.gkeep_todo_item import GKeepTodoItem
     from taskwarrior_syncall.google.gkeep_todo_side import GKeepTodoSide
+    from taskwarrior_syncall.notion_side import AsyncNotionSide, NotionSide
+    from taskwarrior_syncall.sync_daemon import SyncDaemon
+    from taskwarrior_syncall.sync_side import ItemsDelta, ItemType, SyncSide
+    from taskwarrior_syncall.taskwarrior_side import SharedTaskWarrior, TaskWarriorSide
+    from taskwarrior_syncall.tw_gcal_utils import convert_gcal_to_tw, convert_tw_to_gcal
     from taskwarrior_syncall.tw_gkeep_utils import (
         convert_gkeep_todo_to_tw,
         convert_tw_to_gkeep_todo,
     )
+    from taskwarrior_syncall.tw_notion_utils import convert_notion_to_tw, convert_tw_to_notion
+    from taskwarrior_syncall.tw_watch import watch_taskwarrior
 
-    __all__.extend(
-        [
-            "GKeepTodoSide",
-            "GKeepTodoItem",
-            "convert_gkeep_todo_to_tw",
-            "convert_tw_to_gkeep_todo",
-        ]
-    )
-except ImportError:
-    pass
+# exported name -> module that defines it
+_EXPORTS: Dict[str, str] = {
+    "Aggregator": "taskwarrior_syncall.aggregator",
+    "app_name": "taskwarrior_syncall.app_utils",
+    "cache_or_reuse_cached_combination": "taskwarrior_syncall.app_utils",
+    "fetch_app_configuration": "taskwarrior_syncall.app_utils",
+    "fetch_from_pass_manager": "taskwarrior_syncall.app_utils",
+    "get_config_name_for_args": "taskwarrior_syncall.app_utils",
+    "get_resolution_strategy": "taskwarrior_syncall.app_utils",
+    "inform_about_app_extras": "taskwarrior_syncall.app_utils",
+    "inform_about_combination_name_usage": "taskwarrior_syncall.app_utils",
+    "list_named_combinations": "taskwarrior_syncall.app_utils",
+    "name_to_resolution_strategy_type": "taskwarrior_syncall.app_utils",
+    "report_toplevel_exception": "taskwarrior_syncall.app_utils",
+    "AsyncAggregator": "taskwarrior_syncall.async_aggregator",
+    "AsyncSyncSide": "taskwarrior_syncall.async_sync_side",
+    "ExecutorAsyncSide": "taskwarrior_syncall.async_sync_side",
+    "opt_batch_writes": "taskwarrior_syncall.cli",
+    "opt_combination": "taskwarrior_syncall.cli",
+    "opt_custom_combination_savename": "taskwarrior_syncall.cli",
+    "opt_gcal_calendar": "taskwarrior_syncall.cli",
+    "opt_gkeep_note": "taskwarrior_syncall.cli",
+    "opt_gkeep_passwd_pass_path": "taskwarrior_syncall.cli",
+    "opt_gkeep_state_cache": "taskwarrior_syncall.cli",
+    "opt_gkeep_user_pass_path": "taskwarrior_syncall.cli",
+    "opt_google_oauth_port": "taskwarrior_syncall.cli",
+    "opt_google_secret_override": "taskwarrior_syncall.cli",
+    "opt_incremental": "taskwarrior_syncall.cli",
+    "opt_list_combinations": "taskwarrior_syncall.cli",
+    "opt_notion_page_id": "taskwarrior_syncall.cli",
+    "opt_notion_token_pass_path": "taskwarrior_syncall.cli",
+    "opt_resolution_strategy": "taskwarrior_syncall.cli",
+    "opt_tw_project": "taskwarrior_syncall.cli",
+    "opt_tw_read_mode": "taskwarrior_syncall.cli",
+    "opt_tw_tags": "taskwarrior_syncall.cli",
+    "opt_watch": "taskwarrior_syncall.cli",
+    "opt_watch_interval": "taskwarrior_syncall.cli",
+    "opt_write_workers": "taskwarrior_syncall.cli",
+    "SyncDaemon": "taskwarrior_syncall.sync_daemon",
+    "ItemsDelta": "taskwarrior_syncall.sync_side",
+    "ItemType": "taskwarrior_syncall.sync_side",
+    "SyncSide": "taskwarrior_syncall.sync_side",
+    "SharedTaskWarrior": "taskwarrior_syncall.taskwarrior_side",
+    "TaskWarriorSide": "taskwarrior_syncall.taskwarrior_side",
+    "watch_taskwarrior": "taskwarrior_syncall.tw_watch",
+}
+
+# exported names of each of the app extras, only available if its SDK is installed
+_EXTRAS_EXPORTS: Dict[str, Dict[str, str]] = {
+    # Notion ---------------------------------------------------------------------------------
+    "notion_client": {
+        "AsyncNotionSide": "taskwarrior_syncall.notion_side",
+        "NotionSide": "taskwarrior_syncall.notion_side",
+        "convert_notion_to_tw": "taskwarrior_syncall.tw_notion_utils",
+        "convert_tw_to_notion": "taskwarrior_syncall.tw_notion_utils",
+    },
+    # Gcal -----------------------------------------------------------------------------------
+    "googleapiclient": {
+        "AsyncGCalSide": "taskwarrior_syncall.google.gcal_side",
+        "GCalSide": "taskwarrior_syncall.google.gcal_side",
+        "convert_gcal_to_tw": "taskwarrior_syncall.tw_gcal_utils",
+        "convert_tw_to_gcal": "taskwarrior_syncall.tw_gcal_utils",
+    },
+    # Gkeep ----------------------------------------------------------------------------------
+    "gkeepapi": {
+        "GKeepSession": "taskwarrior_syncall.google.gkeep_session",
+        "GKeepTodoItem": "taskwarrior_syncall.google.gkeep_todo_item",
+        "GKeepTodoSide": "taskwarrior_syncall.google.gkeep_todo_side",
+        "convert_gkeep_todo_to_tw": "taskwarrior_syncall.tw_gkeep_utils",
+        "convert_tw_to_gkeep_todo": "taskwarrior_syncall.tw_gkeep_utils",
+    },
+}
+
+__all__: List[str] = list(_EXPORTS)
+for _sdk, _exports in _EXTRAS_EXPORTS.items():
+    _EXPORTS.update(_exports)
+    if importlib.util.find_spec(_sdk) is not None:
+        __all__.extend(_exports)
+del _sdk, _exports
 
 __version__ = "1.2.2a0"
+
+
+def __getattr__(name: str) -> Any:
+    """Import the module that defines the given export on first access.
+
+    Raises `ImportError` if it's the export of an app extra that isn't installed.
+    """
+    try:
+        module_name = _EXPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+
+    value = getattr(importlib.import_module(module_name), name)
+    # cache it, so that __getattr__ is only called once per export
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -1,38 +1,67 @@
 from __future__ import annotations
 
+import abc
+import atexit
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from functools import partial
-from pathlib import Path
-from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
 
 from bidict import bidict  # type: ignore
-from bubop import PrefsManager, logger, pickle_dump, pickle_load
+from bubop import PrefsManager, logger
 from item_synchronizer import Synchronizer
 from item_synchronizer.helpers import SideChanges
 from item_synchronizer.resolution_strategy import AlwaysSecondRS, ResolutionStrategy
 from item_synchronizer.types import ID, ConverterFn, Item
 
 from taskwarrior_syncall.app_utils import app_name
+from taskwarrior_syncall.async_sync_side import AsyncSyncSide
 from taskwarrior_syncall.side_helper import SideHelper
-from taskwarrior_syncall.sync_side import SyncSide
+from taskwarrior_syncall.snapshot_store import SnapshotStore, SQLiteSnapshotStore
+from taskwarrior_syncall.sync_journal import JournalRecord, SyncJournal
+from taskwarrior_syncall.sync_side import ItemsDelta, SyncSide
+from taskwarrior_syncall.write_buffer import is_provisional_id, new_provisional_id
+from taskwarrior_syncall.write_pool import AsyncWritePool, WritePool
 
+T = TypeVar("T")
+SideT = TypeVar("SideT", SyncSide, AsyncSyncSide)
 
-class Aggregator:
-    """Aggregator class that manages the synchronization between two arbitrary sides.
 
-    Having an aggregator is handy for managing push/pull/sync directives in a
-    consistent manner.
+class BaseAggregator(abc.ABC, Generic[SideT]):
+    """State and change detection shared by the Aggregator and the AsyncAggregator.
+
+    Keeps the ID correspondences, the snapshots, the fingerprints and the journal of the
+    ongoing synchronization, and hands the synchronizer the callbacks that write to each side.
+    How the items are fetched and how the writes are run is up to the subclasses.
     """
 
     def __init__(
         self,
         *,
-        side_A: SyncSide,
-        side_B: SyncSide,
+        side_A: SideT,
+        side_B: SideT,
         converter_B_to_A: ConverterFn,
         converter_A_to_B: ConverterFn,
         resolution_strategy: ResolutionStrategy = AlwaysSecondRS(),
         config_fname: Optional[str] = None,
         ignore_keys: Tuple[Sequence[str], Sequence[str]] = tuple(),
+        snapshot_store_type: Type[SnapshotStore] = SQLiteSnapshotStore,
+        incremental: bool = False,
     ):
         # Preferences manager
         # Sample config path: ~/.config/taskwarrior_syncall/taskwarrior_gcal_sync.yaml
@@ -40,9 +69,9 @@ class Aggregator:
         #
         # The stem of the filename can be overridden by the user if they provide `config_fname`.
         #
-        # Serdes dirs are shared across multiple different syncrhonizers
-        # Sample serdes dirs: ~/.config/taskwarrior_syncall/serdes/gcal/
-        #                     ~/.config/taskwarrior_syncall/serdes/tw/
+        # Snapshot stores are shared across multiple different syncrhonizers
+        # Sample snapshot stores: ~/.config/taskwarrior_syncall/serdes/gcal.db
+        #                         ~/.config/taskwarrior_syncall/serdes/tw.db
         if config_fname is None:
             config_fname = f"{side_B.name}_{side_A.name}_sync".lower()
         else:
@@ -53,8 +82,8 @@ class Aggregator:
         # Own config
         self.config: Dict[str, Any] = {}
 
-        self._side_A: SyncSide = side_A
-        self._side_B: SyncSide = side_B
+        self._side_A: SideT = side_A
+        self._side_B: SideT = side_B
 
         # Initialize helpers - one for each side ----------------------------------------------
         self._helper_A = SideHelper.from_side(self._side_A)
@@ -67,15 +96,14 @@ class Aggregator:
             self._helper_A.ignore_keys = ignore_keys[0]
             self._helper_B.ignore_keys = ignore_keys[1]
 
-        # serdes directories for storing cached versions of items for each side ---------------
+        # snapshot stores for storing cached versions of items for each side -----------------
         self.serdes_dirs = self.prefs_manager.config_directory / "serdes"
-        serdes_A = self.serdes_dirs / self._side_A.name.lower()
-        serdes_B = self.serdes_dirs / self._side_B.name.lower()
-        serdes_A.mkdir(exist_ok=True, parents=True)
-        serdes_B.mkdir(exist_ok=True)
-
-        self.config[f"{self._helper_A}_serdes"] = serdes_A
-        self.config[f"{self._helper_B}_serdes"] = serdes_B
+        self.config[f"{self._helper_A}_snapshots"] = snapshot_store_type(
+            serdes_dir=self.serdes_dirs, name=self._side_A.name.lower()
+        )
+        self.config[f"{self._helper_B}_snapshots"] = snapshot_store_type(
+            serdes_dir=self.serdes_dirs, name=self._side_B.name.lower()
+        )
 
         # Correspondences between the two sides -----------------------------------------------
         # For finding the matches between IDs of the two sides
@@ -85,6 +113,55 @@ class Aggregator:
             self.prefs_manager[correspondences_prefs_key] = bidict()
         self._B_to_A_map: bidict = self.prefs_manager[correspondences_prefs_key]
 
+        # Fingerprints of the cached version of each item -------------------------------------
+        # Allow detecting unchanged items without loading and comparing their cached versions.
+        # They depend on the keys ignored during the comparison, thus they are kept per
+        # combination, next to the correspondences.
+        # e.g., for Taskwarrior <-> Gcal: tw_gcal_fingerprints
+        fingerprints_prefs_key = f"{self._side_B.name}_{self._side_A.name}_fingerprints"
+        if fingerprints_prefs_key not in self.prefs_manager:
+            self.prefs_manager[fingerprints_prefs_key] = {}
+        fingerprints: Dict[str, Dict[ID, str]] = self.prefs_manager[fingerprints_prefs_key]
+        self.config[f"{self._helper_A}_fingerprints"] = fingerprints.setdefault(
+            self._side_A.name, {}
+        )
+        self.config[f"{self._helper_B}_fingerprints"] = fingerprints.setdefault(
+            self._side_B.name, {}
+        )
+
+        # State of each side, persisted across successful runs -------------------------------
+        # e.g., for Taskwarrior <-> Gcal: tw_gcal_sync_state
+        sync_state_prefs_key = f"{self._side_B.name}_{self._side_A.name}_sync_state"
+        if sync_state_prefs_key not in self.prefs_manager:
+            self.prefs_manager[sync_state_prefs_key] = {}
+        self._sync_state: Dict[str, Dict[str, Any]] = self.prefs_manager[sync_state_prefs_key]
+
+        # Only fetch the items that changed since the last run, for the sides that support it
+        self._incremental = incremental
+
+        # Pools for writing to each side concurrently - set up by the subclasses ---------------
+        # No pool -> write synchronously, one item after the other.
+        #
+        # Insertions return a provisional ID, replaced by the actual one once the pool is
+        # joined, at the end of the synchronization. All the bookkeeping - snapshots, ID
+        # correspondences - happens on the thread that joins the pool.
+        for helper in (self._helper_A, self._helper_B):
+            self.config[f"{helper}_write_pool"] = None
+
+        # Journal of the writes of the ongoing synchronization --------------------------------
+        # The correspondences and the snapshots are only persisted at the end of the
+        # synchronization. Until then, each completed write is journaled, so that an
+        # interrupted synchronization can be resumed - see sync_journal.
+        # e.g., ~/.config/taskwarrior_syncall/taskwarrior_gcal_sync.journal
+        self._journal = SyncJournal(self.prefs_manager.config_file.with_suffix(".journal"))
+        for helper in (self._helper_A, self._helper_B):
+            # ID of the last item converted for this side, i.e., the one being inserted
+            self.config[f"{helper}_source_id"] = None
+            # items deleted from this side during the synchronization -> the ID of the item
+            # they corresponded to and their cached version, in case their deletion fails
+            self.config[f"{helper}_deleted"] = {}
+        self._replay_journal()
+
         # resolution strategy to resolve conflicts
         self._resolution_strategy = resolution_strategy
 
@@ -107,8 +184,8 @@ class Aggregator:
             updater_to_B=side_B_fn(self.updater_to),
             deleter_to_A=side_A_fn(self.deleter_to),
             deleter_to_B=side_B_fn(self.deleter_to),
-            converter_to_A=converter_B_to_A,
-            converter_to_B=converter_A_to_B,
+            converter_to_A=self._tracking_source(converter_B_to_A, helper=self._helper_A),
+            converter_to_B=self._tracking_source(converter_A_to_B, helper=self._helper_B),
             item_getter_A=side_A_fn(self.item_getter_for),
             item_getter_B=side_B_fn(self.item_getter_for),
             resolution_strategy=self._resolution_strategy,
@@ -117,21 +194,31 @@ class Aggregator:
 
         self.cleaned_up = False
 
-    def __enter__(self):
-        self.start()
-        return self
+    @property
+    def side_A(self) -> SideT:
+        return self._side_A
 
-    def __exit__(self, *_):
-        self.finish()
+    @property
+    def side_B(self) -> SideT:
+        return self._side_B
 
-    def detect_changes(self, helper: SideHelper, items: Dict[ID, Item]) -> SideChanges:
+    def detect_changes(
+        self, helper: SideHelper, items: Dict[ID, Item], present_ids: Optional[Set[ID]] = None
+    ) -> SideChanges:
         """
         Given a fresh list of items from the SyncSide, determine which of them are new,
         modified, or have been deleted since the last run.
+
+        :param present_ids: IDs of all the items currently in the side, in case `items` holds
+                            only the ones that changed since the last run. Defaults to the IDs
+                            of `items`.
         """
-        serdes_dir, _ = self._get_serdes_dirs(helper)
+        snapshots, _ = self._get_snapshot_stores(helper)
+        fingerprints = self._get_fingerprints(helper)
         logger.info(f"Detecting changes from {helper}...")
         item_ids = set(items.keys())
+        if present_ids is None:
+            present_ids = item_ids
         # New items exist in the sync side but don't yet exist in my IDs correspndences.
         new = {
             item_id for item_id in item_ids if item_id not in self._get_ids_map(helper=helper)
@@ -143,70 +230,338 @@ class Aggregator:
         deleted = {
             registered_id
             for registered_id in self._get_ids_map(helper=helper)
-            if registered_id not in item_ids.difference(new)
+            if registered_id not in present_ids.difference(new)
         }
 
         # Potentially modified items are all the items that exist in the sync side minus the
         # ones already determined as deleted or enw
         #
-        # For these items, load the cached version and check whether they are the same or not
-        # to actually determine the ones that are changed.
+        # For these items, compare their fingerprint with the one of the cached version. If
+        # they differ, load the cached version and check whether they are the same or not to
+        # actually determine the ones that are changed.
         modified = set()
         potentially_modified_ids = item_ids.difference(new.union(deleted))
-        for item_id in potentially_modified_ids:
+        fingerprints_of_items = {
+            item_id: self._fingerprint_of(items[item_id], helper=helper)
+            for item_id in potentially_modified_ids
+        }
+        to_compare = {
+            item_id
+            for item_id, fingerprint in fingerprints_of_items.items()
+            if fingerprint is None or fingerprints.get(item_id) != fingerprint
+        }
+        logger.debug(
+            f"{len(potentially_modified_ids) - len(to_compare)} {helper} item(s) unchanged"
+            " based on their fingerprint"
+        )
+
+        cached_items = snapshots.get_many(to_compare)
+        for item_id in to_compare:
             item = items[item_id]
-            cached_item = pickle_load(serdes_dir / item_id)
-            if self._item_has_update(prev_item=cached_item, new_item=item, helper=helper):
+            cached_item = cached_items.get(item_id)
+            if cached_item is None:
+                logger.warning(
+                    f"No cached version of {helper} item {item_id}, considering it modified..."
+                )
                 modified.add(item_id)
+            elif self._item_has_update(prev_item=cached_item, new_item=item, helper=helper):
+                modified.add(item_id)
+            elif fingerprints_of_items[item_id] is not None:
+                # identical, e.g., within the datetime tolerance - remember the fingerprint of
+                # the fresh item to skip the comparison next time
+                fingerprints[item_id] = fingerprints_of_items[item_id]
 
         side_changes = SideChanges(new=new, modified=modified, deleted=deleted)
         logger.debug(f"\n\n{side_changes}")
 
         return side_changes
 
-    def sync(self):
-        """Entrypoint method."""
-        items_A = {
-            str(item[self._helper_A.id_key]): item for item in self._side_A.get_all_items()
-        }
-        items_B = {
-            str(item[self._helper_B.id_key]): item for item in self._side_B.get_all_items()
+    def _keep_completed_writes(self, changes_A: SideChanges, changes_B: SideChanges):
+        """Undo the snapshots of the given changes, except those of the writes that completed.
+
+        The new and modified items are snapshotted as soon as they're detected. If the
+        synchronization is aborted, e.g., with Ctrl-C, some of them haven't been written to the
+        other side - drop all of them and re-apply the journaled writes, so that the rest are
+        considered modified on the next run.
+        """
+        self._remove_snapshots(changes_A.new.union(changes_A.modified), helper=self._helper_A)
+        self._remove_snapshots(changes_B.new.union(changes_B.modified), helper=self._helper_B)
+        self._apply_journal(self._journal.replay())
+
+    def _with_counterparts(
+        self, ids_A: Iterable[ID], ids_B: Iterable[ID]
+    ) -> Tuple[Set[ID], Set[ID]]:
+        """Add the IDs of the items the given ones correspond to on the other side."""
+        ids_A = {str(id_) for id_ in ids_A}
+        ids_B = {str(id_) for id_ in ids_B}
+        A_to_B = self._get_ids_map(self._helper_A)
+        B_to_A = self._get_ids_map(self._helper_B)
+
+        return (
+            ids_A.union(B_to_A[id_] for id_ in ids_B if id_ in B_to_A),
+            ids_B.union(A_to_B[id_] for id_ in ids_A if id_ in A_to_B),
+        )
+
+    def _items_of_ids(
+        self, fetched: Dict[ID, Optional[Item]], helper: SideHelper
+    ) -> Tuple[Dict[ID, Item], Set[ID]]:
+        """Return the given items that are of interest and the IDs of all the present items.
+
+        :param fetched: The items fetched individually - None for the ones not found
+        """
+        side, _ = self._get_side_instances(helper)
+        items = {
+            item_id: item
+            for item_id, item in fetched.items()
+            if item is not None and side.matches_filters(item)
         }
+        present_ids = set(self._get_ids_map(helper).keys()).difference(fetched.keys())
+        present_ids.update(items.keys())
 
-        # find what's changed in each side
-        changes_A = self.detect_changes(self._helper_A, items_A)
-        changes_B = self.detect_changes(self._helper_B, items_B)
-
-        # pickle items that are new or updated
-        side_A_serdes_dir, side_B_serdes_dir = self._get_serdes_dirs(self._helper_A)
-        side_A, side_B = self._get_side_instances(self._helper_A)
-        for item_id in changes_B.new.union(changes_B.modified):
-            item = side_B.get_item(item_id)
-            if item is None:
-                raise RuntimeError(f"Failed to retrieve serialized version of Item {item_id}")
-            pickle_dump(item, side_B_serdes_dir / item_id)
-        for item_id in changes_A.new.union(changes_A.modified):
-            item = side_A.get_item(item_id)
+        return items, present_ids
+
+    def _prepare_sync(self) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Steps before fetching the items of a new synchronization.
+
+        :return: Copies of the sync state of side A and side B - only persist them if the
+                 synchronization succeeds
+        """
+        sync_state_A = dict(self._sync_state.get(self._side_A.name, {}))
+        sync_state_B = dict(self._sync_state.get(self._side_B.name, {}))
+
+        self._drop_provisional_ids(self._helper_A)
+        self._drop_provisional_ids(self._helper_B)
+
+        return sync_state_A, sync_state_B
+
+    def _process_changes(
+        self, helper: SideHelper, items: Dict[ID, Item], present_ids: Optional[Set[ID]]
+    ) -> SideChanges:
+        """Detect the changes of the given side and snapshot its new and updated items."""
+        changes = self.detect_changes(helper, items, present_ids=present_ids)
+
+        # snapshot items that are new or updated - as they were just fetched, no need to fetch
+        # them again
+        for item_id in changes.new.union(changes.modified):
+            self._record_snapshot(item_id, items[item_id], helper=helper)
+
+        # remove snapshots of deleted items
+        self._remove_snapshots(changes.deleted, helper=helper)
+
+        return changes
+
+    def _commit_state(self):
+        """Persist the snapshots and the correspondences, then clear the journal."""
+        for helper in (self._helper_A, self._helper_B):
+            snapshots, _ = self._get_snapshot_stores(helper)
+            snapshots.commit()
+
+        self._persist_prefs()
+        self._journal.clear()
+
+    def _persist_prefs(self):
+        """Write the preferences file atomically - to a temporary file, renamed over it.
+
+        Otherwise a synchronization killed while the file is written would leave it truncated,
+        losing all the correspondences. It's the only way the preferences are written - the
+        in-place write of the preferences manager at exit is unregistered, see
+        `_release_resources`.
+        """
+        config_file = self.prefs_manager.config_file
+        tmp_file = config_file.with_name(f"{config_file.name}.tmp")
+        self.prefs_manager.flush_config(tmp_file)
+        if tmp_file.is_file():
+            os.replace(tmp_file, config_file)
+
+    def _replay_journal(self):
+        """Apply the writes journaled by a previous synchronization that was interrupted."""
+        records = self._journal.replay()
+        if not records:
+            return
+
+        logger.warning(
+            f"Resuming from an interrupted synchronization, replaying {len(records)} journaled"
+            " change(s)..."
+        )
+        self._apply_journal(records)
+        self._commit_state()
+
+    def _apply_journal(self, records: List[JournalRecord]):
+        """Apply the given journaled writes to the correspondences and the snapshots."""
+        helpers = {helper.name: helper for helper in (self._helper_A, self._helper_B)}
+        for op, side_name, item_id, *args in records:
+            helper = helpers.get(side_name)
+            if helper is None:
+                logger.warning(f"Ignoring journaled change of unknown side {side_name}")
+            elif op == "map":
+                self._get_ids_map(helper).forceput(item_id, args[0])
+            elif op == "unmap":
+                self._get_ids_map(helper).pop(item_id, None)
+            elif op == "put":
+                self._record_snapshot(item_id, args[0], helper=helper)
+            elif op == "del":
+                self._remove_snapshots((item_id,), helper=helper)
+
+    def _journal_upsert(
+        self, item_id: ID, item: Item, other_id: Optional[ID], helper: SideHelper
+    ):
+        """Journal the item just written to the given side along with the item of the other
+        side it corresponds to.
+        """
+        _, other_snapshots = self._get_snapshot_stores(helper)
+        records: List[JournalRecord] = [("put", helper.name, item_id, item)]
+        if other_id is not None:
+            records.append(("map", helper.name, item_id, other_id))
+            other_item = other_snapshots.get(other_id)
+            if other_item is not None:
+                records.append(("put", helper.other.name, other_id, other_item))
+
+        self._journal.append(*records)
+
+    def _journal_delete(self, item_id: ID, other_id: Optional[ID], helper: SideHelper):
+        """Journal the item just deleted from the given side."""
+        records: List[JournalRecord] = [
+            ("unmap", helper.name, item_id),
+            ("del", helper.name, item_id),
+        ]
+        if other_id is not None:
+            records.append(("del", helper.other.name, other_id))
+
+        self._journal.append(*records)
+
+    def _save_sync_state(
+        self, sync_started: float, sync_state_A: Dict[str, Any], sync_state_B: Dict[str, Any]
+    ):
+        """Persist the sync state of both sides after a successful synchronization."""
+        for side, sync_state in ((self._side_A, sync_state_A), (self._side_B, sync_state_B)):
+            sync_state["last_sync"] = sync_started
+            self._sync_state[side.name] = sync_state
+
+    def _items_of_delta(
+        self, delta: ItemsDelta, helper: SideHelper
+    ) -> Tuple[Dict[ID, Item], Set[ID]]:
+        """Return the changed items of the given delta and the IDs of all the present items."""
+        items = {str(item[helper.id_key]): item for item in delta.items}
+        if delta.all_ids is not None:
+            present_ids = {str(id_) for id_ in delta.all_ids}
+        else:
+            present_ids = set(self._get_ids_map(helper).keys()).difference(
+                str(id_) for id_ in delta.deleted_ids
+            )
+        present_ids.update(items.keys())
+        logger.info(f"Fetched {len(items)} changed {helper} item(s) out of {len(present_ids)}")
+
+        return items, present_ids
+
+    def _resolve_provisional_ids(self, resolved: Dict[ID, Optional[Item]], helper: SideHelper):
+        """Replace the given provisional IDs with the IDs of the items actually created.
+
+        :param resolved: The created items by their provisional ID - None for the items whose
+                         creation failed
+        """
+        ids_map = self._get_ids_map(helper)
+        for provisional_id, item in resolved.items():
+            other_id = ids_map.pop(provisional_id, None)
+            self._remove_snapshots((provisional_id,), helper=helper)
             if item is None:
-                raise RuntimeError(f"Failed to retrieve serialized version of Item {item_id}")
-            pickle_dump(item, side_A_serdes_dir / item_id)
+                logger.error(
+                    f"Failed to insert the {helper} item corresponding to {helper.other} item"
+                    f" {other_id}, will retry on the next run..."
+                )
+                continue
 
-        # remove deleted pickled items
-        self._remove_serdes_files(helper=self._helper_B, ids=changes_B.deleted)
-        self._remove_serdes_files(helper=self._helper_A, ids=changes_A.deleted)
+            item_id = str(item[helper.id_key])
+            logger.debug(f"Resolved provisional {helper} ID {provisional_id} -> {item_id}")
+            if other_id is not None:
+                ids_map[item_id] = other_id
+            self._record_snapshot(item_id, item, helper=helper)
+            self._journal_upsert(item_id, item, other_id, helper=helper)
 
-        # synchronize
-        self._synchronizer.sync(changes_A=changes_A, changes_B=changes_B)
+    def _forget_rejected_updates(self, ids: Iterable[ID], helper: SideHelper):
+        """Forget the cached versions of the given items of the side that rejected their
+        updates, along with those of the items they correspond to.
 
-    def start(self):
-        """Initialization actions."""
-        self._side_A.start()
-        self._side_B.start()
+        Both items are then considered modified on the next run, which resolves the conflict
+        between them.
+        """
+        ids_map = self._get_ids_map(helper)
+        for item_id in ids:
+            other_id = ids_map.get(item_id)
+            logger.warning(
+                f"Update of {helper} item {item_id} was rejected, will retry on the next"
+                " run..."
+            )
+            self._remove_snapshots((item_id,), helper=helper)
+            records: List[JournalRecord] = [("del", helper.name, item_id)]
+            if other_id is not None:
+                assert helper.other is not None
+                self._remove_snapshots((other_id,), helper=helper.other)
+                records.append(("del", helper.other.name, other_id))
+            self._journal.append(*records)
+
+    def _restore_failed_deletions(self, ids: Iterable[ID], helper: SideHelper):
+        """Restore the cached versions and the correspondences of the given items of the side
+        that failed to delete them, so that they're deleted again on the next run.
+        """
+        deleted = self._get_deleted(helper)
+        ids_map = self._get_ids_map(helper)
+        for item_id in ids:
+            logger.warning(
+                f"Deletion of {helper} item {item_id} failed, will retry on the next run..."
+            )
+            other_id, item = deleted.get(item_id, (None, None))
+            records: List[JournalRecord] = []
+            if other_id is not None:
+                ids_map.forceput(item_id, other_id)
+                records.append(("map", helper.name, item_id, other_id))
+            if item is not None:
+                self._record_snapshot(item_id, item, helper=helper)
+                records.append(("put", helper.name, item_id, item))
+            if records:
+                self._journal.append(*records)
+
+        deleted.clear()
+
+    def _drop_provisional_ids(self, helper: SideHelper):
+        """Forget provisional IDs left over from a run that didn't get to resolve them.
+
+        Otherwise their correspondences would look like deleted items.
+        """
+        ids_map = self._get_ids_map(helper)
+        provisional_ids = [id_ for id_ in ids_map.keys() if is_provisional_id(id_)]
+        if not provisional_ids:
+            return
+
+        logger.warning(
+            f"Dropping {len(provisional_ids)} unresolved {helper} item(s) of a previous run,"
+            " they'll be inserted again..."
+        )
+        for id_ in provisional_ids:
+            del ids_map[id_]
+        self._remove_snapshots(provisional_ids, helper=helper)
 
-    def finish(self):
-        """Finalization actions."""
-        self._side_A.finish()
-        self._side_B.finish()
+    def _release_resources(self):
+        """Persist the preferences, close the snapshot stores and the journal and stop the
+        write pools.
+        """
+        self._persist_prefs()
+        # the preferences manager would otherwise overwrite the preferences in place, and
+        # non-atomically, at exit - with its own, by then stale, copy of them if another
+        # aggregator on the same preferences ran since, e.g., on the next round of the daemon
+        atexit.unregister(self.prefs_manager._cleanup)
+
+        self._journal.close()
+        for helper in (self._helper_A, self._helper_B):
+            snapshots, _ = self._get_snapshot_stores(helper)
+            snapshots.close()
+
+            write_pool = self._get_write_pool(helper)
+            if write_pool is not None:
+                write_pool.shutdown()
+
+    @abc.abstractmethod
+    def item_getter_for(self, item_id: ID, helper: SideHelper) -> Item:
+        """Item Getter."""
 
     # InserterFn = Callable[[Item], ID]
     def inserter_to(self, item: Item, helper: SideHelper) -> ID:
@@ -215,86 +570,189 @@ class Aggregator:
         Other side already has the item, and I'm also inserting it at this side.
         """
         item_side, _ = self._get_side_instances(helper)
-        serdes_dir, _ = self._get_serdes_dirs(helper)
         logger.info(
             f"[{helper.other}] Inserting item [{self._summary_of(item, helper):10}] at"
             f" {helper}..."
         )
 
-        item_created = item_side.add_item(item)
+        write_pool = self._get_write_pool(helper)
+        if write_pool is not None:
+            provisional_id = new_provisional_id()
+            write_pool.submit(
+                provisional_id,
+                partial(item_side.add_item, item),
+                on_success=lambda item_created: self._resolve_provisional_ids(
+                    {provisional_id: item_created}, helper=helper
+                ),
+                on_failure=lambda _: self._resolve_provisional_ids(
+                    {provisional_id: None}, helper=helper
+                ),
+            )
+            return provisional_id
+
+        item_created = self._get_direct_side(helper).add_item(item)
         item_created_id = str(item_created[helper.id_key])
 
-        # Cache both sides with pickle - f=id_
-        logger.debug(f'Pickling newly created {helper} item -> "{item_created_id}"')
-        pickle_dump(item_created, serdes_dir / item_created_id)
+        # Cache the newly created item
+        logger.debug(f'Caching newly created {helper} item -> "{item_created_id}"')
+        self._record_snapshot(item_created_id, item_created, helper=helper)
+        if not is_provisional_id(item_created_id):
+            self._journal_upsert(
+                item_created_id,
+                item_created,
+                self.config[f"{helper}_source_id"],
+                helper=helper,
+            )
 
         return item_created_id
 
     def updater_to(self, item_id: ID, item: Item, helper: SideHelper):
         """Updater."""
         side, _ = self._get_side_instances(helper)
-        serdes_dir, _ = self._get_serdes_dirs(helper)
         logger.info(
             f"[{helper.other}] Updating item [{self._summary_of(item, helper):10}] at"
             f" {helper}..."
         )
 
-        side.update_item(item_id, **item)
-        pickle_dump(item, serdes_dir / item_id)
+        write_pool = self._get_write_pool(helper)
+        if write_pool is not None:
+            # keep the previous snapshot if the update fails
+            write_pool.submit(
+                str(item_id),
+                partial(side.update_item, item_id, **item),
+                on_success=lambda _: self._record_update(item_id, item, helper=helper),
+            )
+            return
+
+        self._get_direct_side(helper).update_item(item_id, **item)
+        self._record_update(item_id, item, helper=helper)
+
+    def _record_update(self, item_id: ID, item: Item, helper: SideHelper):
+        self._record_snapshot(item_id, item, helper=helper)
+        self._journal_upsert(
+            item_id, item, self._get_ids_map(helper).get(item_id), helper=helper
+        )
 
     def deleter_to(self, item_id: ID, helper: SideHelper):
         """Deleter."""
         logger.info(f"[{helper}] Synchronising deleted item, id -> {item_id}...")
         side, _ = self._get_side_instances(helper)
-        side.delete_single_item(item_id)
 
-        self._remove_serdes_files(helper=helper, ids=(item_id,))
+        ids_map = self._get_ids_map(helper)
+        other_id = ids_map.get(item_id)
+
+        write_pool = self._get_write_pool(helper)
+        if write_pool is not None:
+            # the correspondence is dropped as soon as this returns - restore it if the
+            # deletion fails, so that it's retried on the next run
+
+            def restore_correspondence(_):
+                if other_id is not None:
+                    ids_map[item_id] = other_id
+
+            write_pool.submit(
+                str(item_id),
+                partial(side.delete_single_item, item_id),
+                on_success=lambda _: self._record_deletion(item_id, other_id, helper=helper),
+                on_failure=restore_correspondence,
+            )
+            return
+
+        self._get_direct_side(helper).delete_single_item(item_id)
+        self._record_deletion(item_id, other_id, helper=helper)
+
+    def _record_deletion(self, item_id: ID, other_id: Optional[ID], helper: SideHelper):
+        snapshots, _ = self._get_snapshot_stores(helper)
+        self._get_deleted(helper)[item_id] = (other_id, snapshots.get(item_id))
+        self._remove_snapshots((item_id,), helper=helper)
+        self._journal_delete(item_id, other_id, helper=helper)
+
+    def _tracking_source(self, converter: ConverterFn, helper: SideHelper) -> ConverterFn:
+        """Wrap the converter of items to the given side to remember the ID of the item it
+        converts.
+
+        The synchronizer converts each item right before inserting it, thus that's how the
+        inserter learns which item of the other side it inserts the counterpart of.
+        """
 
-    def item_getter_for(self, item_id: ID, helper: SideHelper) -> Item:
-        """Item Getter."""
-        logger.debug(f"Fetching {helper} item for id -> {item_id}")
-        side, _ = self._get_side_instances(helper)
-        item = side.get_item(item_id)
-        return item
+        def fn(item: Item) -> Item:
+            self.config[f"{helper}_source_id"] = str(item[helper.other.id_key])
+            return converter(item)
+
+        return fn
 
     def _item_has_update(self, prev_item: Item, new_item: Item, helper: SideHelper) -> bool:
         """Determine whether the item has been updated."""
         side, _ = self._get_side_instances(helper)
 
         return not side.items_are_identical(
-            prev_item, new_item, ignore_keys=[helper.id_key, *helper.ignore_keys]
+            prev_item, new_item, ignore_keys=self._comparison_ignore_keys(helper)
         )
 
+    def _fingerprint_of(self, item: Item, helper: SideHelper) -> Optional[str]:
+        side, _ = self._get_side_instances(helper)
+        return side.fingerprint(item, ignore_keys=self._comparison_ignore_keys(helper))
+
+    def _comparison_ignore_keys(self, helper: SideHelper) -> Sequence[str]:
+        return [helper.id_key, *helper.ignore_keys]
+
+    def _record_snapshot(self, item_id: ID, item: Item, helper: SideHelper):
+        """Cache the given version of the item along with its fingerprint."""
+        snapshots, _ = self._get_snapshot_stores(helper)
+        fingerprints = self._get_fingerprints(helper)
+
+        fingerprint = self._fingerprint_of(item, helper=helper)
+        snapshots.put(item_id, item)
+        if fingerprint is None:
+            fingerprints.pop(item_id, None)
+        else:
+            fingerprints[item_id] = fingerprint
+
+    def _remove_snapshots(self, ids: Iterable[ID], helper: SideHelper):
+        """Remove the cached versions of the given items along with their fingerprints."""
+        snapshots, _ = self._get_snapshot_stores(helper)
+        fingerprints = self._get_fingerprints(helper)
+
+        ids = list(ids)
+        snapshots.delete(ids)
+        for id_ in ids:
+            fingerprints.pop(id_, None)
+
     def _get_ids_map(self, helper: SideHelper):
         return self._B_to_A_map if helper is self._helper_B else self._B_to_A_map.inverse
 
-    def _get_serdes_dirs(self, helper: SideHelper) -> Tuple[Path, Path]:
-        serdes_dir = self.config[f"{helper}_serdes"]
-        other_serdes_dir = self.config[f"{helper.other}_serdes"]
+    def _get_snapshot_stores(self, helper: SideHelper) -> Tuple[SnapshotStore, SnapshotStore]:
+        snapshots = self.config[f"{helper}_snapshots"]
+        other_snapshots = self.config[f"{helper.other}_snapshots"]
+
+        return snapshots, other_snapshots
 
-        return serdes_dir, other_serdes_dir
+    def _get_write_pool(
+        self, helper: SideHelper
+    ) -> Optional[Union[WritePool, AsyncWritePool]]:
+        return self.config[f"{helper}_write_pool"]
 
-    def _get_side_instances(self, helper: SideHelper) -> Tuple[SyncSide, SyncSide]:
+    def _get_fingerprints(self, helper: SideHelper) -> Dict[ID, str]:
+        return self.config[f"{helper}_fingerprints"]
+
+    def _get_deleted(
+        self, helper: SideHelper
+    ) -> Dict[ID, Tuple[Optional[ID], Optional[Item]]]:
+        return self.config[f"{helper}_deleted"]
+
+    def _get_side_instances(self, helper: SideHelper) -> Tuple[SideT, SideT]:
         side = self._side_B if helper is self._helper_B else self._side_A
         other_side = self._side_A if helper is self._helper_B else self._side_B
 
         return side, other_side
 
-    def _remove_serdes_files(self, helper: SideHelper, *, ids: Iterable[ID]):
-        serdes_dir, _ = self._get_serdes_dirs(helper)
-
-        def full_path(id_: ID) -> Path:
-            return serdes_dir / str(id_)
-
-        for id_ in ids:
-            p = full_path(id_)
-            try:
-                p.unlink()
-            except FileNotFoundError:
-                logger.warning(f"File doesn't exist, this may indicate an error -> {p}")
-                logger.opt(exception=True).debug(
-                    f"File doesn't exist, this may indicate an error -> {p}"
-                )
+    def _get_direct_side(self, helper: SideHelper) -> SyncSide:
+        """Side to write to without a write pool - only the Aggregator writes this way, the
+        AsyncAggregator always goes through its pools.
+        """
+        side, _ = self._get_side_instances(helper)
+        assert isinstance(side, SyncSide)
+        return side
 
     def _summary_of(self, item: Item, helper: SideHelper, short=True) -> str:
         """Get the summary of the given item."""
@@ -303,3 +761,213 @@ class Aggregator:
             return ret[:10]
 
         return ret
+
+
+class Aggregator(BaseAggregator[SyncSide]):
+    """Aggregator class that manages the synchronization between two arbitrary sides.
+
+    Having an aggregator is handy for managing push/pull/sync directives in a
+    consistent manner.
+    """
+
+    def __init__(
+        self,
+        *,
+        side_A: SyncSide,
+        side_B: SyncSide,
+        converter_B_to_A: ConverterFn,
+        converter_A_to_B: ConverterFn,
+        resolution_strategy: ResolutionStrategy = AlwaysSecondRS(),
+        config_fname: Optional[str] = None,
+        ignore_keys: Tuple[Sequence[str], Sequence[str]] = tuple(),
+        snapshot_store_type: Type[SnapshotStore] = SQLiteSnapshotStore,
+        incremental: bool = False,
+        write_workers: Tuple[int, int] = (0, 0),
+    ):
+        super().__init__(
+            side_A=side_A,
+            side_B=side_B,
+            converter_B_to_A=converter_B_to_A,
+            converter_A_to_B=converter_A_to_B,
+            resolution_strategy=resolution_strategy,
+            config_fname=config_fname,
+            ignore_keys=ignore_keys,
+            snapshot_store_type=snapshot_store_type,
+            incremental=incremental,
+        )
+
+        # Pools of worker threads for writing to each side concurrently -----------------------
+        # 0 workers -> write synchronously, one item after the other.
+        for helper, workers in zip((self._helper_A, self._helper_B), write_workers):
+            if workers > 0:
+                self.config[f"{helper}_write_pool"] = WritePool(
+                    name=str(helper), workers=workers
+                )
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *_):
+        self.finish()
+
+    def sync(self):
+        """Entrypoint method."""
+        sync_started = time.time()
+        sync_state_A, sync_state_B = self._prepare_sync()
+
+        # fetch both sides at the same time - usually one of them is bound by the network and
+        # the other by the local disk
+        (items_A, present_ids_A), (items_B, present_ids_B) = self._run_for_both_sides(
+            lambda helper: self._fetch_items(
+                helper, sync_state=sync_state_A if helper is self._helper_A else sync_state_B
+            )
+        )
+
+        # find what's changed in each side
+        changes_A = self._process_changes(self._helper_A, items_A, present_ids=present_ids_A)
+        changes_B = self._process_changes(self._helper_B, items_B, present_ids=present_ids_B)
+
+        self._synchronize(changes_A, changes_B)
+
+        self._save_sync_state(sync_started, sync_state_A, sync_state_B)
+        self._persist_prefs()
+
+    def sync_items(self, ids_A: Iterable[ID] = (), ids_B: Iterable[ID] = ()):
+        """Synchronize only the given items, e.g., the ones known to have just changed.
+
+        Instead of listing both sides, each item is fetched on its own, along with the item it
+        corresponds to on the other side, so that conflicts are resolved just like in a full
+        synchronization. An item that no longer exists or no longer matches the filters of its
+        side is considered deleted.
+
+        Changes to any other items are left for the next full synchronization - the sync
+        state, e.g., the time of the last synchronization, is left untouched.
+        """
+        self._prepare_sync()
+        ids_A, ids_B = self._with_counterparts(ids_A, ids_B)
+        logger.info(
+            f"Synchronizing {len(ids_A)} {self._helper_A} and {len(ids_B)} {self._helper_B}"
+            " item(s)..."
+        )
+
+        (items_A, present_ids_A), (items_B, present_ids_B) = self._run_for_both_sides(
+            lambda helper: self._items_of_ids(
+                {
+                    item_id: self._get_side_instances(helper)[0].get_item(
+                        item_id, use_cached=False
+                    )
+                    for item_id in (ids_A if helper is self._helper_A else ids_B)
+                },
+                helper=helper,
+            )
+        )
+
+        changes_A = self._process_changes(self._helper_A, items_A, present_ids=present_ids_A)
+        changes_B = self._process_changes(self._helper_B, items_B, present_ids=present_ids_B)
+        self._synchronize(changes_A, changes_B)
+
+        self._persist_prefs()
+
+    def _synchronize(self, changes_A: SideChanges, changes_B: SideChanges):
+        """Apply the given changes to the other side of each."""
+        # commit the snapshots in one go at the end, even if the synchronization fails midway,
+        # so that they're in line with the ID correspondences
+        aborted = True
+        try:
+            try:
+                self._synchronizer.sync(changes_A=changes_A, changes_B=changes_B)
+            finally:
+                self._join_writes(self._helper_A)
+                self._join_writes(self._helper_B)
+                self._resolve_buffered_writes(self._helper_A)
+                self._resolve_buffered_writes(self._helper_B)
+            aborted = False
+        finally:
+            if aborted:
+                self._keep_completed_writes(changes_A, changes_B)
+            self._commit_state()
+
+    def _fetch_items(
+        self, helper: SideHelper, sync_state: Dict[str, Any]
+    ) -> Tuple[Dict[ID, Item], Optional[Set[ID]]]:
+        """Fetch the items of the given side.
+
+        In incremental mode, only the items that changed since the last run may be returned.
+        In that case, the IDs of all the items currently in the side are also returned,
+        otherwise None.
+        """
+        side, _ = self._get_side_instances(helper)
+        delta = side.get_items_delta(sync_state) if self._incremental else None
+        if delta is None:
+            items = {str(item[helper.id_key]): item for item in side.get_all_items()}
+            return items, None
+
+        items, present_ids = self._items_of_delta(delta, helper=helper)
+
+        # items we don't know of but weren't part of the delta, e.g., if the filters of the
+        # side changed - fetch them individually
+        for item_id in present_ids.difference(items.keys(), self._get_ids_map(helper).keys()):
+            item = side.get_item(item_id)
+            if item is None:
+                present_ids.discard(item_id)
+            else:
+                items[item_id] = item
+
+        return items, present_ids
+
+    def _resolve_buffered_writes(self, helper: SideHelper):
+        """Flush the writes buffered by the given side and replace the provisional IDs of the
+        items it created with the actual ones.
+
+        Items whose creation failed are dropped from the correspondences, so that they are
+        inserted again on the next run. Likewise, items whose update or deletion failed are
+        synchronized again on the next run.
+        """
+        side, _ = self._get_side_instances(helper)
+        self._resolve_provisional_ids(side.flush(), helper=helper)
+        self._forget_rejected_updates(side.pop_rejected_updates(), helper=helper)
+        self._restore_failed_deletions(side.pop_failed_deletions(), helper=helper)
+
+    def _join_writes(self, helper: SideHelper):
+        """Wait for the writes to the given side that run on its write pool, if any."""
+        write_pool = self._get_write_pool(helper)
+        if write_pool is not None:
+            assert isinstance(write_pool, WritePool)
+            write_pool.join()
+
+    def _run_for_both_sides(self, fn: Callable[[SideHelper], T]) -> Tuple[T, T]:
+        """Run the given function for each of the two sides concurrently.
+
+        Wait for both runs to finish. If any of them fails, re-raise its exception - that of
+        side A if both fail, so that what's reported doesn't depend on timing.
+
+        :return: The results for side A and side B
+        """
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="aggregator") as executor:
+            future_A = executor.submit(fn, self._helper_A)
+            future_B = executor.submit(fn, self._helper_B)
+            wait((future_A, future_B))
+
+        exc_A, exc_B = future_A.exception(), future_B.exception()
+        if exc_A is not None and exc_B is not None:
+            logger.opt(exception=exc_B).error(f"{self._helper_B} also failed")
+
+        return future_A.result(), future_B.result()
+
+    def start(self):
+        """Initialization actions."""
+        self._run_for_both_sides(lambda helper: self._get_side_instances(helper)[0].start())
+
+    def finish(self):
+        """Finalization actions."""
+        self._side_A.finish()
+        self._side_B.finish()
+        self._release_resources()
+
+    def item_getter_for(self, item_id: ID, helper: SideHelper) -> Item:
+        """Item Getter."""
+        logger.debug(f"Fetching {helper} item for id -> {item_id}")
+        side, _ = self._get_side_instances(helper)
+        item = side.get_item(item_id)
+        return item
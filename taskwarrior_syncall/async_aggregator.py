@@ -0,0 +1,235 @@
+"""Aggregator for sides with coroutine methods - see AsyncSyncSide.
+
+The synchronization runs in the same steps as in the Aggregator, but the network I/O of the two
+sides overlaps on a single event loop:
+
+- both sides are fetched at the same time,
+- the writes that the synchronizer decides on are gathered in an AsyncWritePool per side and
+  run together, with a bounded number of them in flight per side.
+
+Sides without an asyncio client can take part via
+:py:class:`taskwarrior_syncall.async_sync_side.ExecutorAsyncSide`.
+
+.. code-block:: python
+
+    async with AsyncAggregator(side_A=..., side_B=..., ...) as aggregator:
+        await aggregator.sync()
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+)
+
+from bubop import logger
+from item_synchronizer.resolution_strategy import AlwaysSecondRS, ResolutionStrategy
+from item_synchronizer.types import ID, ConverterFn, Item
+
+from taskwarrior_syncall.aggregator import BaseAggregator
+from taskwarrior_syncall.async_sync_side import AsyncSyncSide
+from taskwarrior_syncall.side_helper import SideHelper
+from taskwarrior_syncall.snapshot_store import SnapshotStore, SQLiteSnapshotStore
+from taskwarrior_syncall.write_pool import AsyncWritePool
+
+T = TypeVar("T")
+
+
+class AsyncAggregator(BaseAggregator[AsyncSyncSide]):
+    """Aggregator that synchronizes two AsyncSyncSide instances.
+
+    All the writes go through the write pools, thus items are always inserted with a provisional
+    ID, replaced by the actual one at the end of the synchronization - see
+    :py:mod:`taskwarrior_syncall.write_buffer`.
+    """
+
+    def __init__(
+        self,
+        *,
+        side_A: AsyncSyncSide,
+        side_B: AsyncSyncSide,
+        converter_B_to_A: ConverterFn,
+        converter_A_to_B: ConverterFn,
+        resolution_strategy: ResolutionStrategy = AlwaysSecondRS(),
+        config_fname: Optional[str] = None,
+        ignore_keys: Tuple[Sequence[str], Sequence[str]] = tuple(),
+        snapshot_store_type: Type[SnapshotStore] = SQLiteSnapshotStore,
+        incremental: bool = False,
+        write_concurrency: Tuple[int, int] = (8, 8),
+    ):
+        """
+        :param write_concurrency: Max number of writes in flight at a time for side A and side B
+        """
+        super().__init__(
+            side_A=side_A,
+            side_B=side_B,
+            converter_B_to_A=converter_B_to_A,
+            converter_A_to_B=converter_A_to_B,
+            resolution_strategy=resolution_strategy,
+            config_fname=config_fname,
+            ignore_keys=ignore_keys,
+            snapshot_store_type=snapshot_store_type,
+            incremental=incremental,
+        )
+
+        for helper, concurrency in zip((self._helper_A, self._helper_B), write_concurrency):
+            self.config[f"{helper}_write_pool"] = AsyncWritePool(
+                name=str(helper), concurrency=concurrency
+            )
+            # items fetched during the current synchronization
+            self.config[f"{helper}_items"] = {}
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *_):
+        await self.finish()
+
+    async def sync(self):
+        """Entrypoint method."""
+        sync_started = time.time()
+        sync_state_A, sync_state_B = self._prepare_sync()
+
+        fetched_A, fetched_B = await self._run_for_both_sides_async(
+            lambda helper: self._fetch_items_async(
+                helper, sync_state=sync_state_A if helper is self._helper_A else sync_state_B
+            )
+        )
+        await self._synchronize_async(fetched_A, fetched_B)
+
+        self._save_sync_state(sync_started, sync_state_A, sync_state_B)
+        self._persist_prefs()
+
+    async def sync_items(self, ids_A: Iterable[ID] = (), ids_B: Iterable[ID] = ()):
+        """Coroutine counterpart of `Aggregator.sync_items`."""
+        self._prepare_sync()
+        ids_A, ids_B = self._with_counterparts(ids_A, ids_B)
+
+        async def fetch(helper: SideHelper) -> Tuple[Dict[ID, Item], Set[ID]]:
+            item_ids = list(ids_A if helper is self._helper_A else ids_B)
+            side = self._get_async_side(helper)
+            fetched = await asyncio.gather(
+                *(side.get_item(item_id, use_cached=False) for item_id in item_ids)
+            )
+            return self._items_of_ids(dict(zip(item_ids, fetched)), helper=helper)
+
+        fetched_A, fetched_B = await self._run_for_both_sides_async(fetch)
+        await self._synchronize_async(fetched_A, fetched_B)
+
+        self._persist_prefs()
+
+    async def _synchronize_async(
+        self,
+        fetched_A: Tuple[Dict[ID, Item], Optional[Set[ID]]],
+        fetched_B: Tuple[Dict[ID, Item], Optional[Set[ID]]],
+    ):
+        """Detect the changes among the fetched items of each side and apply them to the other
+        side.
+        """
+        (items_A, present_ids_A), (items_B, present_ids_B) = fetched_A, fetched_B
+        self.config[f"{self._helper_A}_items"] = items_A
+        self.config[f"{self._helper_B}_items"] = items_B
+
+        changes_A = self._process_changes(self._helper_A, items_A, present_ids=present_ids_A)
+        changes_B = self._process_changes(self._helper_B, items_B, present_ids=present_ids_B)
+
+        # the synchronizer only schedules the writes, they run once the pools are joined
+        aborted = True
+        try:
+            try:
+                self._synchronizer.sync(changes_A=changes_A, changes_B=changes_B)
+            finally:
+                await self._run_for_both_sides_async(self._join_writes_async)
+                for helper in (self._helper_A, self._helper_B):
+                    side = self._get_async_side(helper)
+                    self._resolve_provisional_ids(await side.flush(), helper=helper)
+                    self._forget_rejected_updates(side.pop_rejected_updates(), helper=helper)
+                    self._restore_failed_deletions(side.pop_failed_deletions(), helper=helper)
+            aborted = False
+        finally:
+            if aborted:
+                self._keep_completed_writes(changes_A, changes_B)
+            self._commit_state()
+            self.config[f"{self._helper_A}_items"] = {}
+            self.config[f"{self._helper_B}_items"] = {}
+
+    async def _fetch_items_async(
+        self, helper: SideHelper, sync_state: Dict[str, Any]
+    ) -> Tuple[Dict[ID, Item], Optional[Set[ID]]]:
+        """Coroutine counterpart of `Aggregator._fetch_items`."""
+        side = self._get_async_side(helper)
+        delta = await side.get_items_delta(sync_state) if self._incremental else None
+        if delta is None:
+            items = {str(item[helper.id_key]): item for item in await side.get_all_items()}
+            return items, None
+
+        items, present_ids = self._items_of_delta(delta, helper=helper)
+
+        unknown_ids = list(
+            present_ids.difference(items.keys(), self._get_ids_map(helper).keys())
+        )
+        fetched = await asyncio.gather(*(side.get_item(item_id) for item_id in unknown_ids))
+        for item_id, item in zip(unknown_ids, fetched):
+            if item is None:
+                present_ids.discard(item_id)
+            else:
+                items[item_id] = item
+
+        return items, present_ids
+
+    async def _join_writes_async(self, helper: SideHelper):
+        write_pool = self._get_write_pool(helper)
+        assert isinstance(write_pool, AsyncWritePool)
+        await write_pool.join()
+
+    async def _run_for_both_sides_async(
+        self, fn: Callable[[SideHelper], Awaitable[T]]
+    ) -> Tuple[T, T]:
+        """Coroutine counterpart of `Aggregator._run_for_both_sides`."""
+        result_A, result_B = await asyncio.gather(
+            fn(self._helper_A), fn(self._helper_B), return_exceptions=True
+        )
+        if isinstance(result_A, BaseException):
+            if isinstance(result_B, BaseException):
+                logger.opt(exception=result_B).error(f"{self._helper_B} also failed")
+            raise result_A
+        if isinstance(result_B, BaseException):
+            raise result_B
+
+        return result_A, result_B
+
+    async def start(self):
+        """Initialization actions."""
+        await self._run_for_both_sides_async(
+            lambda helper: self._get_async_side(helper).start()
+        )
+
+    async def finish(self):
+        """Finalization actions."""
+        try:
+            await self._run_for_both_sides_async(
+                lambda helper: self._get_async_side(helper).finish()
+            )
+        finally:
+            self._release_resources()
+
+    def item_getter_for(self, item_id: ID, helper: SideHelper) -> Item:
+        """Item Getter - serve the items fetched at the start of the synchronization."""
+        logger.debug(f"Fetching {helper} item for id -> {item_id}")
+        return self.config[f"{helper}_items"].get(item_id)
+
+    def _get_async_side(self, helper: SideHelper) -> AsyncSyncSide:
+        side, _ = self._get_side_instances(helper)
+        return side
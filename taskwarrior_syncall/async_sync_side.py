@@ -0,0 +1,187 @@
+"""Interface of the synchronization sides with coroutine methods, for the AsyncAggregator.
+
+Sides backed by a client library with an asyncio API implement AsyncSyncSide directly. Any
+SyncSide can also be used as-is, by wrapping it in an ExecutorAsyncSide - its blocking methods
+then run on a pool of worker threads.
+"""
+import abc
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Sequence, Set, TypeVar, final
+
+from item_synchronizer.types import ID
+
+from taskwarrior_syncall.sync_side import ItemsDelta, ItemType, SyncSide
+
+T = TypeVar("T")
+
+
+class AsyncSyncSide(abc.ABC):
+    """Counterpart of SyncSide with coroutine methods for all the operations that do I/O.
+
+    The methods that only inspect items (`id_key`, `items_are_identical`, `fingerprint`, etc.)
+    remain synchronous - see SyncSide for the documentation of each method.
+    """
+
+    def __init__(self, name: str, fullname: str, *args, **kargs) -> None:
+        self._fullname = fullname
+        self._name = name
+
+    def __str__(self) -> str:
+        return self._fullname
+
+    @final
+    @property
+    def fullname(self) -> str:
+        return self._fullname
+
+    @final
+    @property
+    def name(self) -> str:
+        return self._name
+
+    async def start(self):
+        pass
+
+    async def finish(self):
+        pass
+
+    async def flush(self) -> Dict[ID, Optional[ItemType]]:
+        return {}
+
+    def pop_rejected_updates(self) -> Set[ID]:
+        return set()
+
+    def pop_failed_deletions(self) -> Set[ID]:
+        return set()
+
+    @abc.abstractmethod
+    async def get_all_items(self, **kargs) -> Sequence[ItemType]:
+        raise NotImplementedError("Implement in derived")
+
+    async def get_items_delta(self, sync_state: Dict[str, Any]) -> Optional[ItemsDelta]:
+        return None
+
+    @abc.abstractmethod
+    async def get_item(self, item_id: ID, use_cached: bool = False) -> Optional[ItemType]:
+        raise NotImplementedError("Implement in derived")
+
+    def matches_filters(self, item: ItemType) -> bool:
+        return True
+
+    @abc.abstractmethod
+    async def delete_single_item(self, item_id: ID):
+        raise NotImplementedError("Implement in derived")
+
+    @abc.abstractmethod
+    async def update_item(self, item_id: ID, **changes):
+        raise NotImplementedError("Implement in derived")
+
+    @abc.abstractmethod
+    async def add_item(self, item: ItemType) -> ItemType:
+        raise NotImplementedError("Implement in derived")
+
+    @abc.abstractmethod
+    def id_key(self) -> str:
+        raise NotImplementedError("Implement in derived")
+
+    @abc.abstractmethod
+    def summary_key(self) -> str:
+        raise NotImplementedError("Implement in derived")
+
+    @abc.abstractmethod
+    def last_modification_key(self) -> str:
+        raise NotImplementedError("Implement in derived")
+
+    @abc.abstractmethod
+    def items_are_identical(
+        self, item1: ItemType, item2: ItemType, ignore_keys: Sequence[str] = []
+    ) -> bool:
+        raise NotImplementedError("Implement in derived")
+
+    def fingerprint(self, item: ItemType, ignore_keys: Sequence[str] = []) -> Optional[str]:
+        return None
+
+
+class ExecutorAsyncSide(AsyncSyncSide):
+    """Run the methods of a synchronous SyncSide on a pool of worker threads.
+
+    With more than one worker, the wrapped side has to be safe to call from multiple threads
+    at once - e.g., the Google sides, which use a separate HTTP connection per thread. The
+    default of a single worker suits any side, e.g., TaskWarriorSide.
+    """
+
+    def __init__(self, side: SyncSide, max_workers: int = 1):
+        super().__init__(name=side.name, fullname=side.fullname)
+        self._side = side
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=f"{side.name}-side"
+        )
+
+    @property
+    def side(self) -> SyncSide:
+        """The wrapped side."""
+        return self._side
+
+    async def _run(self, fn: Callable[..., T], *args, **kargs) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(fn, *args, **kargs)
+        )
+
+    async def start(self):
+        await self._run(self._side.start)
+
+    async def finish(self):
+        try:
+            await self._run(self._side.finish)
+        finally:
+            self._executor.shutdown(wait=True)
+
+    async def flush(self) -> Dict[ID, Optional[ItemType]]:
+        return await self._run(self._side.flush)
+
+    def pop_rejected_updates(self) -> Set[ID]:
+        return self._side.pop_rejected_updates()
+
+    def pop_failed_deletions(self) -> Set[ID]:
+        return self._side.pop_failed_deletions()
+
+    async def get_all_items(self, **kargs) -> Sequence[ItemType]:
+        return await self._run(self._side.get_all_items, **kargs)
+
+    async def get_items_delta(self, sync_state: Dict[str, Any]) -> Optional[ItemsDelta]:
+        return await self._run(self._side.get_items_delta, sync_state)
+
+    async def get_item(self, item_id: ID, use_cached: bool = False) -> Optional[ItemType]:
+        return await self._run(self._side.get_item, item_id, use_cached=use_cached)
+
+    def matches_filters(self, item: ItemType) -> bool:
+        return self._side.matches_filters(item)
+
+    async def delete_single_item(self, item_id: ID):
+        return await self._run(self._side.delete_single_item, item_id)
+
+    async def update_item(self, item_id: ID, **changes):
+        return await self._run(self._side.update_item, item_id, **changes)
+
+    async def add_item(self, item: ItemType) -> ItemType:
+        return await self._run(self._side.add_item, item)
+
+    def id_key(self) -> str:
+        return self._side.id_key()
+
+    def summary_key(self) -> str:
+        return self._side.summary_key()
+
+    def last_modification_key(self) -> str:
+        return self._side.last_modification_key()
+
+    def items_are_identical(
+        self, item1: ItemType, item2: ItemType, ignore_keys: Sequence[str] = []
+    ) -> bool:
+        return self._side.items_are_identical(item1, item2, ignore_keys=ignore_keys)
+
+    def fingerprint(self, item: ItemType, ignore_keys: Sequence[str] = []) -> Optional[str]:
+        return self._side.fingerprint(item, ignore_keys=ignore_keys)
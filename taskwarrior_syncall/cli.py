@@ -39,6 +39,20 @@ def opt_tw_project():
     )
 
 
+def opt_tw_read_mode():
+    return click.option(
+        "--tw-read-mode",
+        "tw_read_mode",
+        type=click.Choice(["cli", "direct", "cross-check"]),
+        default="cli",
+        show_default=True,
+        help=(
+            "How to read the Taskwarrior tasks - via the task CLI, directly off the data files"
+            " of Taskwarrior, or both ways, reporting any differences"
+        ),
+    )
+
+
 def opt_resolution_strategy():
     return click.option(
         "-r",
@@ -49,6 +63,66 @@ def opt_resolution_strategy():
     )
 
 
+def opt_incremental():
+    return click.option(
+        "--incremental",
+        is_flag=True,
+        help=(
+            "Only fetch the items that changed since the last successful synchronization, for"
+            " the services that support it"
+        ),
+    )
+
+
+def opt_watch():
+    return click.option(
+        "--watch",
+        is_flag=True,
+        help=(
+            "Keep running after the first synchronization and synchronize again as soon as the"
+            " Taskwarrior tasks change - installs Taskwarrior hooks for that"
+        ),
+    )
+
+
+def opt_watch_interval():
+    return click.option(
+        "--watch-interval",
+        type=click.FloatRange(min=1),
+        default=300,
+        show_default=True,
+        help=(
+            "With --watch, seconds after which to synchronize even if Taskwarrior didn't"
+            " change, to pick up the changes of the other side"
+        ),
+    )
+
+
+def opt_batch_writes():
+    return click.option(
+        "--batch-writes",
+        is_flag=True,
+        help=(
+            "Buffer the changes to the services that support it and send them in batches,"
+            " instead of one request per item"
+        ),
+    )
+
+
+def opt_write_workers(name: str):
+    return click.option(
+        "--write-workers",
+        "write_workers",
+        type=click.IntRange(min=0),
+        default=0,
+        show_default=True,
+        help=(
+            f"Number of concurrent requests for writing to {name}. With 0, items are written"
+            " one after the other"
+        ),
+    )
+
+
 def opt_combination(name_A: str, name_B: str):
     return click.option(
         COMBINATION_FLAGS[0],
@@ -112,6 +186,20 @@ def opt_gkeep_passwd_pass_path():
     )
 
 
+def opt_gkeep_state_cache():
+    return click.option(
+        "--gkeep-state-cache/--no-gkeep-state-cache",
+        "gkeep_state_cache",
+        default=True,
+        show_default=True,
+        help=(
+            "Cache the master token of the Google account and the state of its notes in"
+            " ~/.gkeep_state.json, readable only by you, to resume from on the next run"
+            " instead of logging in with the password and downloading all the notes"
+        ),
+    )
+
+
 def opt_gcal_calendar():
     return click.option(
         "-c",
@@ -1,18 +1,20 @@
 import datetime
 import os
 from pathlib import Path
-from typing import Dict, List, Literal, Optional, Sequence, Union, cast
+from typing import Any, Dict, List, Literal, Optional, Sequence, Set, Tuple, Union, cast
 
 import dateutil
 import pkg_resources
 import pytz
 from bubop import format_datetime_tz, logger
 from googleapiclient import discovery
-from googleapiclient.http import HttpError
+from googleapiclient.http import HttpError, HttpRequest
 from item_synchronizer.types import ID
 
+from taskwarrior_syncall.async_sync_side import ExecutorAsyncSide
 from taskwarrior_syncall.google.google_side import GoogleSide
-from taskwarrior_syncall.sync_side import SyncSide
+from taskwarrior_syncall.sync_side import ItemsDelta, SyncSide
+from taskwarrior_syncall.write_buffer import WriteBuffer, is_provisional_id
 
 DEFAULT_CLIENT_SECRET = pkg_resources.resource_filename(
     "taskwarrior_syncall", os.path.join("res", "gcal_client_secret.json")
@@ -25,6 +27,10 @@ class GCalSide(GoogleSide):
 
     Adds, removes, and updates events on Google Calendar. Also handles the
     OAuth2 user authentication workflow.
+
+    With `batch_writes`, the inserts, updates and deletes are queued and sent in batch HTTP
+    requests of up to `_batch_size` calls each - see :py:mod:`taskwarrior_syncall.write_buffer`
+    for how the IDs of the events created this way are reported.
     """
 
     ID_KEY = "id"
@@ -40,11 +46,15 @@ class GCalSide(GoogleSide):
     _date_keys = ["end", "start", "updated"]
     _date_format = "%Y-%m-%d"
 
+    # max number of calls in a single batch request, as recommended by the API docs
+    _batch_size = 50
+
     def __init__(
         self,
         *,
         calendar_summary="TaskWarrior Reminders",
         client_secret,
+        batch_writes: bool = False,
         **kargs,
     ):
         if client_secret is None:
@@ -63,6 +73,20 @@ class GCalSide(GoogleSide):
         self._calendar_id = None
         self._items_cache: Dict[str, dict] = {}
 
+        # IDs of the events whose updates were rejected since they were modified in the meantime
+        self._rejected_updates: Set[str] = set()
+        # IDs of the events whose buffered deletions failed
+        self._failed_deletions: Set[str] = set()
+
+        self._write_buffer: Optional[WriteBuffer[HttpRequest]] = None
+        # buffered update/delete request -> ID of the event it updates/deletes
+        self._update_requests: Dict[HttpRequest, str] = {}
+        self._delete_requests: Dict[HttpRequest, str] = {}
+        if batch_writes:
+            self._write_buffer = WriteBuffer(
+                flush_fn=self._execute_batch, max_size=self._batch_size, name=self.fullname
+            )
+
     def start(self):
         logger.debug("Connecting to Google Calendar...")
         creds = self._get_credentials()
@@ -73,7 +97,10 @@ class GCalSide(GoogleSide):
         if self._calendar_id is None:
             logger.info(f"Creating calendar {self._calendar_summary}")
             new_cal = {"summary": self._calendar_summary}
-            ret = self._service.calendars().insert(body=new_cal).execute()  # type: ignore
+            ret = self._execute(
+                self._service.calendars().insert(body=new_cal),  # type: ignore
+                idempotent=False,
+            )
             assert "id" in ret
             new_cal_id = ret["id"]
             logger.info(f"Created calendar, id: {new_cal_id}")
@@ -81,12 +108,121 @@ class GCalSide(GoogleSide):
 
         logger.debug("Connected to Google Calendar.")
 
+    def finish(self):
+        if self._write_buffer is not None:
+            self._write_buffer.flush()
+
+        super().finish()
+
+    def flush(self) -> Dict[ID, Optional[dict]]:
+        if self._write_buffer is None:
+            return {}
+
+        self._write_buffer.flush()
+        return self._write_buffer.pop_resolved()
+
+    def pop_rejected_updates(self) -> Set[ID]:
+        rejected, self._rejected_updates = self._rejected_updates, set()
+        return rejected
+
+    def pop_failed_deletions(self) -> Set[ID]:
+        failed, self._failed_deletions = self._failed_deletions, set()
+        return failed
+
+    def _reject_update(self, item_id: str):
+        """Record that the update of the given event failed with 412 Precondition Failed."""
+        logger.warning(
+            f"Event {item_id} was modified in Google Calendar in the meantime, not overwriting"
+            " it"
+        )
+        self._items_cache.pop(item_id, None)
+        self._rejected_updates.add(item_id)
+
+    def _execute_batch(
+        self, writes: List[Tuple[str, HttpRequest]]
+    ) -> Dict[str, Optional[dict]]:
+        """Send the given writes in a single batch request.
+
+        Writes that fail with a retryable error (e.g., rate limiting) are sent again in a new
+        batch request.
+
+        :return: The resulting event of each successful write, by the key of the write
+        """
+        requests = dict(writes)
+        results: Dict[str, Optional[dict]] = {}
+        to_send = list(requests.keys())
+        attempt = 0
+        while to_send:
+            errors: Dict[str, HttpError] = {}
+
+            def callback(
+                request_id: str, response: Optional[dict], exception: Optional[HttpError]
+            ):
+                if exception is not None:
+                    errors[request_id] = exception
+                    return
+
+                results[request_id] = response
+                if isinstance(response, dict) and "id" in response:
+                    self._items_cache[response["id"]] = response
+
+            batch = self._service.new_batch_http_request(callback=callback)
+            for key in to_send:
+                batch.add(requests[key], request_id=key)
+            # a batch with insertions isn't idempotent as a whole
+            self._execute(batch, idempotent=not any(map(is_provisional_id, to_send)))
+
+            delays = {
+                key: self._executor.retry_delay(
+                    err, attempt=attempt, idempotent=not is_provisional_id(key)
+                )
+                for key, err in errors.items()
+            }
+            to_send = [key for key, delay in delays.items() if delay is not None]
+            for key, delay in delays.items():
+                if delay is not None:
+                    continue
+
+                # failed updates and deletions are reported, to be retried on the next run
+                status = errors[key].resp.status
+                updated_id = self._update_requests.get(requests[key])
+                deleted_id = self._delete_requests.get(requests[key])
+                if updated_id is not None and status == 412:
+                    self._reject_update(updated_id)
+                    continue
+                if deleted_id is not None and status in (404, 410):
+                    # already deleted
+                    continue
+
+                logger.error(f"Batched write to Google Calendar failed -> {errors[key]}")
+                if updated_id is not None:
+                    self._rejected_updates.add(updated_id)
+                elif deleted_id is not None:
+                    self._failed_deletions.add(deleted_id)
+
+            if to_send:
+                logger.warning(
+                    f"{len(to_send)} batched write(s) to Google Calendar failed, retrying..."
+                )
+                self._executor.wait(
+                    max(cast(float, delays[key]) for key in to_send),
+                    err=errors[to_send[0]],
+                    retries=len(to_send),
+                )
+                attempt += 1
+
+        for request in requests.values():
+            self._update_requests.pop(request, None)
+            self._delete_requests.pop(request, None)
+
+        return results
+
     def _fetch_cal_id(self) -> Optional[str]:
         """Return the id of the Calendar based on the given Summary.
 
         :returns: id or None if that was not found
         """
-        res = self._service.calendarList().list().execute()  # type: ignore
+        res = self._execute(self._service.calendarList().list())  # type: ignore
         calendars_list: List[dict] = res["items"]
 
         matching_calendars = [
@@ -106,24 +242,28 @@ class GCalSide(GoogleSide):
         """Clear all events from the current calendar."""
         # TODO Currently not functional - returning "400 Bad Request"
         logger.warning(f"Clearing all events from calendar {self._calendar_id}")
-        self._service.calendars().clear(calendarId=self._calendar_id).execute()
+        self._execute(self._service.calendars().clear(calendarId=self._calendar_id))
 
-    def get_all_items(self, **kargs):
-        """Get all the events for the calendar that we use.
+    def _list_events(self, **kargs) -> Tuple[List[dict], Optional[str]]:
+        """List the events of the calendar that we use, including the cancelled ones.
 
-        :param kargs: Extra options for the call
+        :param kargs: Extra options for the events().list call
+        :return: The events and the token to use for fetching only the events that change from
+                 now on
         """
-        # Get the ID of the calendar of interest
-        events = []
-        request = self._service.events().list(calendarId=self._calendar_id)
+        events: List[dict] = []
+        next_sync_token = None
+        request = self._service.events().list(calendarId=self._calendar_id, **kargs)
 
         # Loop until all pages have been processed.
         while request is not None:
             # Get the next page.
-            response = request.execute()
+            response = self._execute(request)
             # Accessing the response like a dict object with an 'items' key
             # returns a list of item objects (events).
-            events.extend([e for e in response.get("items", []) if e["status"] != "cancelled"])
+            events.extend(response.get("items", []))
+            # only present in the last page
+            next_sync_token = response.get("nextSyncToken", next_sync_token)
 
             # Get the next request object by passing the previous request
             # object to the list_next method.
@@ -131,9 +271,58 @@ class GCalSide(GoogleSide):
 
         # cache them
         for e in events:
-            self._items_cache[e["id"]] = e
+            if e["status"] == "cancelled":
+                self._items_cache.pop(e["id"], None)
+            else:
+                self._items_cache[e["id"]] = e
 
-        return events
+        return events, next_sync_token
+
+    def get_all_items(self, **kargs):
+        """Get all the events for the calendar that we use.
+
+        :param kargs: Extra options for the call
+        """
+        events, _ = self._list_events()
+        return [e for e in events if e["status"] != "cancelled"]
+
+    def get_items_delta(self, sync_state: Dict[str, Any]) -> Optional[ItemsDelta]:
+        """Get the events that changed since the last synchronization using the sync token
+        of the calendar.
+
+        The sync token is kept in the given sync state. If there's no valid sync token for the
+        calendar at hand, all the events are listed and a new sync token is stored.
+        """
+        sync_token = None
+        if sync_state.get("calendar_id") == self._calendar_id:
+            sync_token = sync_state.get("sync_token")
+
+        events = None
+        if sync_token is not None:
+            logger.debug("Fetching the events that changed since the last synchronization...")
+            try:
+                events, next_sync_token = self._list_events(syncToken=sync_token)
+            except HttpError as err:
+                if err.resp.status != 410:
+                    raise
+                logger.info("Sync token of Google Calendar expired, listing all the events...")
+
+        if events is None:
+            events, next_sync_token = self._list_events()
+            delta = ItemsDelta(
+                items=[e for e in events if e["status"] != "cancelled"],
+                all_ids={e["id"] for e in events if e["status"] != "cancelled"},
+            )
+        else:
+            delta = ItemsDelta(
+                items=[e for e in events if e["status"] != "cancelled"],
+                deleted_ids={e["id"] for e in events if e["status"] == "cancelled"},
+            )
+
+        sync_state["calendar_id"] = self._calendar_id
+        sync_state["sync_token"] = next_sync_token
+
+        return delta
 
     def get_item(self, item_id: str, use_cached: bool = True) -> Optional[dict]:
         item = self._items_cache.get(item_id)
@@ -145,10 +334,8 @@ class GCalSide(GoogleSide):
     def get_item_refresh(self, item_id: str) -> Optional[dict]:
         ret = None
         try:
-            ret = (
-                self._service.events()
-                .get(calendarId=self._calendar_id, eventId=item_id)
-                .execute()
+            ret = self._execute(
+                self._service.events().get(calendarId=self._calendar_id, eventId=item_id)
             )
             if ret["status"] == "cancelled":
                 ret = None
@@ -161,25 +348,77 @@ class GCalSide(GoogleSide):
             return ret
 
     def update_item(self, item_id, **changes):
-        # Check if item is there
-        event = (
-            self._service.events().get(calendarId=self._calendar_id, eventId=item_id).execute()
+        request = self._update_request(item_id, changes)
+        if self._write_buffer is not None:
+            # before adding it - a full buffer is flushed right away
+            self._update_requests[request] = item_id
+            self._write_buffer.add(request)
+            return
+
+        try:
+            event = self._execute(request)
+        except HttpError as err:
+            if err.resp.status == 412:
+                self._reject_update(item_id)
+                return
+            raise
+
+        self._items_cache[item_id] = event
+
+    def _update_request(self, item_id: str, changes: Dict[str, Any]) -> HttpRequest:
+        """Build the request for applying the given changes to an event.
+
+        Start from the cached version of the event, if any, so that there's no need to fetch
+        it first. The update only goes through if the event hasn't changed since it was cached
+        (ETag precondition) - if it has, the API responds with 412 Precondition Failed and the
+        next synchronization picks the latest version up.
+        """
+        event = self._items_cache.get(item_id)
+        if event is None:
+            # Check if item is there
+            event = self._execute(
+                self._service.events().get(calendarId=self._calendar_id, eventId=item_id)
+            )
+
+        event = {**event, **changes}
+        request = self._service.events().update(
+            calendarId=self._calendar_id, eventId=item_id, body=event
         )
-        event.update(changes)
-        self._service.events().update(
-            calendarId=self._calendar_id, eventId=event["id"], body=event
-        ).execute()
+        if "etag" in event:
+            request.headers["If-Match"] = event["etag"]
+
+        return request
 
     def add_item(self, item) -> dict:
-        event = (
-            self._service.events().insert(calendarId=self._calendar_id, body=item).execute()
+        if self._write_buffer is not None:
+            provisional_id = self._write_buffer.add(
+                self._service.events().insert(calendarId=self._calendar_id, body=item),
+                is_insertion=True,
+            )
+            return {**item, self.ID_KEY: provisional_id}
+
+        event = self._execute(
+            self._service.events().insert(calendarId=self._calendar_id, body=item),
+            idempotent=False,
         )
         logger.debug(f'Event created -> {event.get("htmlLink")}')
 
         return event
 
     def delete_single_item(self, item_id) -> None:
-        self._service.events().delete(calendarId=self._calendar_id, eventId=item_id).execute()
+        if self._write_buffer is not None:
+            self._items_cache.pop(item_id, None)
+            request = self._service.events().delete(
+                calendarId=self._calendar_id, eventId=item_id
+            )
+            # before adding it - a full buffer is flushed right away
+            self._delete_requests[request] = item_id
+            self._write_buffer.add(request)
+            return
+
+        self._execute(
+            self._service.events().delete(calendarId=self._calendar_id, eventId=item_id)
+        )
 
     @classmethod
     def id_key(cls) -> str:
@@ -272,6 +511,12 @@ class GCalSide(GoogleSide):
                 f"Unexpected type of a given date item, type: {type(dt)}, contents: {dt}"
             )
 
+    @classmethod
+    def fingerprint(cls, item, ignore_keys: Sequence[str] = []) -> Optional[str]:
+        return SyncSide._fingerprint(
+            item, keys=[k for k in cls._identical_comparison_keys if k not in ignore_keys]
+        )
+
     @classmethod
     def items_are_identical(cls, item1, item2, ignore_keys: Sequence[str] = []) -> bool:
         for item in [item1, item2]:
@@ -286,3 +531,15 @@ class GCalSide(GoogleSide):
             item2,
             keys=[k for k in cls._identical_comparison_keys if k not in ignore_keys],
         )
+
+
+class AsyncGCalSide(ExecutorAsyncSide):
+    """GCalSide for the AsyncAggregator.
+
+    The Google API client has no asyncio support, thus the requests run on worker threads -
+    several of them, since GoogleSide uses a separate HTTP connection per thread. The rate
+    limit of the wrapped side still applies to all of them.
+    """
+
+    def __init__(self, side: GCalSide, max_workers: int = 8):
+        super().__init__(side, max_workers=max_workers)
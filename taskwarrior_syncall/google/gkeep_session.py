@@ -0,0 +1,149 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from bubop import AuthenticationError, logger
+from gkeepapi import Keep
+from gkeepapi.exception import LoginException, ResyncRequiredException
+from gkeepapi.node import Label
+from gkeepapi.node import List as GKeepList
+from gkeepapi.node import TopLevelNode
+
+
+class GKeepSession:
+    """Logged-in Google Keep client, shared by the sides of all the notes to synchronize.
+
+    Looking up the notes by title and the labels by name would otherwise scan the whole
+    account, once per note. Instead, both are indexed once per download of the state of the
+    account, i.e., on every `sync`, and the index is kept up to date with the notes and labels
+    created in between.
+
+    The client isn't thread-safe, so don't use the session from several sides at the same time.
+    """
+
+    # master token and notes of the account, to resume from on the next run - see `login`
+    DEFAULT_STATE_CACHE = Path.home() / ".gkeep_state.json"
+
+    def __init__(self, keep: Keep, gkeep_user: str, state_cache: Optional[Path] = None):
+        """
+        :param keep: Client already logged in
+        :param gkeep_user: Account that the client is logged in to
+        :param state_cache: File to cache the state of the account in after each `sync` - None
+                            to not cache it
+        """
+        self._keep = keep
+        self._gkeep_user = gkeep_user
+        self._state_cache = state_cache
+        self._notes_by_title: Dict[str, List[TopLevelNode]] = {}
+        self._labels_by_name: Dict[str, Label] = {}
+        self._build_index()
+
+    @property
+    def keep(self) -> Keep:
+        return self._keep
+
+    @classmethod
+    def login(
+        cls, gkeep_user: str, gkeep_passwd: str, state_cache: Optional[Path] = None
+    ) -> "GKeepSession":
+        """Log in to Google Keep with the given credentials.
+
+        If the state of the account was cached by an earlier run, resume from it instead: no
+        password login, and only the notes that changed since then are downloaded.
+        """
+        logger.debug("Connecting to Google Keep...")
+        cached = cls._load_state(state_cache, gkeep_user)
+        if cached is not None:
+            keep = Keep()
+            try:
+                if keep.resume(
+                    gkeep_user, cached["master_token"], state=cached["state"], sync=False
+                ):
+                    logger.debug("Resumed Google Keep session, fetching the changes...")
+                    try:
+                        keep.sync()
+                    except ResyncRequiredException:
+                        logger.warning("Cached Google Keep state is stale, downloading all...")
+                        keep.sync(resync=True)
+                    logger.debug("Connected to Google Keep.")
+                    return cls(keep, gkeep_user, state_cache=state_cache)
+            except LoginException as err:
+                logger.warning(f"Couldn't resume the Google Keep session, logging in -> {err}")
+
+        keep = Keep()
+        success = keep.login(gkeep_user, gkeep_passwd)
+        if not success:
+            raise AuthenticationError(appname="Google Keep")
+
+        logger.debug("Connected to Google Keep.")
+        return cls(keep, gkeep_user, state_cache=state_cache)
+
+    def sync(self):
+        """Push the local changes to Google Keep, pull the remote ones and cache the state."""
+        self._keep.sync()
+        self._build_index()
+        if self._state_cache is not None:
+            self.save_state(self._state_cache)
+
+    def find_notes(self, title: str) -> List[TopLevelNode]:
+        """Notes with the given title that aren't in the trash."""
+        return [note for note in self._notes_by_title.get(title, []) if not note.trashed]
+
+    def get_label(self, name: str) -> Optional[Label]:
+        return self._labels_by_name.get(name)
+
+    def create_label(self, name: str) -> Label:
+        label = self._keep.createLabel(name)
+        self._labels_by_name[name] = label
+        return label
+
+    def create_list(self, title: str) -> GKeepList:
+        note = self._keep.createList(title)
+        self._notes_by_title.setdefault(title, []).append(note)
+        return note
+
+    def save_state(self, state_cache: Path):
+        """Cache the master token and the notes of the account, for `login` to resume from.
+
+        The file holds the credentials of the account - only the current user can read it.
+        """
+        contents = json.dumps(
+            {
+                "user": self._gkeep_user,
+                "master_token": self._keep.getMasterToken(),
+                "state": self._keep.dump(),
+            }
+        )
+
+        # write to a temporary file, renamed over the cache, so that it's never half-written
+        tmp_file = state_cache.with_name(f"{state_cache.name}.tmp")
+        # a leftover of an interrupted write keeps its mode when opened - start afresh
+        tmp_file.unlink(missing_ok=True)
+        fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(contents)
+        os.replace(tmp_file, state_cache)
+
+    @staticmethod
+    def _load_state(state_cache: Optional[Path], gkeep_user: str) -> Optional[Dict[str, Any]]:
+        """Return the cached state of the given account - None if there's none."""
+        if state_cache is None or not state_cache.is_file():
+            return None
+
+        try:
+            cached = json.loads(state_cache.read_text())
+        except ValueError:
+            logger.warning(f"Ignoring corrupt Google Keep state cache -> {state_cache}")
+            return None
+
+        if cached.get("user") != gkeep_user or not cached.get("master_token"):
+            return None
+
+        return cached
+
+    def _build_index(self):
+        self._notes_by_title = {}
+        for note in self._keep.all():
+            self._notes_by_title.setdefault(note.title, []).append(note)
+        self._labels_by_name = {label.name: label for label in self._keep.labels()}
@@ -1,5 +1,5 @@
 import datetime
-from typing import Any, Mapping, Sequence
+from typing import Any, Dict, Mapping, Optional, Sequence
 
 from bubop.time import is_same_datetime
 from gkeepapi.node import ListItem
@@ -12,8 +12,15 @@ class GKeepTodoItem(Mapping):
     """Currently a shim for the gkeepapi.node.ListItem.
 
     Exposes a similar API to the NotionTodoBlock class.
+
+    Items of Google Keep wrap the checkbox they represent. Items created otherwise, e.g., by the
+    converters or loaded from a snapshot, only hold their own values - a ListItem is costly to
+    construct, and pickling one drags along all of its node state. Items are pickled as the
+    tuple of their values.
     """
 
+    __slots__ = ("_inner", "_is_checked", "_plaintext", "_id", "_last_modified_date")
+
     _key_names = {
         "is_checked",
         "last_modified_date",
@@ -23,48 +30,64 @@ class GKeepTodoItem(Mapping):
 
     _date_key_names = {"last_modified_date"}
 
-    def __init__(self, is_checked: bool = False, plaintext: str = ""):
+    def __init__(
+        self,
+        is_checked: bool = False,
+        plaintext: str = "",
+        id: Optional[ID] = None,
+        last_modified_date: Optional[datetime.datetime] = None,
+    ):
         super().__init__()
 
         # Embedding the ListItem as a member variable of this. The alternative of inheriting
         # from list item wouldnt' really work as that would require *copying* the ListItem for
         # creating the said GKeepTodoItem parent class and that wouldn't work with the
         # reference to the ListItme that GKeep already keeps.
-        self._inner = ListItem()
+        self._inner: Optional[ListItem] = None
 
-        self.is_checked = is_checked
-        self.plaintext = plaintext
+        self._is_checked = is_checked
+        self._plaintext = plaintext
+        self._id = id
+        self._last_modified_date = last_modified_date
 
     @property
-    def id(self) -> ID:
-        return self._inner.id
+    def id(self) -> Optional[ID]:
+        return self._id if self._inner is None else self._inner.id
 
     @classmethod
     def from_raw_item(cls, gkeep_raw_item: dict) -> "GKeepTodoItem":
-        out = cls()
-        out._inner.load(gkeep_raw_item)
+        list_item = ListItem()
+        list_item.load(gkeep_raw_item)
 
-        return out
+        return cls.from_gkeep_list_item(list_item)
 
     @property
-    def is_checked(self):
-        return self._inner.checked
+    def is_checked(self) -> bool:
+        return self._is_checked if self._inner is None else self._inner.checked
 
     @is_checked.setter
-    def is_checked(self, val):
-        self._inner.checked = val
+    def is_checked(self, val: bool):
+        if self._inner is None:
+            self._is_checked = val
+        else:
+            self._inner.checked = val
 
     @property
-    def last_modified_date(self) -> datetime.datetime:
-        return self._inner.timestamps.updated
+    def last_modified_date(self) -> Optional[datetime.datetime]:
+        return (
+            self._last_modified_date if self._inner is None else self._inner.timestamps.updated
+        )
 
     @property
     def plaintext(self) -> str:
-        return self._inner.text
+        return self._plaintext if self._inner is None else self._inner.text
 
     @plaintext.setter
     def plaintext(self, val: str) -> None:
-        self._inner.text = val
+        if self._inner is None:
+            self._plaintext = val
+        else:
+            self._inner.text = val
 
     @classmethod
     def from_gkeep_list_item(cls, list_item: ListItem) -> "GKeepTodoItem":
@@ -72,6 +95,22 @@ class GKeepTodoItem(Mapping):
         out._inner = list_item
         return out
 
+    def __reduce__(self):
+        return (
+            self.__class__,
+            (self.is_checked, self.plaintext, self.id, self.last_modified_date),
+        )
+
+    def __setstate__(self, state: Dict[str, Any]):
+        """Load the snapshots pickled before the item was slotted, i.e., with its ListItem."""
+        inner: ListItem = state["_inner"]
+        self.__init__(  # type: ignore[misc]
+            is_checked=inner.checked,
+            plaintext=inner.text,
+            id=inner.id,
+            last_modified_date=inner.timestamps.updated,
+        )
+
     def __getitem__(self, key) -> Any:
         return getattr(self, key)
 
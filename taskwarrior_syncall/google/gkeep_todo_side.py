@@ -1,12 +1,13 @@
-from typing import Optional, Sequence
+from pathlib import Path
+from typing import Dict, Optional, Sequence
 
-from bubop import AuthenticationError, logger
-from gkeepapi import Keep
+from bubop import logger
 from gkeepapi.node import Label
 from gkeepapi.node import List as GKeepList
 from gkeepapi.node import TopLevelNode
 from item_synchronizer.types import ID
 
+from taskwarrior_syncall.google.gkeep_session import GKeepSession
 from taskwarrior_syncall.google.gkeep_todo_item import GKeepTodoItem
 from taskwarrior_syncall.sync_side import SyncSide
 
@@ -24,18 +25,31 @@ class GKeepTodoSide(SyncSide):
     def __init__(
         self,
         note_title: str,
-        gkeep_user: str,
-        gkeep_passwd: str,
+        gkeep_user: Optional[str] = None,
+        gkeep_passwd: Optional[str] = None,
         notes_label: Optional[str] = None,
+        session: Optional[GKeepSession] = None,
+        state_cache: Optional[Path] = GKeepSession.DEFAULT_STATE_CACHE,
     ):
         """
         Initialise The GKeepTodoSide.
 
         :param note_title: Title of the note whose items will be synchronized with Taskwarrior.
-        :param gkeep_user: Username to use for authenticating with Google Keep
-        :param gkeep_passwd: Password to use for authenticating with Google Keep
+        :param gkeep_user: Username to use for authenticating with Google Keep - required
+                           unless a session is given
+        :param gkeep_passwd: Password to use for authenticating with Google Keep - required
+                             unless a session is given
         :param notes_label: Add this label to all the notes that this instance touches
+        :param session: Session already logged in, e.g., shared with the sides of other
+                        notes - it isn't thread-safe, so don't use it from several sides at the
+                        same time. It's synced on `start`, to fetch the latest notes
+        :param state_cache: File to cache the state of the account in, across runs - None to
+                            log in and download all the notes on every run. Only used if no
+                            session is given
         """
+        if session is None and not (gkeep_user and gkeep_passwd):
+            raise ValueError("Either a session or the Google Keep credentials are required")
+
         super().__init__(
             name="GKeep",
             fullname="Google Keep",
@@ -45,26 +59,33 @@ class GKeepTodoSide(SyncSide):
         self._gkeep_passwd = gkeep_passwd
         self._notes_label_str = notes_label
         self._notes_label: Optional[Label] = None
-        self._keep: Keep
+        self._session: GKeepSession = session  # type: ignore
+        self._state_cache = state_cache
         self._note: GKeepList
 
+        # wrappers of the checkboxes of the note by ID, reused throughout the synchronization
+        self._items: Dict[ID, GKeepTodoItem] = {}
+
         self._pending_items: Sequence[GKeepTodoItem] = []
 
     def start(self):
-        logger.debug("Connecting to Google Keep...")
-        self._keep = Keep()
-        success = self._keep.login(self._gkeep_user, self._gkeep_passwd)
-        if not success:
-            raise AuthenticationError(appname="Google Keep")
-
-        logger.debug("Connected to Google Keep.")
+        if self._session is None:
+            assert self._gkeep_user and self._gkeep_passwd
+            self._session = GKeepSession.login(
+                self._gkeep_user, self._gkeep_passwd, state_cache=self._state_cache
+            )
+        else:
+            # shared session, e.g., across the rounds of the daemon - pick up the changes made
+            # since its last sync
+            logger.debug("Fetching the changes from Google Keep...")
+            self._session.sync()
 
         # create a new label if one was provided / use existing one -----------------------
         if self._notes_label_str is not None:
-            label = self._get_label_by_name(self._notes_label_str)
+            label = self._session.get_label(self._notes_label_str)
             if label is None:
                 logger.debug(f"Creating new label -> {self._notes_label_str}...")
-                self._notes_label = self._keep.createLabel(self._notes_label_str)
+                self._notes_label = self._session.create_label(self._notes_label_str)
             else:
                 logger.debug(f"Using existing label -> {self._notes_label_str}...")
                 self._notes_label = label
@@ -76,8 +97,8 @@ class GKeepTodoSide(SyncSide):
         # - If there are multiple matching note names, throw an error
         # - If the note is not found by its name it will be created
         logger.debug(f'Looking for notes with a matching title - "{self._note_title}"')
-        notes_w_matching_title: Sequence[TopLevelNode] = list(
-            self._keep.find(func=lambda x: x.title == self._note_title)
+        notes_w_matching_title: Sequence[TopLevelNode] = self._session.find_notes(
+            self._note_title
         )
 
         # found matching note(s)
@@ -151,19 +172,14 @@ class GKeepTodoSide(SyncSide):
 
     def finish(self):
         logger.info("Flushing data to remote Google Keep...")
-        self._keep.sync()
-
-    def _get_label_by_name(self, label: str) -> Optional[Label]:
-        for la in self._keep.labels():
-            if la.name == label:
-                return la
+        self._session.sync()
 
     def _create_note(self, note_title: str) -> GKeepList:
         """Create a new note (list of items) in Google Keep.
 
         Applies the predefined label to the note - if one was provided during initialization.
         """
-        li = self._keep.createList(note_title)
+        li = self._session.create_list(note_title)
         if self._notes_label is not None:
             li.labels.add(self._notes_label)
 
@@ -171,16 +187,21 @@ class GKeepTodoSide(SyncSide):
 
     def get_all_items(self, **kargs) -> Sequence[GKeepTodoItem]:
         """Get all the todo entries of the Note in use."""
-        return tuple(
-            GKeepTodoItem.from_gkeep_list_item(child) for child in self._note.children
-        )
+        items = {}
+        for child in self._note.children:
+            item = self._items.get(child.id)
+            if item is None or item._inner is not child:
+                item = GKeepTodoItem.from_gkeep_list_item(child)
+            items[child.id] = item
+        self._items = items
+
+        return tuple(items.values())
 
     def get_item(self, item_id: str, use_cached: bool = True) -> Optional[GKeepTodoItem]:
-        item = self._note.get(item_id)
+        item = self._find_item(item_id)
         if item is None:
             logger.warning(f"Couldn't fetch Google Keep item with id {item_id}.")
-            return None
-        return GKeepTodoItem.from_gkeep_list_item(item)
+        return item
 
     def update_item(self, item_id: ID, **updated_properties):
         if not {"plaintext", "is_checked"}.issubset(updated_properties.keys()):
@@ -194,21 +215,40 @@ class GKeepTodoSide(SyncSide):
         item.is_checked = new_is_checked
 
     def add_item(self, item: GKeepTodoItem) -> GKeepTodoItem:
-        new_item = self._note.add(text=item.plaintext, checked=item.is_checked)
-        return GKeepTodoItem.from_gkeep_list_item(new_item)
+        new_item = GKeepTodoItem.from_gkeep_list_item(
+            self._note.add(text=item.plaintext, checked=item.is_checked)
+        )
+        self._items[new_item.id] = new_item
+        return new_item
 
     def delete_single_item(self, item_id: ID) -> None:
         item = self._get_item_by_id(item_id=item_id)
         item.delete()
+        self._items.pop(item_id, None)
 
     def _get_item_by_id(self, item_id: ID) -> GKeepTodoItem:
-        item = self._note.get(item_id)
+        item = self._find_item(item_id)
         if item is None:
             raise RuntimeError(
                 f"Requested the deletion of item {item_id} but that item cannot be found"
             )
 
-        return GKeepTodoItem.from_gkeep_list_item(item)
+        return item
+
+    def _find_item(self, item_id: ID) -> Optional[GKeepTodoItem]:
+        """Wrapper of the given checkbox of the note - None if there's no such checkbox or it's
+        deleted.
+        """
+        item = self._items.get(item_id)
+        if item is None:
+            # not listed yet, e.g., get_all_items wasn't called
+            list_item = self._note.get(item_id)
+            if list_item is None or list_item.deleted:
+                return None
+            item = GKeepTodoItem.from_gkeep_list_item(list_item)
+            self._items[item_id] = item
+
+        return item
 
     @classmethod
     def id_key(cls) -> str:
@@ -222,6 +262,14 @@ class GKeepTodoSide(SyncSide):
     def last_modification_key(cls) -> str:
         return "last_modified_date"
 
+    @classmethod
+    def fingerprint(
+        cls, item: GKeepTodoItem, ignore_keys: Sequence[str] = []
+    ) -> Optional[str]:
+        return SyncSide._fingerprint(
+            item, keys=[k for k in GKeepTodoItem._key_names if k not in ignore_keys]
+        )
+
     @classmethod
     def items_are_identical(
         cls, item1: GKeepTodoItem, item2: GKeepTodoItem, ignore_keys: Sequence[str] = []
@@ -1,16 +1,57 @@
+import json
 import pickle
+import threading
 from pathlib import Path
-from typing import Sequence
+from typing import Any, Dict, Optional, Sequence, Set, Tuple
 
+import httplib2
 from bubop import logger
 from google.auth.transport.requests import Request
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import InstalledAppFlow
+from googleapiclient.http import HttpError
 
+from taskwarrior_syncall.request_executor import RequestExecutor, parse_retry_after
 from taskwarrior_syncall.sync_side import SyncSide
 
+_RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded"}
+
+
+def _error_reasons(content: Optional[bytes]) -> Set[str]:
+    """Reasons of the errors in the JSON body of a failed Google API request."""
+    try:
+        errors = json.loads(content or b"")["error"]["errors"]
+        return {error["reason"] for error in errors}
+    except (ValueError, TypeError, KeyError):
+        return set()
+
+
+def google_error_info(err: Exception) -> Optional[Tuple[int, Optional[float]]]:
+    """Extract the HTTP status and the Retry-After of a failed Google API request."""
+    if isinstance(err, HttpError):
+        status = err.resp.status
+        # quota errors are reported as 403s
+        if status == 403 and _error_reasons(err.content) & _RATE_LIMIT_REASONS:
+            status = 429
+        return status, parse_retry_after(err.resp.get("retry-after"))
+    if isinstance(err, (ConnectionError, TimeoutError)):
+        return 503, None
+
+    return None
+
 
 class GoogleSide(SyncSide):
-    """Abstract parent for integrations that consume Google services."""
+    """Abstract parent for integrations that consume Google services.
+
+    The credentials are kept in memory once obtained, by the file that caches them, so that
+    the sides of the same service in a process authenticate only once.
+    """
+
+    # rate limit of the requests to the service - stay below the default per-user quotas
+    _requests_per_second = 5.0
+
+    _credentials_by_cache: Dict[Path, Any] = {}
+    _credentials_lock = threading.Lock()
 
     def __init__(
         self,
@@ -18,8 +59,13 @@ class GoogleSide(SyncSide):
         oauth_port: int,
         credentials_cache: Path,
         client_secret: Path,
+        executor: Optional[RequestExecutor] = None,
         **kargs,
     ):
+        """
+        :param executor: Executor of the requests to the service, e.g., to share its rate limit
+                         with other sides of the same service - a new one by default
+        """
         super().__init__(**kargs)
 
         self._scopes = scopes
@@ -29,6 +75,51 @@ class GoogleSide(SyncSide):
 
         # If you modify this, delete your previously saved credentials
         self._service = None
+        self._credentials = None
+
+        # httplib2 isn't thread-safe - each thread issuing requests gets its own connection
+        self._thread_local = threading.local()
+
+        if executor is None:
+            executor = RequestExecutor(
+                name=self.fullname,
+                error_info=google_error_info,
+                rate=self._requests_per_second,
+            )
+        self._executor = executor
+
+    @property
+    def executor(self) -> RequestExecutor:
+        return self._executor
+
+    def finish(self):
+        logger.info(f"{self}: {self._executor.metrics}")
+
+    def _execute(self, request, idempotent: bool = True) -> Any:
+        """Execute the given API request, respecting the rate limit and retrying on errors.
+
+        Safe to call from multiple threads.
+
+        :param idempotent: False for requests that create items - see
+                           `RequestExecutor.retry_delay`
+        """
+        http = self._http_for_thread()
+        if http is None:
+            return self._executor.execute(request.execute, idempotent=idempotent)
+
+        return self._executor.execute(request.execute, idempotent=idempotent, http=http)
+
+    def _http_for_thread(self) -> Optional[AuthorizedHttp]:
+        """Authorized HTTP connection of the current thread - None if not authenticated yet."""
+        if self._credentials is None:
+            return None
+
+        http = getattr(self._thread_local, "http", None)
+        if http is None:
+            http = AuthorizedHttp(self._credentials, http=httplib2.Http())
+            self._thread_local.http = http
+
+        return http
 
     def _get_credentials(self):
         """Gets valid user credentials from storage.
@@ -38,7 +129,16 @@ class GoogleSide(SyncSide):
 
         :return: Credentials, the obtained credentials.
         """
+        with GoogleSide._credentials_lock:
+            creds = GoogleSide._credentials_by_cache.get(self._credentials_cache)
+            if creds is None or not creds.valid:
+                creds = self._load_credentials()
+                GoogleSide._credentials_by_cache[self._credentials_cache] = creds
+
+        self._credentials = creds
+        return creds
 
+    def _load_credentials(self):
         creds = None
         credentials_cache = self._credentials_cache
         if credentials_cache.is_file():
@@ -1,29 +1,175 @@
-from typing import Dict, Optional, Sequence, cast
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, cast
 
 from bubop import logger
-from notion_client import Client
+from notion_client import AsyncClient, Client
+from notion_client.errors import HTTPResponseError, RequestTimeoutError
 
+from taskwarrior_syncall.async_sync_side import AsyncSyncSide
 from taskwarrior_syncall.notion_todo_block import NotionTodoBlock
+from taskwarrior_syncall.request_executor import RequestExecutor, parse_retry_after
 from taskwarrior_syncall.sync_side import SyncSide
 from taskwarrior_syncall.types import NotionID, NotionPageContents, NotionTodoBlockItem
+from taskwarrior_syncall.write_buffer import WriteBuffer
 
 
-class NotionSide(SyncSide):
+def notion_error_info(err: Exception) -> Optional[Tuple[int, Optional[float]]]:
+    """Extract the HTTP status and the Retry-After of a failed Notion API request."""
+    if isinstance(err, HTTPResponseError):
+        return err.status, parse_retry_after(err.headers.get("retry-after"))
+    if isinstance(err, RequestTimeoutError):
+        return 504, None
+
+    return None
+
+
+class _NotionPage:
+    """Todo blocks of a Notion page - the arguments of the requests to the API and the parsing
+    of their responses.
+
+    Shared by NotionSide and AsyncNotionSide, which only differ in how they make the requests.
+    """
+
+    # max number of children blocks per page of results that the API allows
+    _page_size = 100
+
+    _page_id: NotionID
+    _all_todo_blocks: Dict[NotionID, NotionTodoBlock]
+
+    def matches_filters(self, item: NotionTodoBlock) -> bool:
+        # deleted blocks are only archived - they're not among the children of the page
+        return not item.is_archived
+
+    def _list_kargs(self, start_cursor: Optional[str]) -> Dict[str, Any]:
+        """Arguments of blocks.children.list for the page of results at the given cursor."""
+        kargs: Dict[str, Any] = {"block_id": self._page_id, "page_size": self._page_size}
+        if start_cursor is not None:
+            kargs["start_cursor"] = start_cursor
+
+        return kargs
+
+    @staticmethod
+    def _next_cursor(page_contents: NotionPageContents) -> Optional[str]:
+        """Cursor of the page of results after the given one - None if it's the last one."""
+        if not page_contents.get("has_more"):
+            return None
+
+        return page_contents["next_cursor"]
+
+    def _cache_retrieved(self, todo_block_item: NotionTodoBlockItem) -> NotionTodoBlock:
+        """Parse and cache the response of blocks.retrieve."""
+        try:
+            todo_block = NotionTodoBlock.from_raw_item(todo_block_item)
+        except RuntimeError:
+            # the to_do section is missing when the item is archived?!
+            raise KeyError
+
+        assert todo_block.id is not None
+        self._all_todo_blocks[todo_block.id] = todo_block
+
+        return todo_block
+
+    @staticmethod
+    def get_vanilla_notion_todo_section(text: str, is_checked: bool) -> dict:
+        return {
+            "text": [{"type": "text", "text": {"content": text}}],
+            "checked": is_checked,
+        }
+
+    def _update_kargs(
+        self, item_id: NotionID, updated_properties: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Arguments of blocks.update for the given changes - None if they're invalid."""
+        if not {"plaintext", "is_checked"}.issubset(updated_properties.keys()):
+            logger.warning(f"Invalid changes provided to Notion Side -> {updated_properties}")
+            return None
+
+        return {
+            "block_id": item_id,
+            "to_do": self.get_vanilla_notion_todo_section(
+                text=updated_properties["plaintext"],
+                is_checked=updated_properties["is_checked"],
+            ),
+        }
+
+    def _append_kargs(self, items: Sequence[NotionTodoBlock]) -> Dict[str, Any]:
+        """Arguments of blocks.children.append for appending the given todo blocks."""
+        return {"block_id": self._page_id, "children": [item.serialize() for item in items]}
+
+    def _added_todo(self, page_contents: NotionPageContents) -> NotionTodoBlock:
+        """Parse the response of blocks.children.append for a single todo block."""
+        todo_blocks = self.find_todos(page_contents=page_contents)
+        if len(todo_blocks) != 1:
+            logger.warning(
+                "Expected to get back 1 TODO item, blocks.children.append(...) returned"
+                f" {len(todo_blocks)} items. Adding only the first"
+            )
+
+        return todo_blocks[0]
+
+    @staticmethod
+    def find_todos(page_contents: NotionPageContents) -> Sequence[NotionTodoBlock]:
+        assert page_contents["object"] == "list"
+        todos = tuple(
+            NotionTodoBlock.from_raw_item(cast(NotionTodoBlockItem, block))
+            for block in page_contents["results"]
+            if NotionTodoBlock.is_todo(block)
+        )
+
+        return todos
+
+
+class NotionSide(_NotionPage, SyncSide):
     """
     Wrapper class to add/modify/delete todo blocks from notion, create new pages, etc.
+
+    With `batch_writes`, new todo blocks are buffered and appended to the page in chunks of up
+    to `_append_size` blocks per call - see :py:mod:`taskwarrior_syncall.write_buffer` for how
+    the IDs of the blocks created this way are reported.
     """
 
     _date_keys = "last_modified_date"
 
-    def __init__(self, client: Client, page_id: NotionID):
+    # max number of children blocks that a single append call accepts
+    _append_size = 100
+    # rate limit of the requests to the API - an average of 3 requests per second is allowed
+    _requests_per_second = 3.0
+
+    def __init__(
+        self,
+        client: Client,
+        page_id: NotionID,
+        batch_writes: bool = False,
+        executor: Optional[RequestExecutor] = None,
+    ):
+        """
+        :param executor: Executor of the requests to the API, e.g., to share its rate limit with
+                         the sides of other pages - a new one by default
+        """
         self._client = client
         self._page_id = page_id
-        self._page_contents: NotionPageContents
-        self._all_todo_blocks: Dict[NotionID, NotionTodoBlock]
+        self._all_todo_blocks = {}
         self._is_cached = False
 
         super().__init__(name="Notion", fullname="Notion")
 
+        if executor is None:
+            executor = RequestExecutor(
+                name=self.fullname,
+                error_info=notion_error_info,
+                rate=self._requests_per_second,
+            )
+        self._executor = executor
+
+        self._write_buffer: Optional[WriteBuffer[NotionTodoBlock]] = None
+        if batch_writes:
+            self._write_buffer = WriteBuffer(
+                flush_fn=self._append_todos, max_size=self._append_size, name=self.fullname
+            )
+
+    @property
+    def executor(self) -> RequestExecutor:
+        return self._executor
+
     @classmethod
     def id_key(cls) -> str:
         return "id"
@@ -38,14 +184,54 @@ class NotionSide(SyncSide):
 
     def start(self):
         logger.info(f"Initializing {self.fullname}...")
-        self._page_contents = self._client.blocks.children.list(block_id=self._page_id)
+
+    def finish(self):
+        if self._write_buffer is not None:
+            self._write_buffer.flush()
+
+        logger.info(f"{self}: {self._executor.metrics}")
+
+    def _request(self, fn: Callable[..., Any], *args, idempotent: bool = True, **kargs) -> Any:
+        """Call the given client method, respecting the rate limit and retrying on errors.
+
+        :param idempotent: False for requests that create blocks - see
+                           `RequestExecutor.retry_delay`
+        """
+        return self._executor.execute(fn, *args, idempotent=idempotent, **kargs)
+
+    def flush(self) -> Dict[NotionID, Optional[NotionTodoBlock]]:
+        if self._write_buffer is None:
+            return {}
+
+        self._write_buffer.flush()
+        return self._write_buffer.pop_resolved()
+
+    def iter_todos(self) -> Iterator[NotionTodoBlock]:
+        """Iterate over the todo blocks of the page.
+
+        The children blocks of the page are fetched lazily, one page of results at a time, as
+        the iteration proceeds.
+        """
+        start_cursor = None
+        while True:
+            page_contents: NotionPageContents = self._request(
+                self._client.blocks.children.list, **self._list_kargs(start_cursor)
+            )
+
+            yield from self.find_todos(page_contents=page_contents)
+
+            start_cursor = self._next_cursor(page_contents)
+            if start_cursor is None:
+                break
 
     def _get_todo_blocks(self) -> Dict[NotionID, NotionTodoBlock]:
-        all_todos = self.find_todos(page_contents=self._page_contents)
-        # make sure that all IDs are valid and not None
-        assert all([todo.id is not None for todo in all_todos])
+        all_todos: Dict[NotionID, NotionTodoBlock] = {}
+        for todo in self.iter_todos():
+            # make sure that all IDs are valid and not None
+            assert todo.id is not None
+            all_todos[todo.id] = todo
 
-        return {cast(NotionID, todo.id): todo for todo in all_todos}
+        return all_todos
 
     def get_all_items(self, **kargs) -> Sequence[NotionTodoBlock]:
         self._all_todo_blocks = self._get_todo_blocks()
@@ -61,51 +247,60 @@ class NotionSide(SyncSide):
             return self._all_todo_blocks.get(item_id)
 
         # have to fetch and cache it again
-        new_todo_block_item: NotionTodoBlockItem = self._client.blocks.retrieve(item_id)
-        try:
-            new_todo_block = NotionTodoBlock.from_raw_item(new_todo_block_item)
-        except RuntimeError:
-            # the to_do section is missing when the item is archived?!
-            raise KeyError
-
-        assert new_todo_block.id is not None
-        self._all_todo_blocks[new_todo_block.id] = new_todo_block
-
-        return new_todo_block
+        return self._cache_retrieved(self._request(self._client.blocks.retrieve, item_id))
 
     def delete_single_item(self, item_id: NotionID):
         """Delete a single block."""
-        self._client.blocks.delete(item_id)
-
-    def get_vanilla_notion_todo_section(self, text: str, is_checked: bool) -> dict:
-        return {
-            "text": [{"type": "text", "text": {"content": text}}],
-            "checked": is_checked,
-        }
+        self._request(self._client.blocks.delete, item_id)
 
     def update_item(self, item_id: NotionID, **updated_properties):
-        if not {"plaintext", "is_checked"}.issubset(updated_properties.keys()):
-            logger.warning(f"Invalid changes provided to Notion Side -> {updated_properties}")
-            return
-
-        updated_todo = self.get_vanilla_notion_todo_section(
-            text=updated_properties["plaintext"], is_checked=updated_properties["is_checked"]
-        )
-        self._client.blocks.update(block_id=item_id, to_do=updated_todo)
+        kargs = self._update_kargs(item_id, updated_properties)
+        if kargs is not None:
+            self._request(self._client.blocks.update, **kargs)
 
     def add_item(self, item: NotionTodoBlock) -> NotionTodoBlock:
         """Add a new item (block) to the page."""
-        page_contents: NotionPageContents = self._client.blocks.children.append(
-            block_id=self._page_id, children=[item.serialize()]
+        if self._write_buffer is not None:
+            provisional_id = self._write_buffer.add(item, is_insertion=True)
+            return item.replace(id=provisional_id)
+
+        page_contents: NotionPageContents = self._request(
+            self._client.blocks.children.append, idempotent=False, **self._append_kargs([item])
         )
+        return self._added_todo(page_contents)
+
+    def _append_todos(
+        self, writes: List[Tuple[str, NotionTodoBlock]]
+    ) -> Dict[str, Optional[NotionTodoBlock]]:
+        """Append the given todo blocks to the page in a single call.
+
+        The API returns the newly created blocks in the order they were given, so they are
+        mapped back to the keys of the writes by their position.
+        """
+        try:
+            page_contents: NotionPageContents = self._request(
+                self._client.blocks.children.append,
+                idempotent=False,
+                **self._append_kargs([item for _, item in writes]),
+            )
+        except Exception:
+            logger.opt(exception=True).error(
+                f"Failed to append {len(writes)} todo block(s) to the Notion page"
+            )
+            return {}
+
         todo_blocks = self.find_todos(page_contents=page_contents)
-        if len(todo_blocks) != 1:
+        if len(todo_blocks) != len(writes):
             logger.warning(
-                "Expected to get back 1 TODO item, blocks.children.append(...) returned"
-                f" {len(todo_blocks)} items. Adding only the first"
+                f"Expected to get back {len(writes)} TODO items, blocks.children.append(...)"
+                f" returned {len(todo_blocks)} items. Mapping them in order"
             )
 
-        return todo_blocks[0]
+        for todo_block in todo_blocks:
+            assert todo_block.id is not None
+            self._all_todo_blocks[todo_block.id] = todo_block
+
+        return {key: todo_block for (key, _), todo_block in zip(writes, todo_blocks)}
 
     def add_todo_block(self, title: str, checked: bool = False) -> NotionTodoBlock:
         """Create a new TODO block with the given title."""
@@ -117,11 +312,22 @@ class NotionSide(SyncSide):
                 "checked": checked,
             },
         }
-        raw_item = self._client.blocks.children.append(
-            block_id=self._page_id, children=[new_block]
+        raw_item = self._request(
+            self._client.blocks.children.append,
+            idempotent=False,
+            block_id=self._page_id,
+            children=[new_block],
         )
         return NotionTodoBlock.from_raw_item(raw_item)
 
+    @classmethod
+    def fingerprint(
+        cls, item: NotionTodoBlock, ignore_keys: Sequence[str] = []
+    ) -> Optional[str]:
+        return SyncSide._fingerprint(
+            item, keys=[k for k in NotionTodoBlock._key_names if k not in ignore_keys]
+        )
+
     @classmethod
     def items_are_identical(
         cls, item1: NotionTodoBlock, item2: NotionTodoBlock, ignore_keys: Sequence[str] = []
@@ -130,13 +336,98 @@ class NotionSide(SyncSide):
         ignore_keys_.extend(ignore_keys)
         return item1.compare(item2, ignore_keys=ignore_keys_)
 
-    @staticmethod
-    def find_todos(page_contents: NotionPageContents) -> Sequence[NotionTodoBlock]:
-        assert page_contents["object"] == "list"
-        todos = tuple(
-            NotionTodoBlock.from_raw_item(cast(NotionTodoBlockItem, block))
-            for block in page_contents["results"]
-            if NotionTodoBlock.is_todo(block)
+
+class AsyncNotionSide(_NotionPage, AsyncSyncSide):
+    """NotionSide for the AsyncAggregator, on top of the asyncio client of the Notion API.
+
+    The requests share the same rate limit as those of NotionSide but, instead of blocking a
+    thread, the waiting happens on the event loop, so that the requests to the other side can
+    proceed in the meantime.
+    """
+
+    def __init__(self, client: AsyncClient, page_id: NotionID):
+        self._client = client
+        self._page_id = page_id
+        self._all_todo_blocks = {}
+
+        super().__init__(name="Notion", fullname="Notion")
+
+        self._executor = RequestExecutor(
+            name=self.fullname,
+            error_info=notion_error_info,
+            rate=NotionSide._requests_per_second,
         )
 
-        return todos
+    def id_key(self) -> str:
+        return NotionSide.id_key()
+
+    def summary_key(self) -> str:
+        return NotionSide.summary_key()
+
+    def last_modification_key(self) -> str:
+        return NotionSide.last_modification_key()
+
+    async def start(self):
+        logger.info(f"Initializing {self.fullname}...")
+
+    async def finish(self):
+        logger.info(f"{self}: {self._executor.metrics}")
+
+    async def _request(
+        self, fn: Callable[..., Any], *args, idempotent: bool = True, **kargs
+    ) -> Any:
+        """Await the given client method, respecting the rate limit and retrying on errors."""
+        return await self._executor.execute_async(fn, *args, idempotent=idempotent, **kargs)
+
+    async def get_all_items(self, **kargs) -> Sequence[NotionTodoBlock]:
+        all_todos: Dict[NotionID, NotionTodoBlock] = {}
+        start_cursor = None
+        while True:
+            page_contents: NotionPageContents = await self._request(
+                self._client.blocks.children.list, **self._list_kargs(start_cursor)
+            )
+
+            for todo in self.find_todos(page_contents=page_contents):
+                assert todo.id is not None
+                all_todos[todo.id] = todo
+
+            start_cursor = self._next_cursor(page_contents)
+            if start_cursor is None:
+                break
+
+        self._all_todo_blocks = all_todos
+        return tuple(all_todos.values())
+
+    async def get_item(
+        self, item_id: NotionID, use_cached: bool = False
+    ) -> Optional[NotionTodoBlock]:
+        if use_cached:
+            return self._all_todo_blocks.get(item_id)
+
+        return self._cache_retrieved(
+            await self._request(self._client.blocks.retrieve, item_id)
+        )
+
+    async def delete_single_item(self, item_id: NotionID):
+        await self._request(self._client.blocks.delete, item_id)
+
+    async def update_item(self, item_id: NotionID, **updated_properties):
+        kargs = self._update_kargs(item_id, updated_properties)
+        if kargs is not None:
+            await self._request(self._client.blocks.update, **kargs)
+
+    async def add_item(self, item: NotionTodoBlock) -> NotionTodoBlock:
+        page_contents: NotionPageContents = await self._request(
+            self._client.blocks.children.append, idempotent=False, **self._append_kargs([item])
+        )
+        return self._added_todo(page_contents)
+
+    def fingerprint(
+        self, item: NotionTodoBlock, ignore_keys: Sequence[str] = []
+    ) -> Optional[str]:
+        return NotionSide.fingerprint(item, ignore_keys=ignore_keys)
+
+    def items_are_identical(
+        self, item1: NotionTodoBlock, item2: NotionTodoBlock, ignore_keys: Sequence[str] = []
+    ) -> bool:
+        return NotionSide.items_are_identical(item1, item2, ignore_keys=ignore_keys)
@@ -1,6 +1,5 @@
 import datetime
-from dataclasses import dataclass
-from typing import Any, Mapping, Optional, Sequence
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple
 
 from bubop import is_same_datetime, logger, parse_datetime
 
@@ -12,13 +11,14 @@ from taskwarrior_syncall.types import (
 )
 
 
-@dataclass
 class NotionTodoBlock(Mapping):
-    is_archived: bool
-    is_checked: bool
-    last_modified_date: datetime.datetime
-    plaintext: str
-    id: Optional[NotionID] = None
+    """A to_do block of a Notion page.
+
+    Slotted, and pickled as the tuple of its values, so that its snapshots stay small and
+    don't depend on the layout of the class.
+    """
+
+    __slots__ = ("is_archived", "is_checked", "last_modified_date", "plaintext", "id")
 
     _key_names = {
         "is_archived",
@@ -30,6 +30,53 @@ class NotionTodoBlock(Mapping):
 
     _date_key_names = {"last_modified_date"}
 
+    def __init__(
+        self,
+        is_archived: bool,
+        is_checked: bool,
+        last_modified_date: datetime.datetime,
+        plaintext: str,
+        id: Optional[NotionID] = None,
+    ):
+        self.is_archived = is_archived
+        self.is_checked = is_checked
+        self.last_modified_date = last_modified_date
+        self.plaintext = plaintext
+        self.id = id
+
+    def _values(self) -> Tuple[Any, ...]:
+        return (
+            self.is_archived,
+            self.is_checked,
+            self.last_modified_date,
+            self.plaintext,
+            self.id,
+        )
+
+    def __eq__(self, other: Any) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._values() == other._values()
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(is_archived={self.is_archived!r},"
+            f" is_checked={self.is_checked!r}, last_modified_date={self.last_modified_date!r},"
+            f" plaintext={self.plaintext!r}, id={self.id!r})"
+        )
+
+    def __reduce__(self):
+        return (self.__class__, self._values())
+
+    def __setstate__(self, state: Dict[str, Any]):
+        """Load the snapshots pickled before the block was slotted, i.e., with its __dict__."""
+        for key, value in state.items():
+            setattr(self, key, value)
+
+    def replace(self, **changes) -> "NotionTodoBlock":
+        """Copy of the block with the given values replaced."""
+        return self.__class__(**{**self, **changes})
+
     def compare(self, other: "NotionTodoBlock", ignore_keys: Sequence[str] = []) -> bool:
         """Compare two items, return True if they are considered equal."""
         for key in self._key_names:
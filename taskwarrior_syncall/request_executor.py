@@ -0,0 +1,292 @@
+"""Execution of the requests to web services - rate limiting and retries.
+
+The sides that talk to a web API run their requests through a RequestExecutor, which
+
+- spaces them out according to the rate limit of the service (token bucket),
+- retries the ones that fail with 429 / 5xx, honouring the Retry-After header of the response
+  or otherwise backing off exponentially with jitter - requests that aren't idempotent, e.g.,
+  ones that create items, are only retried on 429, since after a 5xx or a dropped connection
+  the request may have been applied anyway,
+- keeps count of the retries and the time spent waiting.
+
+This module is service-agnostic - each side provides a function that extracts the HTTP status
+and the Retry-After value from the exceptions of its client library.
+"""
+import asyncio
+import datetime
+import email.utils
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, Tuple, TypeVar
+
+from bubop import logger
+
+T = TypeVar("T")
+
+# Given an exception raised by a request, return the HTTP status and the Retry-After delay (in
+# seconds) of the response, or None if the exception isn't about a failed HTTP request
+ErrorInfoFn = Callable[[Exception], Optional[Tuple[int, Optional[float]]]]
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse the value of a Retry-After header - either seconds or an HTTP date.
+
+    >>> parse_retry_after("3")
+    3.0
+    >>> parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT")
+    0.0
+    >>> parse_retry_after("kalimera") is None
+    True
+    >>> parse_retry_after(None) is None
+    True
+    """
+    if value is None:
+        return None
+
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    try:
+        dt = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    now = datetime.datetime.now(tz=dt.tzinfo or datetime.timezone.utc)
+    return max((dt - now).total_seconds(), 0.0)
+
+
+@dataclass
+class RequestMetrics:
+    """Counters of the requests of a single executor."""
+
+    requests: int = 0
+    retries: int = 0
+    # time spent waiting for the rate limiter
+    throttled_secs: float = 0.0
+    # time spent waiting before retrying failed requests
+    backoff_secs: float = 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.requests} request(s), {self.retries} retries, waited"
+            f" {self.throttled_secs:.1f}s for the rate limit and {self.backoff_secs:.1f}s"
+            " before retrying"
+        )
+
+
+class TokenBucket:
+    """Thread-safe token bucket - allow bursts of up to `capacity` requests and `rate` requests
+    per second on average.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self._rate = rate
+        self._capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+
+        self._tokens = capacity
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self._capacity, self._tokens + (now - self._last) * self._rate)
+        self._last = now
+
+    def reserve(self) -> float:
+        """Take a token without waiting for it.
+
+        :return: The time to wait before using the token, in seconds
+        """
+        with self._lock:
+            self._refill()
+            # reserve the token even if it's not there yet - tokens may go negative, in which
+            # case later callers wait for their own turn
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self._rate
+
+    def acquire(self) -> float:
+        """Take a token, waiting until one is available.
+
+        :return: The time waited, in seconds
+        """
+        wait = self.reserve()
+        if wait > 0:
+            self._sleep(wait)
+
+        return wait
+
+    def pause(self, secs: float):
+        """Don't hand out any tokens for the given time, e.g., when the service asks us to slow
+        down.
+        """
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, -secs * self._rate)
+
+
+class RequestExecutor:
+    """Execute the requests to a single web service - see the module docstring."""
+
+    _retryable_statuses = {429, 500, 502, 503, 504}
+    # the service rejected the request without applying it
+    _rejected_statuses = {429}
+
+    def __init__(
+        self,
+        name: str,
+        error_info: ErrorInfoFn,
+        rate: float,
+        capacity: Optional[float] = None,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 64.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        :param name: Name of the service, for logging purposes
+        :param error_info: Extract the HTTP status and Retry-After of failed requests
+        :param rate: Max number of requests per second, on average
+        :param capacity: Max number of requests in a single burst - defaults to `rate`
+        :param max_retries: Max number of times to retry a failed request
+        :param base_delay: Delay before the first retry, doubled on every next one
+        :param max_delay: Upper limit of the delay between retries
+        """
+        self._name = name
+        self._error_info = error_info
+        self._max_retries = max_retries
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._sleep = sleep
+
+        self._bucket = TokenBucket(
+            rate=rate,
+            capacity=capacity if capacity is not None else rate,
+            clock=clock,
+            sleep=sleep,
+        )
+        self._metrics = RequestMetrics()
+        self._metrics_lock = threading.Lock()
+
+    @property
+    def metrics(self) -> RequestMetrics:
+        return self._metrics
+
+    def execute(self, fn: Callable[..., T], *args, idempotent: bool = True, **kargs) -> T:
+        """Call the given function, which makes a single request, and return its result.
+
+        Retry it as long as it fails with a retryable error.
+
+        :param idempotent: Whether the request can be repeated without side effects - if not,
+                           it's only retried if the service rejected it, see `retry_delay`
+        """
+        attempt = 0
+        while True:
+            self._count_request(throttled=self._bucket.acquire())
+            try:
+                return fn(*args, **kargs)
+            except Exception as err:
+                delay = self._on_failure(err, attempt=attempt, idempotent=idempotent)
+                if delay is None:
+                    raise
+
+                self._sleep(delay)
+                attempt += 1
+
+    async def execute_async(
+        self, fn: Callable[..., Awaitable[T]], *args, idempotent: bool = True, **kargs
+    ) -> T:
+        """Coroutine counterpart of `execute` - await the given coroutine function."""
+        attempt = 0
+        while True:
+            throttled = self._bucket.reserve()
+            if throttled > 0:
+                await asyncio.sleep(throttled)
+            self._count_request(throttled=throttled)
+
+            try:
+                return await fn(*args, **kargs)
+            except Exception as err:
+                delay = self._on_failure(err, attempt=attempt, idempotent=idempotent)
+                if delay is None:
+                    raise
+
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    def _count_request(self, throttled: float):
+        with self._metrics_lock:
+            self._metrics.requests += 1
+            self._metrics.throttled_secs += throttled
+
+    def _on_failure(self, err: Exception, attempt: int, idempotent: bool) -> Optional[float]:
+        """Handle a failed request - return how long to wait before retrying it, None if it
+        shouldn't be retried.
+        """
+        delay = self.retry_delay(err, attempt=attempt, idempotent=idempotent)
+        if delay is None:
+            return None
+
+        logger.warning(
+            f"{self._name}: Request failed, retrying in {delay:.1f}s"
+            f" [{attempt + 1}/{self._max_retries}] -> {err}"
+        )
+        self._hold_back(delay, err=err)
+        return delay
+
+    def retry_delay(
+        self, err: Exception, attempt: int, idempotent: bool = True
+    ) -> Optional[float]:
+        """How long to wait before retrying a request that failed with the given error.
+
+        :param attempt: Number of retries of the request so far
+        :param idempotent: Whether the request can be repeated without side effects - if not,
+                           it's only retried if the service rejected it, e.g., on 429, and not
+                           after a 5xx or a connection error, as it may have been applied
+                           anyway
+        :return: The delay in seconds, None if the request shouldn't be retried
+        """
+        info = self._error_info(err)
+        if info is None:
+            return None
+
+        status, retry_after = info
+        retryable = self._retryable_statuses if idempotent else self._rejected_statuses
+        if status not in retryable or attempt >= self._max_retries:
+            return None
+
+        if retry_after is not None:
+            return retry_after
+
+        # exponential backoff with jitter - don't have all the clients retry in lockstep
+        backoff = min(self._max_delay, self._base_delay * 2**attempt)
+        return backoff / 2 + random.uniform(0, backoff / 2)
+
+    def wait(self, delay: float, err: Exception, retries: int = 1):
+        """Wait before retrying the given number of requests that failed with the given error.
+
+        If the service is rate limiting us, hold back the other requests as well.
+        """
+        self._hold_back(delay, err=err, retries=retries)
+        self._sleep(delay)
+
+    def _hold_back(self, delay: float, err: Exception, retries: int = 1):
+        info = self._error_info(err)
+        if info is not None and info[0] == 429:
+            self._bucket.pause(delay)
+
+        with self._metrics_lock:
+            self._metrics.retries += retries
+            self._metrics.backoff_secs += delay
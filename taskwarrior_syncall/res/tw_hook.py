@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""Taskwarrior on-add/on-modify hook, installed by the watch mode of taskwarrior-syncall.
+
+Appends the UUID of each added or modified task to the queue file of every synchronization
+that watches Taskwarrior, then passes the task on unchanged.
+"""
+import json
+import sys
+from pathlib import Path
+
+# filled in when the hook is installed
+QUEUE_DIR = Path("@QUEUE_DIR@")
+
+
+def main():
+    task = ""
+    try:
+        # on-add gets the new task, on-modify gets the original and then the modified one
+        task = sys.stdin.readlines()[-1]
+        uuid = json.loads(task)["uuid"]
+        for queue_file in QUEUE_DIR.glob("*.queue"):
+            with queue_file.open("a") as f:
+                f.write(f"{uuid}\n")
+    except Exception:  # never get in the way of Taskwarrior
+        pass
+
+    sys.stdout.write(task)
+
+
+if __name__ == "__main__":
+    main()
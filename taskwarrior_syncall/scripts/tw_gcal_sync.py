@@ -27,16 +27,23 @@ from taskwarrior_syncall import (
     get_resolution_strategy,
     inform_about_combination_name_usage,
     list_named_combinations,
+    opt_batch_writes,
     opt_combination,
     opt_custom_combination_savename,
     opt_gcal_calendar,
     opt_google_oauth_port,
     opt_google_secret_override,
+    opt_incremental,
     opt_list_combinations,
     opt_resolution_strategy,
     opt_tw_project,
+    opt_tw_read_mode,
     opt_tw_tags,
+    opt_watch,
+    opt_watch_interval,
+    opt_write_workers,
     report_toplevel_exception,
+    watch_taskwarrior,
 )
 
 
@@ -48,9 +55,15 @@ from taskwarrior_syncall import (
 # taskwarrior options -------------------------------------------------------------------------
 @opt_tw_tags()
 @opt_tw_project()
+@opt_tw_read_mode()
 # misc options --------------------------------------------------------------------------------
 @opt_list_combinations("TW", "Google Calendar")
 @opt_resolution_strategy()
+@opt_incremental()
+@opt_batch_writes()
+@opt_write_workers("Google Calendar")
+@opt_watch()
+@opt_watch_interval()
 @opt_combination("TW", "Google Calendar")
 @opt_custom_combination_savename("TW", "Google Calendar")
 @click.option("-v", "--verbose", count=True)
@@ -61,7 +74,13 @@ def main(
     oauth_port: int,
     tw_tags: List[str],
     tw_project: str,
+    tw_read_mode: str,
     resolution_strategy: str,
+    incremental: bool,
+    batch_writes: bool,
+    write_workers: int,
+    watch: bool,
+    watch_interval: float,
     verbose: int,
     combination_name: str,
     custom_combination_savename: str,
@@ -139,10 +158,15 @@ def main(
     )
 
     # initialize sides ------------------------------------------------------------------------
-    tw_side = TaskWarriorSide(tags=tw_tags, project=tw_project)
+    tw_side = TaskWarriorSide(
+        tags=tw_tags, project=tw_project, read_mode=tw_read_mode, batch_writes=batch_writes
+    )
 
     gcal_side = GCalSide(
-        calendar_summary=gcal_calendar, oauth_port=oauth_port, client_secret=google_secret
+        calendar_summary=gcal_calendar,
+        oauth_port=oauth_port,
+        client_secret=google_secret,
+        batch_writes=batch_writes,
     )
 
     # sync ------------------------------------------------------------------------------------
@@ -156,12 +180,16 @@ def main(
                 resolution_strategy, side_A_type=type(gcal_side), side_B_type=type(tw_side)
             ),
             config_fname=combination_name,
+            incremental=incremental,
+            write_workers=(write_workers, 0),
             ignore_keys=(
                 (),
                 ("due", "end", "entry", "modified", "urgency"),
             ),
         ) as aggregator:
             aggregator.sync()
+            if watch:
+                watch_taskwarrior(aggregator, tw_side, interval=watch_interval)
     except KeyboardInterrupt:
         logger.error("Exiting...")
         return 1
@@ -13,7 +13,7 @@ from bubop import (
 from taskwarrior_syncall import inform_about_app_extras
 
 try:
-    from taskwarrior_syncall import GKeepTodoSide
+    from taskwarrior_syncall import GKeepSession, GKeepTodoSide
 except ImportError:
     inform_about_app_extras(["gkeepapi"])
 
@@ -33,12 +33,18 @@ from taskwarrior_syncall import (
     opt_custom_combination_savename,
     opt_gkeep_note,
     opt_gkeep_passwd_pass_path,
+    opt_gkeep_state_cache,
     opt_gkeep_user_pass_path,
+    opt_incremental,
     opt_list_combinations,
     opt_resolution_strategy,
     opt_tw_project,
+    opt_tw_read_mode,
     opt_tw_tags,
+    opt_watch,
+    opt_watch_interval,
     report_toplevel_exception,
+    watch_taskwarrior,
 )
 
 
@@ -47,12 +53,17 @@ from taskwarrior_syncall import (
 @opt_gkeep_note()
 @opt_gkeep_user_pass_path()
 @opt_gkeep_passwd_pass_path()
+@opt_gkeep_state_cache()
 # taskwarrior options -------------------------------------------------------------------------
 @opt_tw_tags()
 @opt_tw_project()
+@opt_tw_read_mode()
 # misc options --------------------------------------------------------------------------------
 @opt_list_combinations("TW", "Google Keep")
 @opt_resolution_strategy()
+@opt_incremental()
+@opt_watch()
+@opt_watch_interval()
 @opt_combination("TW", "Google Keep")
 @opt_custom_combination_savename("TW", "Google Keep")
 @click.option("-v", "--verbose", count=True)
@@ -61,9 +72,14 @@ def main(
     gkeep_note: str,
     gkeep_user_pass_path: str,
     gkeep_passwd_pass_path: str,
+    gkeep_state_cache: bool,
     tw_tags: Sequence[str],
     tw_project: str,
+    tw_read_mode: str,
     resolution_strategy: str,
+    incremental: bool,
+    watch: bool,
+    watch_interval: float,
     verbose: int,
     combination_name: str,
     custom_combination_savename: str,
@@ -168,10 +184,11 @@ def main(
         gkeep_user=gkeep_user,
         gkeep_passwd=gkeep_passwd,
         notes_label="tw_gkeep_sync",
+        state_cache=GKeepSession.DEFAULT_STATE_CACHE if gkeep_state_cache else None,
     )
 
     # initialize taskwarrior ------------------------------------------------------------------
-    tw_side = TaskWarriorSide(tags=tw_tags, project=tw_project)
+    tw_side = TaskWarriorSide(tags=tw_tags, project=tw_project, read_mode=tw_read_mode)
 
     # sync ------------------------------------------------------------------------------------
     try:
@@ -184,12 +201,15 @@ def main(
                 resolution_strategy, side_A_type=type(gkeep_side), side_B_type=type(tw_side)
             ),
             config_fname=combination_name,
+            incremental=incremental,
             ignore_keys=(
                 (),
                 ("due", "end", "entry", "modified", "urgency"),
             ),
         ) as aggregator:
             aggregator.sync()
+            if watch:
+                watch_taskwarrior(aggregator, tw_side, interval=watch_interval)
     except KeyboardInterrupt:
         logger.error("Exiting...")
         return 1
@@ -35,15 +35,22 @@ from taskwarrior_syncall import (
     get_resolution_strategy,
     inform_about_combination_name_usage,
     list_named_combinations,
+    opt_batch_writes,
     opt_combination,
     opt_custom_combination_savename,
+    opt_incremental,
     opt_list_combinations,
     opt_notion_page_id,
     opt_notion_token_pass_path,
     opt_resolution_strategy,
     opt_tw_project,
+    opt_tw_read_mode,
     opt_tw_tags,
+    opt_watch,
+    opt_watch_interval,
+    opt_write_workers,
     report_toplevel_exception,
+    watch_taskwarrior,
 )
 
 
@@ -55,8 +62,14 @@ from taskwarrior_syncall import (
 # taskwarrior options -------------------------------------------------------------------------
 @opt_tw_tags()
 @opt_tw_project()
+@opt_tw_read_mode()
 # misc options --------------------------------------------------------------------------------
 @opt_resolution_strategy()
+@opt_incremental()
+@opt_batch_writes()
+@opt_write_workers("Notion")
+@opt_watch()
+@opt_watch_interval()
 @opt_combination("TW", "Notion")
 @opt_list_combinations("TW", "Notion")
 @opt_custom_combination_savename("TW", "Notion")
@@ -66,8 +79,14 @@ def main(
     notion_page_id: str,
     tw_tags: List[str],
     tw_project: str,
+    tw_read_mode: str,
     token_pass_path: str,
     resolution_strategy: str,
+    incremental: bool,
+    batch_writes: bool,
+    write_workers: int,
+    watch: bool,
+    watch_interval: float,
     verbose: int,
     combination_name: str,
     custom_combination_savename: str,
@@ -154,7 +173,9 @@ def main(
     assert token_v2
 
     # initialize taskwarrior ------------------------------------------------------------------
-    tw_side = TaskWarriorSide(tags=tw_tags, project=tw_project)
+    tw_side = TaskWarriorSide(
+        tags=tw_tags, project=tw_project, read_mode=tw_read_mode, batch_writes=batch_writes
+    )
 
     # initialize notion -----------------------------------------------------------------------
     # client is a bit too verbose by default.
@@ -162,7 +183,7 @@ def main(
     client = Client(
         auth=token_v2, log_level=verbosity_int_to_std_logging_lvl(client_verbosity)
     )
-    notion_side = NotionSide(client=client, page_id=notion_page_id)
+    notion_side = NotionSide(client=client, page_id=notion_page_id, batch_writes=batch_writes)
 
     # sync ------------------------------------------------------------------------------------
     try:
@@ -175,12 +196,16 @@ def main(
                 resolution_strategy, side_A_type=type(notion_side), side_B_type=type(tw_side)
             ),
             config_fname=combination_name,
+            incremental=incremental,
+            write_workers=(write_workers, 0),
             ignore_keys=(
                 ("last_modified_date",),
                 ("due", "end", "entry", "modified", "urgency"),
             ),
         ) as aggregator:
             aggregator.sync()
+            if watch:
+                watch_taskwarrior(aggregator, tw_side, interval=watch_interval)
     except KeyboardInterrupt:
         logger.error("Exiting...")
         return 1
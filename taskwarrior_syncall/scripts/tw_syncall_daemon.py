@@ -0,0 +1,334 @@
+"""Run all the saved synchronization combinations periodically, from a single process."""
+import os
+import sys
+import threading
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, Mapping, Optional, Sequence, Tuple, TypeVar
+
+import click
+from bubop import (
+    format_list,
+    log_to_syslog,
+    logger,
+    loguru_tqdm_sink,
+    verbosity_int_to_std_logging_lvl,
+)
+from item_synchronizer.types import ConverterFn
+
+from taskwarrior_syncall import (
+    Aggregator,
+    SyncSide,
+    TaskWarriorSide,
+    __version__,
+    fetch_app_configuration,
+    fetch_from_pass_manager,
+    get_resolution_strategy,
+    opt_batch_writes,
+    opt_gkeep_passwd_pass_path,
+    opt_gkeep_state_cache,
+    opt_gkeep_user_pass_path,
+    opt_google_oauth_port,
+    opt_google_secret_override,
+    opt_incremental,
+    opt_notion_token_pass_path,
+    opt_resolution_strategy,
+    opt_tw_read_mode,
+)
+from taskwarrior_syncall.app_utils import get_named_combinations
+from taskwarrior_syncall.request_executor import RequestExecutor
+from taskwarrior_syncall.sync_daemon import SyncDaemon
+from taskwarrior_syncall.taskwarrior_side import SharedTaskWarrior
+
+T = TypeVar("T")
+
+# Side of the service for the given saved combination, along with the converters from and to
+# Taskwarrior
+SideSetup = Tuple[Callable[[], SyncSide], ConverterFn, ConverterFn]
+
+
+def _once(fn: Callable[[], T]) -> Callable[[], T]:
+    """Call the given function on first use only and share its result - thread-safe."""
+    lock = threading.Lock()
+    result = []
+
+    def wrapper() -> T:
+        with lock:
+            if not result:
+                result.append(fn())
+            return result[0]
+
+    return wrapper
+
+
+def _read_secret(env_var: str, pass_path: str) -> str:
+    secret = os.environ.get(env_var)
+    if secret is not None:
+        logger.debug(f"Reading {env_var} from environment variable...")
+    else:
+        secret = fetch_from_pass_manager(pass_path)
+    assert secret
+
+    return secret
+
+
+@click.command()
+@click.option(
+    "--interval",
+    type=click.FloatRange(min=0, min_open=True),
+    default=300,
+    show_default=True,
+    help="Seconds from the start of a round of synchronizations to the start of the next one",
+)
+@click.option(
+    "--max-concurrency",
+    type=click.IntRange(min=1),
+    default=4,
+    show_default=True,
+    help="Max number of synchronizations to run at the same time",
+)
+@click.option("--once", is_flag=True, help="Run each synchronization once and exit")
+# taskwarrior options -------------------------------------------------------------------------
+@opt_tw_read_mode()
+# google options ------------------------------------------------------------------------------
+@opt_google_secret_override()
+@opt_google_oauth_port()
+@opt_gkeep_user_pass_path()
+@opt_gkeep_passwd_pass_path()
+@opt_gkeep_state_cache()
+# notion options ------------------------------------------------------------------------------
+@opt_notion_token_pass_path()
+# misc options --------------------------------------------------------------------------------
+@opt_resolution_strategy()
+@opt_incremental()
+@opt_batch_writes()
+@click.option("-v", "--verbose", count=True)
+@click.version_option(__version__)
+def main(
+    interval: float,
+    max_concurrency: int,
+    once: bool,
+    tw_read_mode: str,
+    google_secret: str,
+    oauth_port: int,
+    gkeep_user_pass_path: str,
+    gkeep_passwd_pass_path: str,
+    gkeep_state_cache: bool,
+    token_pass_path: str,
+    resolution_strategy: str,
+    incremental: bool,
+    batch_writes: bool,
+    verbose: int,
+):
+    """Synchronize all the combinations saved by tw_gcal_sync, tw_notion_sync and
+    tw_gkeep_sync periodically.
+
+    Unlike running each combination on its own, Taskwarrior is read once per round and each
+    service is authenticated once, for all of its combinations.
+    """
+    # setup logger ----------------------------------------------------------------------------
+    loguru_tqdm_sink(verbosity=verbose)
+    log_to_syslog(name="tw_syncall_daemon")
+    logger.debug("Initialising...")
+
+    shared_tw = SharedTaskWarrior(read_mode=tw_read_mode)  # type: ignore
+
+    # google calendar -------------------------------------------------------------------------
+    # credentials are shared by all the google calendar sides of the process on their own
+    @_once
+    def gcal_executor() -> RequestExecutor:
+        from taskwarrior_syncall.google.gcal_side import GCalSide
+        from taskwarrior_syncall.google.google_side import google_error_info
+
+        return RequestExecutor(
+            name="Google Calendar",
+            error_info=google_error_info,
+            rate=GCalSide._requests_per_second,
+        )
+
+    def gcal_setup(app_config: Mapping[str, Any]) -> SideSetup:
+        from taskwarrior_syncall.google.gcal_side import GCalSide
+        from taskwarrior_syncall.tw_gcal_utils import convert_gcal_to_tw, convert_tw_to_gcal
+
+        def side() -> SyncSide:
+            return GCalSide(
+                calendar_summary=app_config["gcal_calendar"],
+                oauth_port=oauth_port,
+                client_secret=google_secret,
+                batch_writes=batch_writes,
+                executor=gcal_executor(),
+            )
+
+        return side, convert_tw_to_gcal, convert_gcal_to_tw
+
+    # notion ----------------------------------------------------------------------------------
+    @_once
+    def notion_client() -> Tuple[Any, RequestExecutor]:
+        from notion_client import Client  # type: ignore
+
+        from taskwarrior_syncall.notion_side import NotionSide, notion_error_info
+
+        # client is a bit too verbose by default.
+        client = Client(
+            auth=_read_secret("NOTION_API_KEY", token_pass_path),
+            log_level=verbosity_int_to_std_logging_lvl(max(verbose - 1, 0)),
+        )
+        executor = RequestExecutor(
+            name="Notion", error_info=notion_error_info, rate=NotionSide._requests_per_second
+        )
+        return client, executor
+
+    def notion_setup(app_config: Mapping[str, Any]) -> SideSetup:
+        from taskwarrior_syncall.notion_side import NotionSide
+        from taskwarrior_syncall.tw_notion_utils import (
+            convert_notion_to_tw,
+            convert_tw_to_notion,
+        )
+
+        def side() -> SyncSide:
+            client, executor = notion_client()
+            return NotionSide(
+                client=client,
+                page_id=app_config["notion_page_id"],
+                batch_writes=batch_writes,
+                executor=executor,
+            )
+
+        return side, convert_tw_to_notion, convert_notion_to_tw
+
+    # google keep -----------------------------------------------------------------------------
+    @_once
+    def gkeep_session() -> Any:
+        from taskwarrior_syncall.google.gkeep_session import GKeepSession
+
+        return GKeepSession.login(
+            _read_secret("GKEEP_USERNAME", gkeep_user_pass_path),
+            _read_secret("GKEEP_PASSWD", gkeep_passwd_pass_path),
+            state_cache=GKeepSession.DEFAULT_STATE_CACHE if gkeep_state_cache else None,
+        )
+
+    def gkeep_setup(app_config: Mapping[str, Any]) -> SideSetup:
+        from taskwarrior_syncall.google.gkeep_todo_side import GKeepTodoSide
+        from taskwarrior_syncall.tw_gkeep_utils import (
+            convert_gkeep_todo_to_tw,
+            convert_tw_to_gkeep_todo,
+        )
+
+        def side() -> SyncSide:
+            return GKeepTodoSide(
+                note_title=app_config["gkeep_note"],
+                notes_label="tw_gkeep_sync",
+                session=gkeep_session(),
+            )
+
+        return side, convert_tw_to_gkeep_todo, convert_gkeep_todo_to_tw
+
+    # assemble the jobs -----------------------------------------------------------------------
+    jobs: Dict[str, Callable[[], None]] = {}
+
+    def add_jobs(
+        config_fname: str,
+        extra: str,
+        setup: Callable[[Mapping[str, Any]], SideSetup],
+        ignore_keys: Sequence[str] = (),
+        lock: Optional[threading.Lock] = None,
+    ):
+        for combination_name in get_named_combinations(config_fname=config_fname):
+            if combination_name in jobs:
+                logger.warning(f"Skipping duplicate combination name -> {combination_name}")
+                continue
+
+            app_config = fetch_app_configuration(
+                config_fname=config_fname, combination=combination_name
+            )
+            try:
+                side_A, converter_B_to_A, converter_A_to_B = setup(app_config)
+            except ImportError:
+                logger.error(
+                    f"Skipping combination {combination_name} - install the {extra} extra to"
+                    " synchronize it"
+                )
+                continue
+
+            def job(
+                combination_name=combination_name,
+                app_config=app_config,
+                side_A=side_A,
+                converter_B_to_A=converter_B_to_A,
+                converter_A_to_B=converter_A_to_B,
+            ):
+                with lock or nullcontext():
+                    sync(
+                        combination_name=combination_name,
+                        side_A=side_A(),
+                        side_B=TaskWarriorSide(
+                            tags=app_config["tw_tags"],
+                            project=app_config["tw_project"],
+                            batch_writes=batch_writes,
+                            shared=shared_tw,
+                        ),
+                        converter_B_to_A=converter_B_to_A,
+                        converter_A_to_B=converter_A_to_B,
+                        ignore_keys=ignore_keys,
+                    )
+
+            jobs[combination_name] = job
+
+    def sync(
+        combination_name: str,
+        side_A: SyncSide,
+        side_B: TaskWarriorSide,
+        converter_B_to_A: ConverterFn,
+        converter_A_to_B: ConverterFn,
+        ignore_keys: Sequence[str],
+    ):
+        with Aggregator(
+            side_A=side_A,
+            side_B=side_B,
+            converter_B_to_A=converter_B_to_A,
+            converter_A_to_B=converter_A_to_B,
+            resolution_strategy=get_resolution_strategy(
+                resolution_strategy, side_A_type=type(side_A), side_B_type=type(side_B)
+            ),
+            config_fname=combination_name,
+            incremental=incremental,
+            ignore_keys=(
+                ignore_keys,
+                ("due", "end", "entry", "modified", "urgency"),
+            ),
+        ) as aggregator:
+            aggregator.sync()
+
+    add_jobs("tw_gcal_configs", "google", gcal_setup)
+    add_jobs("tw_notion_configs", "notion", notion_setup, ignore_keys=("last_modified_date",))
+    # the client isn't thread-safe - synchronize one note at a time
+    add_jobs("tw_gkeep_configs", "gkeep", gkeep_setup, lock=threading.Lock())
+
+    if not jobs:
+        logger.error(
+            "No saved combinations found - save them first with tw_gcal_sync, tw_notion_sync"
+            " or tw_gkeep_sync"
+        )
+        return 1
+
+    # run -------------------------------------------------------------------------------------
+    logger.info(format_list(header="\n\nSynchronizing the combinations", items=list(jobs)))
+    daemon = SyncDaemon(
+        jobs=jobs,
+        interval=interval,
+        max_concurrency=max_concurrency,
+        before_round=shared_tw.reload,
+    )
+    try:
+        if once:
+            return 0 if all(daemon.run_round().values()) else 1
+
+        daemon.run()
+    except KeyboardInterrupt:
+        logger.error("Exiting...")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,7 @@
 from dataclasses import dataclass
-from typing import Optional, Sequence
+from typing import Optional, Sequence, Union
 
+from taskwarrior_syncall.async_sync_side import AsyncSyncSide
 from taskwarrior_syncall.sync_side import SyncSide
 
 
@@ -20,7 +21,7 @@ class SideHelper:
         return str(self.name)
 
     @classmethod
-    def from_side(cls, side: SyncSide) -> "SideHelper":
+    def from_side(cls, side: Union[SyncSide, AsyncSyncSide]) -> "SideHelper":
         return cls(
             name=side.name,
             id_key=side.id_key(),
@@ -0,0 +1,237 @@
+"""Persistent storage for the cached versions ("snapshots") of the items of a side.
+
+The Aggregator keeps a snapshot of every synchronized item so that on the next run it can tell
+whether the item has been modified in the meantime. Snapshot stores are shared across all the
+combinations that use the same side (e.g., all TW <-> * synchronizations share the same TW
+store).
+"""
+import abc
+import pickle
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from bubop import logger, pickle_dump, pickle_load
+from item_synchronizer.types import ID, Item
+
+
+class SnapshotStore(abc.ABC):
+    """Interface for the storage of the snapshots of the items of a single side.
+
+    Writes (`put`, `delete`) are only guaranteed to be persisted after a call to `commit`.
+    """
+
+    def __init__(self, serdes_dir: Path, name: str):
+        """
+        :param serdes_dir: Top-level directory under which all the snapshot stores are kept
+        :param name: Name of the side that this store is for - e.g., "tw", "gcal"
+        """
+        self._serdes_dir = serdes_dir
+        self._name = name
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__}({self._name})"
+
+    @abc.abstractmethod
+    def get_many(self, ids: Iterable[ID]) -> Dict[ID, Item]:
+        """Fetch the snapshots of the given IDs.
+
+        IDs that don't have a snapshot stored are omitted from the returned dictionary.
+        """
+        raise NotImplementedError("Implement in derived")
+
+    def get(self, id_: ID) -> Optional[Item]:
+        """Fetch the snapshot of a single item - None if it's not stored."""
+        return self.get_many((id_,)).get(id_)
+
+    @abc.abstractmethod
+    def put(self, id_: ID, item: Item) -> None:
+        """Store the snapshot of the given item, overwriting the previous one if any."""
+        raise NotImplementedError("Implement in derived")
+
+    @abc.abstractmethod
+    def delete(self, ids: Iterable[ID]) -> None:
+        """Remove the snapshots of the given IDs."""
+        raise NotImplementedError("Implement in derived")
+
+    def commit(self) -> None:
+        """Persist all the pending writes."""
+        pass
+
+    def close(self) -> None:
+        """Release any resources held by the store. Pending writes are discarded."""
+        pass
+
+
+class PickleDirSnapshotStore(SnapshotStore):
+    """Legacy store - keep one pickle file per item under <serdes_dir>/<name>/.
+
+    Writes are applied immediately, `commit` is a no-op.
+    """
+
+    def __init__(self, serdes_dir: Path, name: str):
+        super().__init__(serdes_dir=serdes_dir, name=name)
+        self._dir = self.dir_for(serdes_dir=serdes_dir, name=name)
+        self._dir.mkdir(exist_ok=True, parents=True)
+
+    @staticmethod
+    def dir_for(serdes_dir: Path, name: str) -> Path:
+        """Directory holding the pickle files of the given side."""
+        return serdes_dir / name
+
+    def get_many(self, ids: Iterable[ID]) -> Dict[ID, Item]:
+        out = {}
+        for id_ in ids:
+            p = self._dir / str(id_)
+            if p.is_file():
+                out[id_] = pickle_load(p)
+
+        return out
+
+    def put(self, id_: ID, item: Item) -> None:
+        pickle_dump(item, self._dir / str(id_))
+
+    def delete(self, ids: Iterable[ID]) -> None:
+        for id_ in ids:
+            p = self._dir / str(id_)
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                logger.warning(f"File doesn't exist, this may indicate an error -> {p}")
+                logger.opt(exception=True).debug(
+                    f"File doesn't exist, this may indicate an error -> {p}"
+                )
+
+
+class SQLiteSnapshotStore(SnapshotStore):
+    """Keep all the snapshots of a side in a single SQLite database - <serdes_dir>/<name>.db.
+
+    Reads are batched and writes are buffered in memory and applied in a single transaction
+    on `commit`, so that the database is never locked for longer than it takes to write.
+
+    On first use, the snapshots of the legacy pickle-directory layout
+    (:py:class:`PickleDirSnapshotStore`) are imported and the pickle files are removed.
+    """
+
+    # max number of host parameters in a single SQLite statement - stay well below the
+    # compile-time limit of older SQLite versions (999)
+    _chunk_size = 500
+
+    def __init__(self, serdes_dir: Path, name: str):
+        super().__init__(serdes_dir=serdes_dir, name=name)
+        serdes_dir.mkdir(exist_ok=True, parents=True)
+        self._path = serdes_dir / f"{name}.db"
+
+        self._conn = sqlite3.connect(str(self._path), timeout=60)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS snapshots (id TEXT PRIMARY KEY, item BLOB NOT"
+                " NULL)"
+            )
+
+        self._to_put: Dict[ID, Item] = {}
+        self._to_delete: Set[ID] = set()
+
+        self._migrate_from_pickle_dir()
+
+    @property
+    def path(self) -> Path:
+        """Path to the underlying database file."""
+        return self._path
+
+    def get_many(self, ids: Iterable[ID]) -> Dict[ID, Item]:
+        ids = [str(id_) for id_ in ids]
+        out: Dict[ID, Item] = {}
+
+        # pending writes take precedence over what's in the database
+        to_query: List[ID] = []
+        for id_ in ids:
+            if id_ in self._to_put:
+                out[id_] = self._to_put[id_]
+            elif id_ not in self._to_delete:
+                to_query.append(id_)
+
+        for i in range(0, len(to_query), self._chunk_size):
+            chunk = to_query[i : i + self._chunk_size]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT id, item FROM snapshots WHERE id IN ({placeholders})", chunk
+            )
+            for id_, blob in rows:
+                out[id_] = pickle.loads(blob)
+
+        return out
+
+    def put(self, id_: ID, item: Item) -> None:
+        id_ = str(id_)
+        self._to_delete.discard(id_)
+        self._to_put[id_] = item
+
+    def delete(self, ids: Iterable[ID]) -> None:
+        for id_ in ids:
+            id_ = str(id_)
+            self._to_put.pop(id_, None)
+            self._to_delete.add(id_)
+
+    def commit(self) -> None:
+        if not self._to_put and not self._to_delete:
+            return
+
+        logger.debug(
+            f"{self}: Committing {len(self._to_put)} snapshot(s), deleting"
+            f" {len(self._to_delete)} snapshot(s)..."
+        )
+        with self._conn:
+            self._conn.executemany(
+                "DELETE FROM snapshots WHERE id = ?", ((id_,) for id_ in self._to_delete)
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO snapshots (id, item) VALUES (?, ?)",
+                ((id_, pickle.dumps(item)) for id_, item in self._to_put.items()),
+            )
+
+        self._to_put.clear()
+        self._to_delete.clear()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _migrate_from_pickle_dir(self):
+        """One-shot import of the snapshots from the legacy pickle-directory layout."""
+        legacy_dir = PickleDirSnapshotStore.dir_for(
+            serdes_dir=self._serdes_dir, name=self._name
+        )
+        if not legacy_dir.is_dir():
+            return
+
+        pickle_files = [p for p in legacy_dir.iterdir() if p.is_file()]
+        logger.info(
+            f"{self}: Migrating {len(pickle_files)} snapshot(s) from {legacy_dir} to"
+            f" {self._path}..."
+        )
+        migrated: List[Path] = []
+        for p in pickle_files:
+            try:
+                self.put(p.name, pickle_load(p))
+            except Exception:
+                logger.opt(exception=True).warning(
+                    f"Skipping unreadable snapshot, leaving it in place -> {p}"
+                )
+            else:
+                migrated.append(p)
+        self.commit()
+
+        # only remove the legacy files once they are safely in the database - the unreadable
+        # ones are kept, so that they are retried the next time the store is opened
+        for p in migrated:
+            p.unlink()
+        if len(migrated) != len(pickle_files):
+            logger.warning(
+                f"{self}: Kept {len(pickle_files) - len(migrated)} unreadable snapshot(s) in"
+                f" {legacy_dir}"
+            )
+            return
+        try:
+            legacy_dir.rmdir()
+        except OSError:
+            logger.warning(f"Couldn't remove legacy snapshots directory -> {legacy_dir}")
@@ -0,0 +1,86 @@
+"""Run many synchronizations from a single, long-running process.
+
+Each synchronization is a job, i.e., a function that synchronizes one saved combination. The
+jobs run in rounds, one round every `interval` seconds, with at most `max_concurrency` of them
+running at the same time. A failing job doesn't affect the rest - it's reported and runs again
+on the next round.
+
+Sharing the clients of the services across the jobs is up to the jobs themselves, e.g., see
+:py:class:`taskwarrior_syncall.taskwarrior_side.SharedTaskWarrior`.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Mapping, Optional
+
+from bubop import logger
+
+
+class SyncDaemon:
+    """Run the given jobs periodically - see the module docstring.
+
+    :param jobs: The functions to run on each round, by name
+    :param interval: Seconds from the start of a round to the start of the next one
+    :param max_concurrency: Max number of jobs to run at the same time
+    :param before_round: Function to run before each round, e.g., to refresh shared state
+    """
+
+    def __init__(
+        self,
+        jobs: Mapping[str, Callable[[], Any]],
+        interval: float,
+        max_concurrency: int = 4,
+        before_round: Optional[Callable[[], Any]] = None,
+    ):
+        if max_concurrency < 1:
+            raise ValueError(f"At least one job has to run at a time, got {max_concurrency}")
+
+        self._jobs = dict(jobs)
+        self._interval = interval
+        self._max_concurrency = max_concurrency
+        self._before_round = before_round
+        self._stopped = threading.Event()
+
+    def run_round(self) -> Dict[str, bool]:
+        """Run all the jobs once.
+
+        :return: Whether each job succeeded, by name
+        """
+        if self._before_round is not None:
+            self._before_round()
+
+        logger.info(f"Running {len(self._jobs)} synchronization(s)...")
+        with ThreadPoolExecutor(
+            max_workers=self._max_concurrency, thread_name_prefix="sync"
+        ) as executor:
+            futures = {name: executor.submit(job) for name, job in self._jobs.items()}
+
+        succeeded: Dict[str, bool] = {}
+        for name, future in futures.items():
+            exc = future.exception()
+            if exc is not None:
+                logger.opt(exception=exc).error(f"Synchronization {name} failed")
+            succeeded[name] = exc is None
+
+        logger.info(f"{sum(succeeded.values())}/{len(succeeded)} synchronization(s) succeeded")
+        return succeeded
+
+    def run(self, rounds: Optional[int] = None):
+        """Run the jobs every `interval` seconds until stopped.
+
+        :param rounds: Stop after that many rounds - run forever by default
+        """
+        round_ = 0
+        while not self._stopped.is_set():
+            started = time.monotonic()
+            self.run_round()
+
+            round_ += 1
+            if rounds is not None and round_ >= rounds:
+                break
+
+            self._stopped.wait(max(0.0, self._interval - (time.monotonic() - started)))
+
+    def stop(self):
+        """Stop after the current round - the jobs already running are waited for."""
+        self._stopped.set()
@@ -0,0 +1,83 @@
+"""Write-ahead journal of the changes of a synchronization to the Aggregator's state.
+
+The ID correspondences and the snapshots of the items are only persisted at the end of a
+synchronization. If the process is killed before that, the writes already made to the sides
+would be lost from the Aggregator's point of view - e.g., items inserted to a side would be
+inserted again on the next run.
+
+To avoid that, the Aggregator appends a record to the journal as soon as it learns about a
+completed write - the journal is flushed to disk after every append. Once the state is persisted
+at the end of the synchronization, the journal is removed. If a journal is found on startup, the
+previous run was interrupted and its records are replayed on top of the persisted state.
+
+Records are tuples, pickled one after the other:
+
+- ``("map", side_name, item_id, other_id)``: ID correspondence between the two sides
+- ``("unmap", side_name, item_id)``: drop the correspondence of the given item
+- ``("put", side_name, item_id, item)``: snapshot of the given item
+- ``("del", side_name, item_id)``: drop the snapshot of the given item
+"""
+import os
+import pickle
+from pathlib import Path
+from typing import IO, Any, List, Optional, Tuple
+
+from bubop import logger
+
+JournalRecord = Tuple[Any, ...]
+
+
+class SyncJournal:
+    """Append-only journal file, see the module docstring."""
+
+    def __init__(self, path: Path):
+        self._path = path
+        self._file: Optional[IO[bytes]] = None
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def append(self, *records: JournalRecord):
+        """Append the given records and flush them to disk."""
+        if self._file is None:
+            self._file = self._path.open("ab")
+
+        for record in records:
+            pickle.dump(record, self._file)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def replay(self) -> List[JournalRecord]:
+        """Read all the records of the journal, if any.
+
+        A record that is only partially written, i.e., the process was killed while writing it,
+        and anything after it are ignored.
+        """
+        if not self._path.is_file():
+            return []
+
+        records: List[JournalRecord] = []
+        with self._path.open("rb") as f:
+            while True:
+                try:
+                    records.append(pickle.load(f))
+                except EOFError:
+                    break
+                except Exception:
+                    logger.warning(
+                        f"Ignoring the truncated end of the journal -> {self._path}"
+                    )
+                    break
+
+        return records
+
+    def clear(self):
+        """Remove the journal - the changes it records have been persisted."""
+        self.close()
+        self._path.unlink(missing_ok=True)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -1,6 +1,8 @@
 import abc
 import datetime
-from typing import Any, Mapping, Optional, Sequence, final
+import hashlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Mapping, Optional, Sequence, Set, final
 
 from bubop.time import is_same_datetime
 from item_synchronizer.types import ID
@@ -9,6 +11,18 @@ from loguru import logger
 ItemType = Mapping[str, Any]
 
 
+@dataclass
+class ItemsDelta:
+    """Items of a side that have changed since the last synchronization."""
+
+    # new and modified items - may also contain items that haven't actually changed
+    items: Sequence[ItemType]
+    # IDs of all the items currently in the side, if the side can list them cheaply
+    all_ids: Optional[Set[ID]] = None
+    # IDs of the items that have been deleted, if the side knows them
+    deleted_ids: Set[ID] = field(default_factory=set)
+
+
 class SyncSide(abc.ABC):
     """Interface class for interacting with the various synchronization sides.
 
@@ -52,6 +66,37 @@ class SyncSide(abc.ABC):
         """
         pass
 
+    def flush(self) -> Dict[ID, Optional[ItemType]]:
+        """Apply the writes that the side has buffered, if any.
+
+        Sides that buffer their writes return the items from `add_item` with a provisional ID
+        (see :py:mod:`taskwarrior_syncall.write_buffer`). Call this to find out the actual items
+        that were created.
+
+        :return: The created items by their provisional ID - None for the items whose creation
+                 failed
+        """
+        return {}
+
+    def pop_rejected_updates(self) -> Set[ID]:
+        """Return the IDs of the items whose updates the side rejected since the last call.
+
+        An update is rejected, instead of overwriting the item, if the item changed in the side
+        since it was fetched. Buffered updates that failed are reported the same way - the
+        Aggregator then forgets the cached versions of the item and its counterpart, so that
+        the next synchronization resolves the conflict.
+        """
+        return set()
+
+    def pop_failed_deletions(self) -> Set[ID]:
+        """Return the IDs of the items whose buffered deletions failed since the last call.
+
+        The Aggregator forgets an item as soon as `delete_single_item` returns - for these
+        items, it restores their cached versions and correspondences instead, so that the
+        deletion is retried on the next synchronization.
+        """
+        return set()
+
     @abc.abstractmethod
     def get_all_items(self, **kargs) -> Sequence[ItemType]:
         """Query side and return a sequence of items
@@ -61,6 +106,18 @@ class SyncSide(abc.ABC):
         """
         raise NotImplementedError("Implement in derived")
 
+    def get_items_delta(self, sync_state: Dict[str, Any]) -> Optional[ItemsDelta]:
+        """Query side and return only the items that changed since the last synchronization.
+
+        :param sync_state: State of this side, persisted across runs. It holds the POSIX
+                           timestamp of the last successful synchronization under "last_sync",
+                           if any. Derived classes may store their own keys in it - the state is
+                           only persisted if the synchronization succeeds.
+        :return: The delta or None if it can't be computed, in which case the caller should
+                 fall back to `get_all_items`
+        """
+        return None
+
     @abc.abstractmethod
     def get_item(self, item_id: ID, use_cached: bool = False) -> Optional[ItemType]:
         """Get a single item based on the given UUID.
@@ -71,6 +128,12 @@ class SyncSide(abc.ABC):
         """
         raise NotImplementedError("Should be implemented in derived")
 
+    def matches_filters(self, item: ItemType) -> bool:
+        """Whether the given item, e.g., as returned by `get_item`, is one of the items this side
+        synchronizes, i.e., one that `get_all_items` would return.
+        """
+        return True
+
     @abc.abstractmethod
     def delete_single_item(self, item_id: ID):
         """Delete an item based on the given UUID.
@@ -141,6 +204,30 @@ class SyncSide(abc.ABC):
         """
         raise NotImplementedError("Implement in derived")
 
+    @classmethod
+    def fingerprint(cls, item: ItemType, ignore_keys: Sequence[str] = []) -> Optional[str]:
+        """Compute a fingerprint over the keys that `items_are_identical` compares.
+
+        Items with the same fingerprint are identical. Items with different fingerprints may
+        still be identical (e.g., datetimes within the comparison tolerance) and have to be
+        compared with `items_are_identical`.
+
+        .. returns:: The fingerprint or None if the side doesn't support fingerprints.
+        """
+        return None
+
+    @final
+    @staticmethod
+    def _fingerprint(item: ItemType, keys: Iterable[str]) -> str:
+        """Hash the canonical representation of the provided keys of the given item."""
+        h = hashlib.blake2b(digest_size=16)
+        for k in sorted(keys):
+            if k not in item:
+                continue
+            h.update(f"{k}={item[k]!r}\0".encode("utf-8"))
+
+        return h.hexdigest()
+
     @final
     @staticmethod
     def _items_are_identical(item1: ItemType, item2: ItemType, keys: list) -> bool:
@@ -1,14 +1,23 @@
 import datetime
+import json
+import tempfile
+import threading
 from pathlib import Path
-from typing import Dict, List, Literal, Optional, Sequence, Set, Union, cast
-from uuid import UUID
+from typing import Any, Dict, List, Literal, Optional, Sequence, Set, Tuple, Union, cast
+from uuid import UUID, uuid4
 
 from bubop import logger, parse_datetime
+from item_synchronizer.types import ID
 from taskw import TaskWarrior
+from taskw.exceptions import TaskwarriorError
+from taskw.task import Task
 from taskw.warrior import TASKRC
 
-from taskwarrior_syncall.sync_side import ItemType, SyncSide
+from taskwarrior_syncall.sync_side import ItemsDelta, ItemType, SyncSide
+from taskwarrior_syncall.tw_data_reader import TaskWarriorDataReader
+from taskwarrior_syncall.tw_task_index import TaskIndex
 from taskwarrior_syncall.types import TaskwarriorRawItem
+from taskwarrior_syncall.write_buffer import WriteBuffer, is_provisional_id
 
 OrderByType = Literal[
     "description",
@@ -20,6 +29,12 @@ OrderByType = Literal[
     "urgency",
 ]
 
+# How to read the tasks:
+# - cli: via `task export`
+# - direct: straight off the data files, see :py:mod:`taskwarrior_syncall.tw_data_reader`
+# - cross-check: both ways, reporting any differences - the tasks of the CLI are used
+ReadModeType = Literal["cli", "direct", "cross-check"]
+
 
 def parse_datetime_(dt: Union[str, datetime.datetime]) -> datetime.datetime:
     if isinstance(dt, datetime.datetime):
@@ -28,54 +43,401 @@ def parse_datetime_(dt: Union[str, datetime.datetime]) -> datetime.datetime:
         return parse_datetime(dt)
 
 
+class SharedTaskWarrior:
+    """Taskwarrior client along with all its tasks, shared by several TaskWarriorSide
+    instances, e.g., each one synchronizing the tasks of different tags.
+
+    Taskwarrior is set up once and the tasks are read and indexed on first use - see
+    :py:mod:`taskwarrior_syncall.tw_task_index`. Each side then looks up the tasks of its
+    filters. Call `reload` to read them again, e.g., before each round of synchronizations.
+    """
+
+    def __init__(
+        self, config_file: Optional[Path] = Path(TASKRC), read_mode: ReadModeType = "cli"
+    ):
+        self.tw = TaskWarrior(marshal=True, config_filename=config_file)
+        self.read_mode = read_mode
+
+        self.data_location = Path(
+            self.tw.config.get("data", {}).get("location", "~/.task")
+        ).expanduser()
+        # `hooks` is also the setting that turns them on and off
+        hooks = self.tw.config.get("hooks")
+        hooks_location = hooks.get("location") if isinstance(hooks, dict) else None
+        self.hooks_location = (
+            Path(hooks_location).expanduser()
+            if hooks_location
+            else self.data_location / "hooks"
+        )
+
+        self.data_reader: Optional[TaskWarriorDataReader] = None
+        if read_mode != "cli":
+            self.data_reader = TaskWarriorDataReader(
+                data_location=self.data_location, udas=self.tw.config.get_udas()
+            )
+
+        self._index: Optional[TaskIndex] = None
+        self._lock = threading.Lock()
+
+    def index(self) -> TaskIndex:
+        """Index of all the tasks with one of the statuses that are synchronized."""
+        with self._lock:
+            if self._index is None:
+                self._index = TaskIndex(self._load())
+                logger.info(f"Loaded {len(self._index)} Taskwarrior task(s)")
+
+            return self._index
+
+    def reload(self):
+        with self._lock:
+            self._index = None
+
+    def _load(self) -> List[TaskwarriorRawItem]:
+        statuses = TaskWarriorSide._statuses
+        direct_tasks: Optional[List[TaskwarriorRawItem]] = None
+        if self.data_reader is not None:
+            direct_tasks = [
+                t for t in self.data_reader.iter_tasks() if t.get("status") in statuses
+            ]
+            if self.read_mode == "direct":
+                return direct_tasks
+
+        tasks = self.tw._get_task_objects(TaskWarriorSide._status_filter(), "export")
+        if direct_tasks is not None:
+            TaskWarriorSide._cross_check(cli_tasks=tasks, direct_tasks=direct_tasks)
+
+        return tasks
+
+
 class TaskWarriorSide(SyncSide):
-    """Handles interaction with the TaskWarrior client."""
+    """Handles interaction with the TaskWarrior client.
+
+    Every write via the CLI costs at least one `task` process. With `batch_writes`, the new,
+    updated and deleted tasks are instead queued and applied with a single `task import` of up
+    to `_import_size` tasks. New tasks get their UUID on our side, and are reported with a
+    provisional ID until they're imported - see :py:mod:`taskwarrior_syncall.write_buffer`.
+
+    Reads can likewise skip the CLI by parsing the data files of Taskwarrior directly - see
+    `ReadModeType`. The tasks read this way lack the keys that only the CLI computes, i.e.,
+    `id` and `urgency`.
+
+    Several sides can share the client and a single read of the tasks - see
+    `SharedTaskWarrior`.
+    """
 
     ID_KEY = "uuid"
     SUMMARY_KEY = "description"
     LAST_MODIFICATION_KEY = "modified"
+    _identical_comparison_keys = ["annotations", "description", "due", "status", "uuid"]
+
+    # statuses of the tasks to synchronize - same as the ones of TaskWarrior.load_tasks()
+    _statuses = ["pending", "waiting", "completed"]
+
+    # fetch tasks modified a bit before the last synchronization, to be on the safe side
+    # regarding the (1-second) resolution of the modification date
+    _delta_margin = datetime.timedelta(minutes=1)
+
+    # max number of tasks in a single `task import` call
+    _import_size = 500
+    # keys that taskwarrior computes on its own and doesn't accept on import
+    _computed_keys = ["id", "urgency"]
 
     def __init__(
         self,
         tags: Sequence[str] = [],
         project: Optional[str] = None,
         config_file: Optional[Path] = Path(TASKRC),
+        batch_writes: bool = False,
+        read_mode: ReadModeType = "cli",
+        shared: Optional[SharedTaskWarrior] = None,
         **kargs,
     ):
         """
         :param tags: List of tags that all fetched and submitted tasks should have
         :param project: project identifier that all fetched and submitted tasks should have
         :param config_file: Path to the taskwarrior RC file
+        :param batch_writes: Apply the writes with `task import`, in batches
+        :param read_mode: How to read the tasks - see `ReadModeType`
+        :param shared: Use the client and the tasks of the given instance instead - the
+                       `config_file` and `read_mode` are then those of the latter
         """
         super().__init__(name="Tw", fullname="Taskwarrior", **kargs)
         self._tags: Set[str] = set(tags)
         self._project: str = project or ""
-        self._tw = TaskWarrior(marshal=True, config_filename=config_file)
+        self._shared = shared
 
         # All TW tasks
         self._items_cache: Dict[str, TaskwarriorRawItem] = {}
 
-        # Whether to refresh the cached list of items
-        self._reload_items = True
+        if shared is None:
+            shared = SharedTaskWarrior(config_file=config_file, read_mode=read_mode)
+        self._tw = shared.tw
+        self._read_mode = shared.read_mode
+        self._data_reader = shared.data_reader
+        self._data_location = shared.data_location
+        self._hooks_location = shared.hooks_location
+
+        self._write_buffer: Optional[WriteBuffer[TaskwarriorRawItem]] = None
+        # UUIDs of the tasks written since the last call to pop_written_uuids
+        self._written_uuids: Set[str] = set()
+        # UUIDs of the tasks whose buffered updates or deletions failed to import
+        self._failed_updates: Set[ID] = set()
+        self._failed_deletions: Set[ID] = set()
+        if batch_writes:
+            self._write_buffer = WriteBuffer(
+                flush_fn=self._import_tasks, max_size=self._import_size, name=self.fullname
+            )
+
+    @property
+    def data_location(self) -> Path:
+        """Directory of the data files of Taskwarrior."""
+        return self._data_location
+
+    @property
+    def hooks_location(self) -> Path:
+        """Directory of the hooks of Taskwarrior."""
+        return self._hooks_location
 
     def start(self):
         logger.info(f"Initializing {self.fullname}...")
 
+    def finish(self):
+        if self._write_buffer is not None:
+            self._write_buffer.flush()
+
+    def flush(self) -> Dict[ID, Optional[ItemType]]:
+        if self._write_buffer is None:
+            return {}
+
+        self._write_buffer.flush()
+        return self._write_buffer.pop_resolved()
+
+    def pop_written_uuids(self) -> Set[str]:
+        """Return the UUIDs of the tasks added, updated or deleted since the last call, e.g.,
+        to tell the changes of the synchronization apart from the ones of the user.
+        """
+        written, self._written_uuids = self._written_uuids, set()
+        return written
+
+    def pop_rejected_updates(self) -> Set[ID]:
+        failed, self._failed_updates = self._failed_updates, set()
+        return failed
+
+    def pop_failed_deletions(self) -> Set[ID]:
+        failed, self._failed_deletions = self._failed_deletions, set()
+        return failed
+
+    def _import_tasks(
+        self, writes: List[Tuple[str, TaskwarriorRawItem]]
+    ) -> Dict[str, Optional[ItemType]]:
+        """Apply the given writes with a single `task import`.
+
+        Each write is the complete version of a task - importing a task with the UUID of an
+        existing one replaces the latter.
+
+        :return: The imported tasks, by the key of their write
+        """
+        udas = self._tw.config.get_udas()
+        serialized = [self._serialize_for_import(task, udas=udas) for _, task in writes]
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".json") as f:
+            json.dump(serialized, f, default=str)
+            f.flush()
+            try:
+                self._tw._execute("import", f.name)
+            except TaskwarriorError:
+                logger.opt(exception=True).error(
+                    f"Failed to import {len(writes)} task(s) to {self.fullname}"
+                )
+                for key, task in writes:
+                    if is_provisional_id(key):
+                        continue
+                    if task["status"] == "deleted":
+                        self._failed_deletions.add(task["uuid"])
+                    else:
+                        # the cached version was never imported
+                        self._items_cache.pop(task["uuid"], None)
+                        self._failed_updates.add(task["uuid"])
+                return {}
+
+        for _, task in writes:
+            if task["status"] != "deleted":
+                self._items_cache[task["uuid"]] = task
+
+        return {key: cast(ItemType, task) for key, task in writes}
+
+    @staticmethod
+    def _serialize_for_import(
+        task: TaskwarriorRawItem, udas: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Serialize the given task to the JSON format of `task import`."""
+        serialized = Task.from_stub(task, udas=udas).serialized()
+
+        # annotations are imported as objects along with their entry date. Taskwarrior keys
+        # them by that date, thus new ones get distinct dates
+        modified = parse_datetime_(task["modified"])
+        serialized["annotations"] = [
+            {
+                "entry": (
+                    getattr(annotation, "entry", None)
+                    or modified + datetime.timedelta(seconds=i)
+                )
+                .astimezone(datetime.timezone.utc)
+                .strftime("%Y%m%dT%H%M%SZ"),
+                "description": str(annotation),
+            }
+            for i, annotation in enumerate(task.get("annotations", []))
+        ]
+        if not serialized["annotations"]:
+            del serialized["annotations"]
+
+        return serialized
+
+    def _task_to_write(self, item_id: str) -> TaskwarriorRawItem:
+        """Return a copy of the latest version of the given task, to write it back."""
+        task = self._items_cache.get(item_id)
+        if task is None:
+            task = self._tw.get_task(uuid=UUID(item_id))[-1]
+            if not task:
+                raise KeyError(item_id)
+
+        task = {k: v for k, v in task.items() if k not in self._computed_keys}  # type: ignore
+        task["uuid"] = item_id
+        task["modified"] = datetime.datetime.now(tz=datetime.timezone.utc)
+        return cast(TaskwarriorRawItem, task)
+
     def _load_all_items(self):
         """Load all tasks to memory.
 
-        May return already loaded list of items, depending on the validity of
-        the cache.
+        Always reads them afresh, e.g., for synchronizing repeatedly with the same instance.
         """
-        if not self._reload_items:
-            return
+        if self._shared is not None:
+            items = self._read_shared()
+        elif self._read_mode == "direct":
+            items = self._read_directly()
+        else:
+            items = self._export()
+            if self._read_mode == "cross-check":
+                self._cross_check(cli_tasks=items, direct_tasks=self._read_directly())
 
-        tasks = self._tw.load_tasks()
-        items = [*tasks["completed"], *tasks["pending"]]
         self._items_cache: Dict[str, TaskwarriorRawItem] = {  # type: ignore
             str(item["uuid"]): item for item in items
         }
-        self._reload_items = False
+
+    def _filter_args(self) -> List[str]:
+        """Taskwarrior CLI filter matching the tags, project and statuses of interest."""
+        args = [f"+{tag}" for tag in sorted(self._tags)]
+        if self._project:
+            args.append(f"project.is:{self._project}")
+        args.append(self._status_filter())
+
+        return args
+
+    @classmethod
+    def _status_filter(cls) -> str:
+        statuses = " or ".join(f"status:{status}" for status in cls._statuses)
+        return f"( {statuses} )"
+
+    def _export(self, *extra_filter_args: str) -> List[TaskwarriorRawItem]:
+        """Export the tasks matching our filters (and the given extra ones) via the CLI."""
+        # taskw's filter_tasks can't express the +tag syntax, hence use the raw arguments
+        return self._tw._get_task_objects(*self._filter_args(), *extra_filter_args, "export")
+
+    def _read_directly(self) -> List[TaskwarriorRawItem]:
+        """Read the tasks matching our filters straight off the data files."""
+        assert self._data_reader is not None
+        return [
+            task
+            for task in self._data_reader.iter_tasks()
+            if task.get("status") in self._statuses and self._matches_filters(task)
+        ]
+
+    @classmethod
+    def _cross_check(
+        cls, cli_tasks: List[TaskwarriorRawItem], direct_tasks: List[TaskwarriorRawItem]
+    ) -> bool:
+        """Compare the tasks read via the CLI with the ones read directly.
+
+        :return: True if they're the same, False otherwise - the differences are logged
+        """
+        cli = {str(task["uuid"]): task for task in cli_tasks}
+        direct = {str(task["uuid"]): task for task in direct_tasks}
+        differences: List[str] = []
+        for uuid in cli.keys() - direct.keys():
+            differences.append(f"{uuid}: Only read via the CLI")
+        for uuid in direct.keys() - cli.keys():
+            differences.append(f"{uuid}: Only read directly")
+        for uuid in cli.keys() & direct.keys():
+            cli_task, direct_task = cli[uuid], direct[uuid]
+            if not cls.items_are_identical(cli_task, direct_task) or any(
+                cli_task.get(k) != direct_task.get(k) for k in ("project", "tags")
+            ):
+                differences.append(f"{uuid}: {cli_task} != {direct_task}")
+
+        if differences:
+            logger.warning(
+                "Reading the tasks directly differs from reading them via the CLI in"
+                f" {len(differences)} task(s):\n\n"
+                + "\n".join(sorted(differences))
+            )
+            return False
+
+        logger.info(f"Read the same {len(cli)} task(s) directly and via the CLI")
+        return True
+
+    def _read_shared(self) -> List[TaskwarriorRawItem]:
+        """Copies of the shared tasks that match our filters."""
+        assert self._shared is not None
+        return [
+            cast(TaskwarriorRawItem, dict(task))
+            for task in self._shared.index().query(tags=self._tags, project=self._project)
+        ]
+
+    def matches_filters(self, item: TaskwarriorRawItem) -> bool:
+        return item.get("status") in self._statuses and self._matches_filters(item)
+
+    def _matches_filters(self, task: TaskwarriorRawItem) -> bool:
+        """Whether the given task has the tags and belongs to the project of interest."""
+        if self._tags and not self._tags.issubset(task.get("tags", [])):
+            return False
+        if self._project and task.get("project", "") != self._project:
+            return False
+
+        return True
+
+    def get_items_delta(self, sync_state: Dict[str, Any]) -> Optional[ItemsDelta]:
+        """Fetch the tasks modified since the last synchronization along with the UUIDs of all
+        the tasks of interest.
+        """
+        last_sync = sync_state.get("last_sync")
+        if last_sync is None:
+            return None
+
+        since = (
+            datetime.datetime.fromtimestamp(last_sync, tz=datetime.timezone.utc)
+            - self._delta_margin
+        )
+        logger.debug(f"Fetching tasks modified after {since}...")
+        # cross-checking only applies to reading all the tasks
+        all_tasks: Optional[List[TaskwarriorRawItem]] = None
+        if self._shared is not None:
+            all_tasks = self._read_shared()
+        elif self._read_mode == "direct":
+            all_tasks = self._read_directly()
+
+        if all_tasks is not None:
+            tasks = [t for t in all_tasks if parse_datetime_(t["modified"]) > since]
+            all_ids = {str(t["uuid"]) for t in all_tasks}
+        else:
+            tasks = self._export(f"modified.after:{since:%Y%m%dT%H%M%SZ}")
+            tasks = [t for t in tasks if self._matches_filters(t)]
+            stdout, _ = self._tw._execute(*self._filter_args(), "_uuids")
+            all_ids = set(stdout.split())
+
+        for task in tasks:
+            task["uuid"] = str(task["uuid"])
+            self._items_cache[task["uuid"]] = task
+
+        return ItemsDelta(items=tasks, all_ids=all_ids)
 
     def get_all_items(
         self,
@@ -100,10 +462,9 @@ class TaskWarriorSide(SyncSide):
             tasks = [t for t in tasks if t["status"] != "completed"]
 
         # filter the tasks based on their tags and their project ------------------------------
-        if self._tags:
-            tasks = [t for t in tasks if self._tags.issubset(t.get("tags", []))]
-        if self._project:
-            tasks = [t for t in tasks if t.get("project", "") == self._project]
+        # The CLI has already done so - this is to guard against differences in the semantics
+        # of the CLI filters, e.g., when the project name contains whitespace.
+        tasks = [t for t in tasks if self._matches_filters(t)]
 
         for task in tasks:
             task["uuid"] = str(task["uuid"])
@@ -116,8 +477,9 @@ class TaskWarriorSide(SyncSide):
     def get_item(self, item_id: str, use_cached: bool = True) -> Optional[TaskwarriorRawItem]:
         item = self._items_cache.get(item_id)
         if not use_cached or item is None:
+            # an empty task if there's no task with the given UUID
             item = self._tw.get_task(id=item_id)[-1]
-            if item is None:
+            if not item:
                 return None
 
             # amend cache
@@ -131,6 +493,14 @@ class TaskWarriorSide(SyncSide):
         :raises ValaueError: In case the item is not present in the db
         """
         changes.pop("id", False)
+        self._written_uuids.add(item_id)
+        if self._write_buffer is not None:
+            task = self._task_to_write(item_id)
+            task.update(changes)  # type: ignore
+            self._write_buffer.add(task)
+            self._items_cache[item_id] = task
+            return
+
         t = self._tw.get_task(uuid=UUID(item_id))[-1]
 
         # task CLI doesn't allow `imask`
@@ -168,15 +538,35 @@ class TaskWarriorSide(SyncSide):
         if self._project:
             item["project"] = self._project
 
+        if self._write_buffer is not None:
+            now = datetime.datetime.now(tz=datetime.timezone.utc)
+            task = cast(
+                TaskwarriorRawItem,
+                {"entry": now, "modified": now, **item, "uuid": str(uuid4())},
+            )
+            self._written_uuids.add(task["uuid"])
+            provisional_id = self._write_buffer.add(task, is_insertion=True)
+            return {**item, self.ID_KEY: provisional_id}
+
         description = item.pop("description")
         new_item = self._tw.task_add(description=description, **item)  # type: ignore
         new_id = new_item["id"]
+        self._written_uuids.add(str(new_item["uuid"]))
         len_print = min(20, len(description))
         logger.debug(f'Task "{new_id}" created - "{description[0:len_print]}"...')
 
         return cast(ItemType, new_item)
 
     def delete_single_item(self, item_id) -> None:
+        self._written_uuids.add(item_id)
+        if self._write_buffer is not None:
+            task = self._task_to_write(item_id)
+            task["status"] = "deleted"
+            task["end"] = task["modified"]  # type: ignore
+            self._write_buffer.add(task)
+            self._items_cache.pop(item_id, None)
+            return
+
         self._tw.task_delete(uuid=item_id)
 
     @classmethod
@@ -191,15 +581,29 @@ class TaskWarriorSide(SyncSide):
     def last_modification_key(cls) -> str:
         return cls.LAST_MODIFICATION_KEY
 
+    @classmethod
+    def fingerprint(cls, item: ItemType, ignore_keys: Sequence[str] = []) -> Optional[str]:
+        canonical = {
+            k: item[k]
+            for k in cls._identical_comparison_keys
+            if k in item and k not in ignore_keys
+        }
+        # annotations are always compared - a missing key is equivalent to an empty list
+        canonical["annotations"] = list(item.get("annotations", []))
+        if "uuid" in canonical:
+            canonical["uuid"] = str(canonical["uuid"])
+
+        return SyncSide._fingerprint(canonical, keys=canonical.keys())
+
     @classmethod
     def items_are_identical(
         cls, item1: dict, item2: dict, ignore_keys: Sequence[str] = []
     ) -> bool:
-        keys = [
-            k
-            for k in ["annotations", "description", "due", "status", "uuid"]
-            if k not in ignore_keys
-        ]
+        keys = [k for k in cls._identical_comparison_keys if k not in ignore_keys]
+
+        # don't modify the items of the caller
+        item1 = dict(item1)
+        item2 = dict(item2)
 
         # special care for the annotations key
         if "annotations" in item1 and "annotations" in item2:
@@ -0,0 +1,122 @@
+"""Read the tasks straight off the data files of Taskwarrior, without running `task`.
+
+Two storage formats are supported:
+
+- Taskwarrior 2.x: one task per line in `pending.data` and `completed.data`, in the FF4
+  format, e.g., ``[description:"kalimera" entry:"1639038960" status:"pending" uuid:"..."]``
+- Taskwarrior 3.x: the SQLite replica of TaskChampion, `taskchampion.sqlite3`, holding a JSON
+  map of the properties of each task.
+
+In both, the properties are stored as strings - dates as POSIX timestamps, annotations as
+`annotation_<timestamp>` properties. They're converted to the format of `task export` and then
+marshalled by taskw, the same way as the tasks that TaskWarrior(marshal=True) returns.
+
+The files are parsed lazily, one task at a time.
+"""
+import datetime
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from taskw.fields import DateField
+from taskw.task import Task
+from taskw.utils import decode_task
+
+from taskwarrior_syncall.types import TaskwarriorRawItem
+
+TASKCHAMPION_DB = "taskchampion.sqlite3"
+FF4_FILES = ("pending.data", "completed.data")
+
+
+def _format_timestamp(timestamp: str) -> str:
+    """Convert a POSIX timestamp to the date format of `task export`.
+
+    >>> _format_timestamp("1639038960")
+    '20211209T083600Z'
+    """
+    dt = datetime.datetime.fromtimestamp(int(timestamp), tz=datetime.timezone.utc)
+    return dt.strftime("%Y%m%dT%H%M%SZ")
+
+
+class TaskWarriorDataReader:
+    """Read the tasks of the Taskwarrior database at the given data location."""
+
+    def __init__(self, data_location: Path, udas: Optional[Dict[str, Any]] = None):
+        self._data_location = Path(data_location).expanduser()
+        self._udas = udas or {}
+        self._date_keys = {
+            k
+            for k, field in {**Task.FIELDS, **self._udas}.items()
+            if isinstance(field, DateField)
+        }
+
+    @property
+    def is_taskchampion(self) -> bool:
+        """Whether the database is that of Taskwarrior 3.x."""
+        return (self._data_location / TASKCHAMPION_DB).is_file()
+
+    def iter_tasks(self) -> Iterator[TaskwarriorRawItem]:
+        """Iterate over all the tasks of the database, deleted ones included."""
+        raw_tasks = (
+            self._iter_taskchampion_tasks() if self.is_taskchampion else self._iter_ff4_tasks()
+        )
+        for raw_task in raw_tasks:
+            yield Task(self._to_export_format(raw_task), udas=self._udas)  # type: ignore
+
+    def _iter_ff4_tasks(self) -> Iterator[Dict[str, Any]]:
+        for fname in FF4_FILES:
+            path = self._data_location / fname
+            if not path.is_file():
+                continue
+
+            with path.open(encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        yield decode_task(line)
+
+    def _iter_taskchampion_tasks(self) -> Iterator[Dict[str, Any]]:
+        # read-only, so that we never get in the way of a running `task`
+        uri = f"{(self._data_location / TASKCHAMPION_DB).as_uri()}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True)
+        try:
+            for uuid, data in conn.execute("SELECT uuid, data FROM tasks"):
+                properties: Dict[str, Any] = json.loads(data)
+                properties["uuid"] = uuid
+
+                # tags and dependencies are stored as one property each
+                tags = [k[len("tag_") :] for k in properties if k.startswith("tag_")]
+                depends = [k[len("dep_") :] for k in properties if k.startswith("dep_")]
+                properties = {
+                    k: v
+                    for k, v in properties.items()
+                    if not k.startswith("tag_") and not k.startswith("dep_")
+                }
+                if tags:
+                    properties["tags"] = tags
+                if depends:
+                    properties["depends"] = ",".join(depends)
+
+                yield properties
+        finally:
+            conn.close()
+
+    def _to_export_format(self, raw_task: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert the properties of a task, as stored, to the format of `task export`."""
+        task: Dict[str, Any] = {}
+        annotations: List[Dict[str, str]] = []
+        for k, v in raw_task.items():
+            if k.startswith("annotation_"):
+                annotations.append(
+                    {"entry": _format_timestamp(k[len("annotation_") :]), "description": v}
+                )
+            elif k in self._date_keys and isinstance(v, str) and v.isdigit():
+                task[k] = _format_timestamp(v)
+            else:
+                task[k] = v
+
+        if annotations:
+            task["annotations"] = sorted(annotations, key=lambda a: a["entry"])
+
+        return task
@@ -0,0 +1,79 @@
+"""In-memory index of Taskwarrior tasks, for looking them up by their tags, project and status.
+
+Built once per load of the tasks, it lets several TaskWarriorSide instances find the tasks of
+their filters with a few set intersections, instead of scanning all the tasks each.
+"""
+from typing import Dict, Iterable, List, Optional, Set
+
+from taskwarrior_syncall.types import TaskwarriorRawItem
+
+
+class TaskIndex:
+    """Index of the given tasks by UUID, tag, project and status.
+
+    >>> index = TaskIndex([
+    ...     {"uuid": "1", "status": "pending", "tags": ["remindme"], "project": "travel"},
+    ...     {"uuid": "2", "status": "completed", "tags": ["remindme", "routine"]},
+    ...     {"uuid": "3", "status": "pending", "project": "travel"},
+    ... ])
+    >>> len(index)
+    3
+    >>> [t["uuid"] for t in index.query(tags=["remindme"])]
+    ['1', '2']
+    >>> [t["uuid"] for t in index.query(tags=["remindme"], project="travel")]
+    ['1']
+    >>> [t["uuid"] for t in index.query(project="travel", statuses=["pending"])]
+    ['1', '3']
+    >>> [t["uuid"] for t in index.query(tags=["remindme", "unknown"])]
+    []
+    >>> index.get("3")["project"]
+    'travel'
+    """
+
+    def __init__(self, tasks: Iterable[TaskwarriorRawItem]):
+        self._tasks: Dict[str, TaskwarriorRawItem] = {}
+        # position of each task, to return them in the order they were given
+        self._positions: Dict[str, int] = {}
+        self._by_tag: Dict[str, Set[str]] = {}
+        self._by_project: Dict[str, Set[str]] = {}
+        self._by_status: Dict[str, Set[str]] = {}
+
+        for task in tasks:
+            uuid = str(task["uuid"])
+            self._positions.setdefault(uuid, len(self._positions))
+            self._tasks[uuid] = task
+            for tag in task.get("tags", []):
+                self._by_tag.setdefault(tag, set()).add(uuid)
+            self._by_project.setdefault(task.get("project", ""), set()).add(uuid)
+            self._by_status.setdefault(task.get("status", ""), set()).add(uuid)
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def get(self, uuid: str) -> Optional[TaskwarriorRawItem]:
+        return self._tasks.get(uuid)
+
+    def query(
+        self,
+        tags: Iterable[str] = (),
+        project: Optional[str] = None,
+        statuses: Optional[Iterable[str]] = None,
+    ) -> List[TaskwarriorRawItem]:
+        """Return the tasks that have all the given tags, belong to the given project and have
+        one of the given statuses - any project or status if not given.
+        """
+        candidates: List[Set[str]] = [self._by_tag.get(tag, set()) for tag in tags]
+        if project:
+            candidates.append(self._by_project.get(project, set()))
+        if statuses is not None:
+            candidates.append(
+                set().union(*(self._by_status.get(status, set()) for status in statuses))
+            )
+
+        if not candidates:
+            uuids: Set[str] = set(self._tasks.keys())
+        else:
+            candidates.sort(key=len)
+            uuids = candidates[0].intersection(*candidates[1:])
+
+        return [self._tasks[uuid] for uuid in sorted(uuids, key=self._positions.__getitem__)]
@@ -0,0 +1,243 @@
+"""Watch mode - synchronize as soon as the Taskwarrior tasks change, instead of periodically.
+
+Two signals tell that the tasks changed:
+
+- Taskwarrior hooks, installed in the hooks directory of Taskwarrior, append the UUID of each
+  added or modified task to the queue file of each watching synchronization - see
+  `res/tw_hook.py`.
+- The data files of Taskwarrior change, e.g., on `task sync`, which doesn't run the hooks.
+
+Both are checked by polling the modification time and size of the files, a handful of `stat`
+calls per poll. Once a change is detected, the watcher waits for the files to stay unchanged
+for a while - a `task` command may touch them several times - before reporting it.
+"""
+import os
+import stat
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+from bubop import logger
+
+from taskwarrior_syncall.aggregator import Aggregator
+from taskwarrior_syncall.taskwarrior_side import TaskWarriorSide
+
+# data files of Taskwarrior 2.x and 3.x
+DATA_FILES = ("pending.data", "completed.data", "taskchampion.sqlite3")
+
+HOOK_SUFFIX = "taskwarrior_syncall.py"
+HOOK_EVENTS = ("on-add", "on-modify")
+
+_Stamp = Dict[str, Tuple[int, int]]
+
+
+def install_hooks(hooks_location: Path, queue_dir: Path):
+    """Install the hooks that record the UUIDs of the changed tasks in the given directory.
+
+    Existing hooks of ours are overwritten, other hooks are left alone.
+    """
+    # slow to import - only pay for it in watch mode
+    import pkg_resources
+
+    template = Path(
+        pkg_resources.resource_filename(
+            "taskwarrior_syncall", os.path.join("res", "tw_hook.py")
+        )
+    ).read_text()
+    hook = template.replace("@QUEUE_DIR@", str(queue_dir))
+
+    hooks_location.mkdir(parents=True, exist_ok=True)
+    for event in HOOK_EVENTS:
+        path = hooks_location / f"{event}.{HOOK_SUFFIX}"
+        if not path.is_file() or path.read_text() != hook:
+            logger.info(f"Installing Taskwarrior hook -> {path}")
+            path.write_text(hook)
+        path.chmod(path.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+
+def uninstall_hooks(hooks_location: Path, queue_dir: Path):
+    """Remove the hooks installed by `install_hooks`, unless some other synchronization still
+    watches, i.e., its queue file is still in the given directory.
+    """
+    if any(queue_dir.glob("*.queue")):
+        return
+
+    for event in HOOK_EVENTS:
+        path = hooks_location / f"{event}.{HOOK_SUFFIX}"
+        if path.is_file():
+            logger.info(f"Removing Taskwarrior hook -> {path}")
+            path.unlink()
+
+
+class TaskWarriorWatcher:
+    """Wait for the Taskwarrior tasks to change - see the module docstring.
+
+    Use it as a context manager - its queue file only exists within it, so that the hooks only
+    record the changes while someone watches.
+
+    :param data_location: Directory of the data files of Taskwarrior
+    :param queue_file: File the hooks append the UUIDs of the changed tasks to
+    :param debounce: Seconds the files have to stay unchanged for, before reporting a change
+    :param poll_interval: Seconds between consecutive checks of the files
+    """
+
+    def __init__(
+        self,
+        data_location: Path,
+        queue_file: Path,
+        debounce: float = 2.0,
+        poll_interval: float = 0.5,
+    ):
+        self._data_files = [data_location / fname for fname in DATA_FILES]
+        self._queue_file = queue_file
+        self._debounce = debounce
+        self._poll_interval = poll_interval
+        self._last_stamp: _Stamp = {}
+        # UUIDs recorded by the hooks, to report on the next wait
+        self._pending: Set[str] = set()
+
+    def __enter__(self):
+        self._queue_file.parent.mkdir(parents=True, exist_ok=True)
+        self._queue_file.touch()
+        self.reset()
+        return self
+
+    def __exit__(self, *_):
+        self._queue_file.unlink(missing_ok=True)
+
+    def reset(self):
+        """Forget the changes so far."""
+        self._drain_queue()
+        self._pending = set()
+        self._last_stamp = self._stamp()
+
+    def ignore(self, uuids: Iterable[str]):
+        """Forget the changes of the given tasks, e.g., the writes of the synchronization
+        itself.
+
+        The changes of other tasks recorded by the hooks meanwhile are reported by the next
+        `wait`, right away.
+        """
+        self._pending.update(self._drain_queue().difference(uuids))
+        self._last_stamp = self._stamp()
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[Set[str]]:
+        """Block until the tasks change.
+
+        :param timeout: Max seconds to wait for a change - forever by default
+        :return: The UUIDs recorded by the hooks, possibly none, e.g., if only the data files
+                 changed - None if no change happened until the timeout
+        """
+        if not self._pending:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while self._stamp() == self._last_stamp:
+                if deadline is not None and time.monotonic() >= deadline:
+                    return None
+                time.sleep(self._poll_interval)
+
+            # debounce - wait for the files to settle
+            stamp = self._stamp()
+            settled_since = time.monotonic()
+            while time.monotonic() - settled_since < self._debounce:
+                time.sleep(self._poll_interval)
+                new_stamp = self._stamp()
+                if new_stamp != stamp:
+                    stamp = new_stamp
+                    settled_since = time.monotonic()
+
+        uuids = self._pending.union(self._drain_queue())
+        self._pending = set()
+        self._last_stamp = self._stamp()
+        return uuids
+
+    def _stamp(self) -> _Stamp:
+        """Modification time and size of each of the files.
+
+        Only the size of the queue counts - it's recreated, empty, whenever it's drained.
+        """
+        stamp: _Stamp = {}
+        for path in (*self._data_files, self._queue_file):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            mtime = 0 if path == self._queue_file else st.st_mtime_ns
+            stamp[str(path)] = (mtime, st.st_size)
+
+        return stamp
+
+    def _drain_queue(self) -> Set[str]:
+        """Return and clear the UUIDs recorded by the hooks.
+
+        The queue is moved out of the way before reading it, so that no UUID appended by a hook
+        meanwhile is lost.
+        """
+        draining = self._queue_file.with_suffix(".draining")
+        try:
+            os.replace(self._queue_file, draining)
+        except FileNotFoundError:
+            return set()
+        finally:
+            self._queue_file.touch()
+
+        uuids = {line.strip() for line in draining.read_text().splitlines() if line.strip()}
+        draining.unlink()
+        return uuids
+
+
+def watch_taskwarrior(
+    aggregator: Aggregator,
+    tw_side: TaskWarriorSide,
+    interval: float,
+    sync: Optional[Callable[[Iterable[str]], None]] = None,
+):
+    """Synchronize whenever the tasks of the given side change, until interrupted.
+
+    Also synchronize every `interval` seconds regardless, to pick up the changes of the other
+    side. The hooks are installed for as long as this runs - each of them starts a process on
+    every `task add` / `task modify`.
+
+    :param sync: Function that synchronizes given the UUIDs of the changed tasks. By default,
+                 only the given tasks are synchronized, or everything if none is given, e.g.,
+                 on the periodic synchronization
+    """
+    prefs_manager = aggregator.prefs_manager
+    queue_dir = prefs_manager.config_directory / "tw_watch"
+    install_hooks(tw_side.hooks_location, queue_dir=queue_dir)
+
+    def sync_changed(uuids: Iterable[str]):
+        if not uuids:
+            aggregator.sync()
+        elif aggregator.side_A is tw_side:
+            aggregator.sync_items(ids_A=uuids)
+        else:
+            aggregator.sync_items(ids_B=uuids)
+
+    if sync is None:
+        sync = sync_changed
+
+    try:
+        with TaskWarriorWatcher(
+            data_location=tw_side.data_location,
+            queue_file=queue_dir / f"{prefs_manager.config_file.stem}.queue",
+        ) as watcher:
+            logger.success("Watching Taskwarrior for changes, press Ctrl-C to stop...")
+            # written before watching, e.g., by the first synchronization
+            tw_side.pop_written_uuids()
+            while True:
+                changed = watcher.wait(timeout=interval)
+                if changed is None:
+                    logger.info("Synchronizing periodically...")
+                    changed = set()
+                else:
+                    logger.info(
+                        f"Taskwarrior changed ({len(changed)} task(s)), synchronizing..."
+                    )
+
+                sync(changed)
+
+                # our own writes to taskwarrior are no reason to synchronize again - unlike the
+                # changes the user made meanwhile
+                watcher.ignore(tw_side.pop_written_uuids())
+    finally:
+        uninstall_hooks(tw_side.hooks_location, queue_dir=queue_dir)
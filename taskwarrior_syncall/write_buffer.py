@@ -0,0 +1,94 @@
+"""Buffering of the writes of a side so that they can be applied in batches.
+
+Items added through a buffered side don't have their final ID until the buffer is flushed.
+Instead, `add_item` returns the item with a *provisional* ID which the Aggregator replaces with
+the actual one after calling `SyncSide.flush`.
+"""
+import threading
+import uuid
+from typing import Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+
+from bubop import logger
+from item_synchronizer.types import ID
+
+from taskwarrior_syncall.sync_side import ItemType
+
+PROVISIONAL_ID_PREFIX = "provisional-"
+
+WriteT = TypeVar("WriteT")
+
+# Applies a batch of writes, given as (key, write) pairs, and returns the resulting item of each
+# write by its key - None for failed writes.
+FlushFn = Callable[[List[Tuple[str, WriteT]]], Dict[str, Optional[ItemType]]]
+
+
+def new_provisional_id() -> str:
+    """Generate a unique provisional ID."""
+    return f"{PROVISIONAL_ID_PREFIX}{uuid.uuid4().hex}"
+
+
+def is_provisional_id(id_: ID) -> bool:
+    """True if the given ID is a provisional one, assigned by a WriteBuffer."""
+    return str(id_).startswith(PROVISIONAL_ID_PREFIX)
+
+
+class WriteBuffer(Generic[WriteT]):
+    """Queue writes and apply them in batches of up to `max_size` writes.
+
+    The writes are opaque to the buffer - it's up to the given `flush_fn` to apply them.
+    Writes may be queued from multiple threads.
+    """
+
+    def __init__(self, flush_fn: FlushFn, max_size: int, name: str = ""):
+        self._flush_fn = flush_fn
+        self._max_size = max_size
+        self._name = name
+
+        self._pending: List[Tuple[str, WriteT]] = []
+        # provisional ID -> created item, or None if the creation failed
+        self._resolved: Dict[str, Optional[ItemType]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, write: WriteT, is_insertion: bool = False) -> str:
+        """Queue a write - flush if the buffer is full.
+
+        :param is_insertion: Whether the write creates a new item. If so, the returned key is
+                             the provisional ID to use for that item.
+        :return: The key of the write
+        """
+        key = new_provisional_id() if is_insertion else f"write-{uuid.uuid4().hex}"
+        with self._lock:
+            self._pending.append((key, write))
+            if len(self._pending) >= self._max_size:
+                self.flush()
+
+        return key
+
+    def flush(self) -> None:
+        """Apply all the queued writes."""
+        with self._lock:
+            if not self._pending:
+                return
+
+            pending, self._pending = self._pending, []
+            logger.debug(f"{self._name}: Flushing {len(pending)} buffered write(s)...")
+            results: Dict[str, Optional[ItemType]] = {}
+            try:
+                results = self._flush_fn(pending)
+            finally:
+                # report the insertions as failed if the whole batch failed
+                for key, _ in pending:
+                    if is_provisional_id(key):
+                        self._resolved[key] = results.get(key)
+
+    def pop_resolved(self) -> Dict[ID, Optional[ItemType]]:
+        """Return the items created since the last call, by their provisional ID.
+
+        Items whose creation failed are mapped to None.
+        """
+        with self._lock:
+            resolved, self._resolved = self._resolved, {}
+        return resolved
@@ -0,0 +1,166 @@
+"""Concurrent execution of the writes to a side.
+
+The Aggregator can hand its writes (insertions, updates, deletions) over to a WritePool instead
+of performing them one by one. Writes are spread over a bounded number of worker threads, so
+that the round trips to a web service overlap.
+
+Only the writes themselves run on the workers. What happens once a write is done (recording
+snapshots, ID correspondences, etc.) is run on the calling thread when it joins the pool, so
+none of the Aggregator's state is shared across threads.
+
+AsyncWritePool is the counterpart for sides with coroutine methods - see
+:py:mod:`taskwarrior_syncall.async_aggregator`. Its writes run on the event loop when it's
+joined.
+"""
+import asyncio
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from bubop import logger
+
+
+@dataclass
+class _PendingWrite:
+    key: str
+    future: Future
+    on_success: Optional[Callable[[Any], None]]
+    on_failure: Optional[Callable[[Exception], None]]
+
+
+class WritePool:
+    """Run writes on a bounded number of worker threads.
+
+    Writes with the same key (e.g., the ID of the item they refer to) always go to the same
+    worker, so they are applied in the order they were submitted.
+    """
+
+    def __init__(self, name: str, workers: int):
+        assert workers > 0, "A write pool needs at least one worker"
+        self._name = name
+        self._executors = [
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{name}-writer-{i}")
+            for i in range(workers)
+        ]
+        self._pending: List[_PendingWrite] = []
+
+    def submit(
+        self,
+        key: str,
+        fn: Callable[[], Any],
+        on_success: Optional[Callable[[Any], None]] = None,
+        on_failure: Optional[Callable[[Exception], None]] = None,
+    ):
+        """Schedule the given write.
+
+        :param key: Writes with the same key run sequentially, in submission order
+        :param on_success: Called with the result of the write when joining
+        :param on_failure: Called with the exception of the write when joining
+        """
+        executor = self._executors[zlib.crc32(key.encode("utf-8")) % len(self._executors)]
+        self._pending.append(
+            _PendingWrite(
+                key=key,
+                future=executor.submit(fn),
+                on_success=on_success,
+                on_failure=on_failure,
+            )
+        )
+
+    def join(self) -> Dict[str, Exception]:
+        """Wait for all the scheduled writes and run their callbacks, in submission order.
+
+        :return: The exceptions of the writes that failed, by their key
+        """
+        pending, self._pending = self._pending, []
+        return _run_callbacks(self._name, pending)
+
+    def shutdown(self):
+        """Stop the workers, after they're done with the writes at hand."""
+        for executor in self._executors:
+            executor.shutdown(wait=True)
+
+
+class AsyncWritePool:
+    """Run writes given as coroutine functions, with up to `concurrency` of them in flight.
+
+    Like in WritePool, writes with the same key are applied in the order they were submitted.
+    """
+
+    def __init__(self, name: str, concurrency: int):
+        assert concurrency > 0, "A write pool needs to allow at least one write at a time"
+        self._name = name
+        self._concurrency = concurrency
+        self._pending: List[Callable[[], Awaitable[Any]]] = []
+        self._writes: List[_PendingWrite] = []
+
+    def submit(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        on_success: Optional[Callable[[Any], None]] = None,
+        on_failure: Optional[Callable[[Exception], None]] = None,
+    ):
+        """Schedule the given write - see `WritePool.submit`.
+
+        Nothing runs until the pool is joined.
+        """
+        self._pending.append(fn)
+        self._writes.append(
+            _PendingWrite(
+                key=key, future=Future(), on_success=on_success, on_failure=on_failure
+            )
+        )
+
+    async def join(self) -> Dict[str, Exception]:
+        """Run all the scheduled writes, then their callbacks, in submission order.
+
+        :return: The exceptions of the writes that failed, by their key
+        """
+        fns, self._pending = self._pending, []
+        writes, self._writes = self._writes, []
+
+        by_key: Dict[str, List[int]] = {}
+        for i, write in enumerate(writes):
+            by_key.setdefault(write.key, []).append(i)
+
+        semaphore = asyncio.Semaphore(self._concurrency)
+
+        async def run_writes_of_key(indices: List[int]):
+            for i in indices:
+                async with semaphore:
+                    try:
+                        writes[i].future.set_result(await fns[i]())
+                    except Exception as err:
+                        writes[i].future.set_exception(err)
+
+        await asyncio.gather(*(run_writes_of_key(indices) for indices in by_key.values()))
+        return _run_callbacks(self._name, writes)
+
+    def shutdown(self):
+        """Nothing to stop - writes only run while the pool is joined."""
+
+
+def _run_callbacks(name: str, writes: List[_PendingWrite]) -> Dict[str, Exception]:
+    """Run the callbacks of the given writes, in order, once they're done."""
+    failures: Dict[str, Exception] = {}
+    for write in writes:
+        try:
+            result = write.future.result()
+        except Exception as err:
+            failures[write.key] = err
+            logger.opt(exception=err).debug(f"{name}: Write failed -> {write.key}")
+            if write.on_failure is not None:
+                write.on_failure(err)
+        else:
+            if write.on_success is not None:
+                write.on_success(result)
+
+    if failures:
+        logger.error(
+            f"{name}: {len(failures)} out of {len(writes)} write(s) failed -> "
+            + ", ".join(f"{key}: {err}" for key, err in failures.items())
+        )
+
+    return failures
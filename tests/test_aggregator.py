@@ -1,8 +1,25 @@
-from typing import Optional, Sequence
+import asyncio
+import itertools
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+from unittest.mock import patch
 
+import pytest
+from item_synchronizer.resolution_strategy import AlwaysFirstRS
 from item_synchronizer.types import ID
 
-from taskwarrior_syncall import ItemType, SyncSide
+from taskwarrior_syncall import (
+    Aggregator,
+    AsyncAggregator,
+    AsyncSyncSide,
+    ExecutorAsyncSide,
+    ItemsDelta,
+    ItemType,
+    SyncSide,
+)
+from taskwarrior_syncall.snapshot_store import SQLiteSnapshotStore
+from taskwarrior_syncall.write_buffer import WriteBuffer, is_provisional_id
 
 
 class MockSide(SyncSide):
@@ -45,3 +62,628 @@ class MockSide(SyncSide):
         .. returns:: True if items are identical, False otherwise.
         """
         raise NotImplementedError("Implement in derived")
+
+
+class DictSide(SyncSide):
+    """In-memory side, keeping its items in a dictionary."""
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name=name, fullname=name)
+        self.items: Dict[str, dict] = {}
+        self.calls: List[str] = []
+        self._ids = itertools.count(1)
+
+    def get_all_items(self, **kargs) -> Sequence[ItemType]:
+        self.calls.append("get_all_items")
+        return [dict(item) for item in self.items.values()]
+
+    def get_item(self, item_id: ID, use_cached: bool = False) -> Optional[ItemType]:
+        self.calls.append("get_item")
+        item = self.items.get(item_id)
+        return None if item is None else dict(item)
+
+    def delete_single_item(self, item_id: ID):
+        self.calls.append("delete_single_item")
+        self.items.pop(item_id)
+
+    def update_item(self, item_id: ID, **changes):
+        self.calls.append("update_item")
+        self.items[item_id].update(changes)
+
+    def add_item(self, item: ItemType) -> ItemType:
+        self.calls.append("add_item")
+        new_item = {**item, "id": f"{self.name}{next(self._ids)}"}
+        self.items[new_item["id"]] = new_item
+        return dict(new_item)
+
+    @classmethod
+    def id_key(cls) -> str:
+        return "id"
+
+    @classmethod
+    def summary_key(cls) -> str:
+        return "title"
+
+    @classmethod
+    def last_modification_key(cls) -> str:
+        return "modified"
+
+    @classmethod
+    def items_are_identical(
+        cls, item1: ItemType, item2: ItemType, ignore_keys: Sequence[str] = []
+    ) -> bool:
+        keys = [k for k in ("title", "done") if k not in ignore_keys]
+        return SyncSide._items_are_identical(item1, item2, keys)
+
+    @classmethod
+    def fingerprint(cls, item: ItemType, ignore_keys: Sequence[str] = []) -> Optional[str]:
+        return SyncSide._fingerprint(
+            item, keys=[k for k in ("title", "done") if k not in ignore_keys]
+        )
+
+
+def convert(item: ItemType) -> ItemType:
+    return {"title": item["title"], "done": item["done"]}
+
+
+@pytest.fixture()
+def config_dir(tmp_path: Path):
+    with patch("bubop.common_dir.CommonDir.config", return_value=tmp_path):
+        yield tmp_path
+
+
+def make_aggregator(side_A: DictSide, side_B: DictSide, **kargs) -> Aggregator:
+    return Aggregator(
+        side_A=side_A,
+        side_B=side_B,
+        converter_B_to_A=convert,
+        converter_A_to_B=convert,
+        config_fname="test_aggregator",
+        **kargs,
+    )
+
+
+def test_aggregator_sync(config_dir: Path):
+    side_A, side_B = DictSide("A"), DictSide("B")
+    side_A.items["A0"] = {"id": "A0", "title": "kalimera", "done": False}
+    side_B.items["B0"] = {"id": "B0", "title": "kalinuxta", "done": False}
+
+    with make_aggregator(side_A, side_B) as aggregator:
+        aggregator.sync()
+
+        # the new items are snapshotted as fetched - only fetched again to be converted
+        assert side_A.calls.count("get_item") == 1
+        assert side_B.calls.count("get_item") == 1
+        assert sorted(i["title"] for i in side_A.items.values()) == ["kalimera", "kalinuxta"]
+        assert sorted(i["title"] for i in side_B.items.values()) == ["kalimera", "kalinuxta"]
+
+        # modify on one side, delete on the other
+        side_A.items["A0"]["done"] = True
+        del side_A.items["A1"]
+        aggregator.sync()
+
+        assert list(side_A.items.values()) == [{"id": "A0", "title": "kalimera", "done": True}]
+        assert list(side_B.items.values()) == [{"id": "B1", "title": "kalimera", "done": True}]
+
+        # nothing changed - no writes at all, no cached versions loaded
+        side_A.calls.clear()
+        side_B.calls.clear()
+        with patch.object(SQLiteSnapshotStore, "get_many", return_value={}) as get_many:
+            aggregator.sync()
+            assert all(not call.args[0] for call in get_many.call_args_list)
+
+        assert {"add_item", "update_item", "delete_single_item"}.isdisjoint(side_A.calls)
+        assert {"add_item", "update_item", "delete_single_item"}.isdisjoint(side_B.calls)
+
+
+class DeltaDictSide(DictSide):
+    """In-memory side that can also report only the items that changed."""
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name=name)
+        self.changed: Set[str] = set()
+
+    def get_items_delta(self, sync_state: Dict[str, Any]) -> Optional[ItemsDelta]:
+        if "last_sync" not in sync_state:
+            return None
+
+        self.calls.append("get_items_delta")
+        return ItemsDelta(
+            items=[dict(self.items[id_]) for id_ in self.changed if id_ in self.items],
+            all_ids=set(self.items.keys()),
+        )
+
+
+def test_aggregator_sync_incremental(config_dir: Path):
+    side_A, side_B = DeltaDictSide("A"), DictSide("B")
+    side_A.items["A0"] = {"id": "A0", "title": "kalimera", "done": False}
+    side_A.items["A1"] = {"id": "A1", "title": "kalispera", "done": False}
+
+    with Aggregator(
+        side_A=side_A,
+        side_B=side_B,
+        converter_B_to_A=convert,
+        converter_A_to_B=convert,
+        config_fname="test_aggregator",
+        incremental=True,
+    ) as aggregator:
+        # first run - nothing to compute the delta against
+        aggregator.sync()
+        assert "get_all_items" in side_A.calls
+        assert sorted(i["title"] for i in side_B.items.values()) == ["kalimera", "kalispera"]
+
+        # modify one, delete another one - only the delta is fetched
+        side_A.calls.clear()
+        side_A.items["A0"]["done"] = True
+        side_A.changed.add("A0")
+        del side_A.items["A1"]
+        aggregator.sync()
+
+        assert "get_items_delta" in side_A.calls
+        assert "get_all_items" not in side_A.calls
+        assert [convert(i) for i in side_B.items.values()] == [
+            {"title": "kalimera", "done": True}
+        ]
+
+
+def test_aggregator_sync_items(config_dir: Path):
+    side_A, side_B = DictSide("A"), DictSide("B")
+    side_A.items["A0"] = {"id": "A0", "title": "kalimera", "done": False}
+    side_A.items["A1"] = {"id": "A1", "title": "kalispera", "done": False}
+
+    with make_aggregator(side_A, side_B) as aggregator:
+        aggregator.sync()
+        B_of = {item["title"]: id_ for id_, item in side_B.items.items()}
+
+        # only the given items are synchronized, without listing the sides
+        side_A.calls.clear()
+        side_B.calls.clear()
+        side_A.items["A0"]["done"] = True
+        del side_A.items["A1"]
+        side_A.items["A9"] = {"id": "A9", "title": "kalinuxta", "done": False}
+        aggregator.sync_items(ids_A=["A0", "A9"])
+
+        assert "get_all_items" not in side_A.calls + side_B.calls
+        assert side_B.items[B_of["kalimera"]]["done"] is True
+        assert sorted(i["title"] for i in side_B.items.values()) == [
+            "kalimera",
+            "kalinuxta",
+            "kalispera",
+        ]
+
+        # items no longer present are deleted
+        aggregator.sync_items(ids_A=["A1"])
+        assert B_of["kalispera"] not in side_B.items
+
+        # the counterpart of each item is checked too - conflicts resolve as in a full sync
+        side_A.items["A0"]["title"] = "kalimera sas"
+        side_B.items[B_of["kalimera"]]["title"] = "kalimera se olous"
+        aggregator.sync_items(ids_A=["A0"])
+        assert side_A.items["A0"]["title"] == "kalimera se olous"
+
+        # the targeted syncs leave nothing for the full one to do
+        side_A.calls.clear()
+        side_B.calls.clear()
+        aggregator.sync()
+        assert {"add_item", "update_item", "delete_single_item"}.isdisjoint(side_A.calls)
+        assert {"add_item", "update_item", "delete_single_item"}.isdisjoint(side_B.calls)
+
+
+class BufferedDictSide(DictSide):
+    """In-memory side that buffers its insertions - items titled "fail" fail to be inserted."""
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name=name)
+        self._write_buffer: WriteBuffer[dict] = WriteBuffer(
+            flush_fn=self._insert_many, max_size=2
+        )
+
+    def add_item(self, item: ItemType) -> ItemType:
+        provisional_id = self._write_buffer.add(dict(item), is_insertion=True)
+        return {**item, "id": provisional_id}
+
+    def flush(self) -> Dict[ID, Optional[ItemType]]:
+        self._write_buffer.flush()
+        return self._write_buffer.pop_resolved()
+
+    def _insert_many(self, writes: List[Tuple[str, dict]]) -> Dict[str, Optional[ItemType]]:
+        self.calls.append("insert_many")
+        return {
+            key: super(BufferedDictSide, self).add_item(item)
+            for key, item in writes
+            if item["title"] != "fail"
+        }
+
+
+def test_aggregator_sync_buffered_writes(config_dir: Path):
+    side_A, side_B = DictSide("A"), BufferedDictSide("B")
+    for i, title in enumerate(("kalimera", "kalispera", "kalinuxta", "fail")):
+        side_A.items[f"A{i}"] = {"id": f"A{i}", "title": title, "done": False}
+
+    with make_aggregator(side_A, side_B) as aggregator:
+        aggregator.sync()
+
+        assert side_B.calls.count("insert_many") == 2
+        assert sorted(i["title"] for i in side_B.items.values()) == [
+            "kalimera",
+            "kalinuxta",
+            "kalispera",
+        ]
+        # only actual IDs are kept
+        assert set(aggregator._B_to_A_map.keys()) == set(side_B.items.keys())
+
+        # modify a buffered item - update goes to the actual ID, failed item retried
+        side_A.items["A0"]["done"] = True
+        side_A.items["A3"]["title"] = "kalo apogeuma"
+        aggregator.sync()
+
+        assert sorted((i["title"], i["done"]) for i in side_B.items.values() if i["done"]) == [
+            ("kalimera", True)
+        ]
+        assert "kalo apogeuma" in [i["title"] for i in side_B.items.values()]
+        assert not any(is_provisional_id(id_) for id_ in aggregator._B_to_A_map.keys())
+
+
+class ConflictDictSide(DictSide):
+    """In-memory side where the items in `modified_meanwhile` change right before they're
+    updated, so their updates are rejected.
+    """
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name=name)
+        self.modified_meanwhile: Dict[str, dict] = {}
+        self._rejected: Set[ID] = set()
+
+    def update_item(self, item_id: ID, **changes):
+        if item_id in self.modified_meanwhile:
+            self.items[item_id].update(self.modified_meanwhile.pop(item_id))
+            self._rejected.add(item_id)
+            return
+
+        super().update_item(item_id, **changes)
+
+    def pop_rejected_updates(self) -> Set[ID]:
+        rejected, self._rejected = self._rejected, set()
+        return rejected
+
+
+def test_aggregator_rejected_updates(config_dir: Path):
+    side_A, side_B = DictSide("A"), ConflictDictSide("B")
+    side_A.items["A0"] = {"id": "A0", "title": "kalimera", "done": False}
+
+    with make_aggregator(side_A, side_B, resolution_strategy=AlwaysFirstRS()) as aggregator:
+        aggregator.sync()
+
+        # the update is rejected - nothing is overwritten
+        side_A.items["A0"]["title"] = "kalispera"
+        side_B.modified_meanwhile["B1"] = {"done": True}
+        aggregator.sync()
+        assert side_B.items["B1"] == {"id": "B1", "title": "kalimera", "done": True}
+
+        # both items are considered modified on the next run - the conflict is resolved in
+        # favour of side A, instead of the change of side A getting lost
+        aggregator.sync()
+        assert side_A.items["A0"] == {"id": "A0", "title": "kalispera", "done": False}
+        assert side_B.items["B1"] == {"id": "B1", "title": "kalispera", "done": False}
+
+        side_A.calls.clear()
+        side_B.calls.clear()
+        aggregator.sync()
+        assert "update_item" not in side_A.calls + side_B.calls
+
+
+class UndeletableDictSide(DictSide):
+    """In-memory side whose deletions fail while `fail_deletions` is set - as if they were
+    buffered and applied later.
+    """
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name=name)
+        self.fail_deletions = False
+        self._failed: Set[ID] = set()
+
+    def delete_single_item(self, item_id: ID):
+        if self.fail_deletions:
+            self._failed.add(item_id)
+            return
+
+        super().delete_single_item(item_id)
+
+    def pop_failed_deletions(self) -> Set[ID]:
+        failed, self._failed = self._failed, set()
+        return failed
+
+
+def test_aggregator_failed_deletions(config_dir: Path):
+    side_A, side_B = DictSide("A"), UndeletableDictSide("B")
+    side_A.items["A0"] = {"id": "A0", "title": "kalimera", "done": False}
+
+    with make_aggregator(side_A, side_B) as aggregator:
+        aggregator.sync()
+
+        # the correspondence is kept, instead of the item getting inserted back to side A
+        del side_A.items["A0"]
+        side_B.fail_deletions = True
+        aggregator.sync()
+        assert aggregator._B_to_A_map == {"B1": "A0"}
+
+        side_A.calls.clear()
+        side_B.fail_deletions = False
+        aggregator.sync()
+        assert side_A.items == side_B.items == {}
+        assert "add_item" not in side_A.calls
+
+
+class BarrierDictSide(DictSide):
+    """In-memory side whose fetches only go through if both sides fetch at the same time."""
+
+    def __init__(
+        self, name: str, barrier: threading.Barrier, error: Optional[Exception] = None
+    ):
+        super().__init__(name=name)
+        self._barrier = barrier
+        self._error = error
+
+    def get_all_items(self, **kargs) -> Sequence[ItemType]:
+        self._barrier.wait()
+        if self._error is not None:
+            raise self._error
+        return super().get_all_items(**kargs)
+
+
+def test_aggregator_fetches_concurrently(config_dir: Path):
+    barrier = threading.Barrier(2, timeout=5)
+    side_A, side_B = BarrierDictSide("A", barrier), BarrierDictSide("B", barrier)
+    side_A.items["A0"] = {"id": "A0", "title": "kalimera", "done": False}
+
+    with make_aggregator(side_A, side_B) as aggregator:
+        aggregator.sync()
+    assert [convert(i) for i in side_B.items.values()] == [
+        {"title": "kalimera", "done": False}
+    ]
+
+    # both fail - side A's error is the one raised
+    side_A = BarrierDictSide("A", barrier, error=RuntimeError("A"))
+    side_B = BarrierDictSide("B", barrier, error=KeyError("B"))
+    with make_aggregator(side_A, side_B) as aggregator:
+        with pytest.raises(RuntimeError):
+            aggregator.sync()
+
+
+class FlakyDictSide(DictSide):
+    """In-memory side where writing items titled "fail" or with an ID in `fail_ids` fails."""
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name=name)
+        self.threads: Set[str] = set()
+        self.fail_ids: Set[str] = set()
+
+    def _check(self, item: ItemType):
+        self.threads.add(threading.current_thread().name)
+        if item["title"] == "fail" or item.get("id") in self.fail_ids:
+            raise RuntimeError("Write failed")
+
+    def add_item(self, item: ItemType) -> ItemType:
+        self._check(item)
+        return super().add_item(item)
+
+    def update_item(self, item_id: ID, **changes):
+        self._check(changes)
+        super().update_item(item_id, **changes)
+
+    def delete_single_item(self, item_id: ID):
+        self._check(self.items[item_id])
+        super().delete_single_item(item_id)
+
+
+def test_aggregator_sync_write_workers(config_dir: Path):
+    side_A, side_B = DictSide("A"), FlakyDictSide("B")
+    for i, title in enumerate(("kalimera", "kalispera", "kalinuxta", "fail")):
+        side_A.items[f"A{i}"] = {"id": f"A{i}", "title": title, "done": False}
+
+    with make_aggregator(side_A, side_B, write_workers=(0, 3)) as aggregator:
+        aggregator.sync()
+
+        assert all(name.startswith("B-writer") for name in side_B.threads)
+        assert sorted(i["title"] for i in side_B.items.values()) == [
+            "kalimera",
+            "kalinuxta",
+            "kalispera",
+        ]
+        assert set(aggregator._B_to_A_map.keys()) == set(side_B.items.keys())
+
+        # failed update keeps the previous state, failed insertion is retried
+        id_B = aggregator._B_to_A_map.inverse["A0"]
+        side_A.items["A0"]["title"] = "fail"
+        side_A.items["A3"]["title"] = "kalo apogeuma"
+        aggregator.sync()
+
+        assert side_B.items[id_B]["title"] == "kalimera"
+        assert "kalo apogeuma" in [i["title"] for i in side_B.items.values()]
+
+        # failed deletion is retried
+        side_B.fail_ids.add(id_B)
+        del side_A.items["A0"]
+        aggregator.sync()
+        assert id_B in side_B.items
+        assert aggregator._B_to_A_map[id_B] == "A0"
+
+        side_B.fail_ids.clear()
+        aggregator.sync()
+        assert id_B not in side_B.items
+        assert id_B not in aggregator._B_to_A_map
+
+
+class AsyncDictSide(AsyncSyncSide):
+    """In-memory side with coroutine methods, keeping track of the writes in flight."""
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name=name, fullname=name)
+        self._side = DictSide(name)
+        self.items = self._side.items
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def _write(self, fn, *args, **kargs):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            return fn(*args, **kargs)
+        finally:
+            self.in_flight -= 1
+
+    async def get_all_items(self, **kargs) -> Sequence[ItemType]:
+        return self._side.get_all_items(**kargs)
+
+    async def get_item(self, item_id: ID, use_cached: bool = False) -> Optional[ItemType]:
+        return self._side.get_item(item_id)
+
+    async def delete_single_item(self, item_id: ID):
+        await self._write(self._side.delete_single_item, item_id)
+
+    async def update_item(self, item_id: ID, **changes):
+        await self._write(self._side.update_item, item_id, **changes)
+
+    async def add_item(self, item: ItemType) -> ItemType:
+        return await self._write(self._side.add_item, item)
+
+    def id_key(self) -> str:
+        return DictSide.id_key()
+
+    def summary_key(self) -> str:
+        return DictSide.summary_key()
+
+    def last_modification_key(self) -> str:
+        return DictSide.last_modification_key()
+
+    def items_are_identical(
+        self, item1: ItemType, item2: ItemType, ignore_keys: Sequence[str] = []
+    ) -> bool:
+        return DictSide.items_are_identical(item1, item2, ignore_keys=ignore_keys)
+
+
+def test_async_aggregator_sync(config_dir: Path):
+    side_A, side_B = DictSide("A"), AsyncDictSide("B")
+    for i, title in enumerate(("kalimera", "kalispera", "kalinuxta")):
+        side_A.items[f"A{i}"] = {"id": f"A{i}", "title": title, "done": False}
+
+    async def run():
+        async with AsyncAggregator(
+            side_A=ExecutorAsyncSide(side_A),
+            side_B=side_B,
+            converter_B_to_A=convert,
+            converter_A_to_B=convert,
+            config_fname="test_aggregator",
+            write_concurrency=(1, 2),
+        ) as aggregator:
+            # not usable where a synchronous Aggregator is expected
+            assert not isinstance(aggregator, Aggregator)
+            await aggregator.sync()
+
+            # the insertions overlap, up to the allowed concurrency
+            assert side_B.max_in_flight == 2
+            assert sorted(i["title"] for i in side_B.items.values()) == [
+                "kalimera",
+                "kalinuxta",
+                "kalispera",
+            ]
+            assert set(aggregator._B_to_A_map.keys()) == set(side_B.items.keys())
+            assert not any(is_provisional_id(id_) for id_ in aggregator._B_to_A_map.keys())
+
+            # modify on one side, delete on the other
+            id_B = aggregator._B_to_A_map.inverse["A0"]
+            side_B.items[id_B]["done"] = True
+            del side_A.items["A1"]
+            await aggregator.sync()
+
+            assert side_A.items["A0"]["done"] is True
+            assert sorted(i["title"] for i in side_B.items.values()) == [
+                "kalimera",
+                "kalinuxta",
+            ]
+
+    asyncio.run(run())
+
+
+class Killed(BaseException):
+    """The process getting killed - not caught anywhere."""
+
+
+class KilledDictSide(DictSide):
+    """In-memory side where the process gets killed after `inserts_left` insertions or
+    `updates_left` updates - never with -1.
+    """
+
+    def __init__(self, name: str, inserts_left: int = -1, updates_left: int = -1) -> None:
+        super().__init__(name=name)
+        self.inserts_left = inserts_left
+        self.updates_left = updates_left
+
+    def add_item(self, item: ItemType) -> ItemType:
+        if self.inserts_left == 0:
+            raise Killed()
+        self.inserts_left -= 1
+        return super().add_item(item)
+
+    def update_item(self, item_id: ID, **changes):
+        if self.updates_left == 0:
+            raise Killed()
+        self.updates_left -= 1
+        super().update_item(item_id, **changes)
+
+
+def test_aggregator_resumes_interrupted_sync(config_dir: Path):
+    side_A, side_B = DictSide("A"), KilledDictSide("B", inserts_left=2)
+    for i, title in enumerate(("kalimera", "kalispera", "kalinuxta")):
+        side_A.items[f"A{i}"] = {"id": f"A{i}", "title": title, "done": False}
+
+    # killed midway - nothing persisted apart from the journal
+    aggregator = make_aggregator(side_A, side_B)
+    with patch.object(Aggregator, "_commit_state"), pytest.raises(Killed):
+        aggregator.sync()
+    assert len(side_B.items) == 2
+    aggregator._release_resources()
+
+    # the next run picks up the journaled insertions and only inserts the remaining item
+    side_B.inserts_left = -1
+    with make_aggregator(side_A, side_B) as aggregator:
+        assert set(aggregator._B_to_A_map.keys()) == set(side_B.items.keys())
+        assert not aggregator._journal.path.exists()
+
+        aggregator.sync()
+        assert sorted(i["title"] for i in side_B.items.values()) == [
+            "kalimera",
+            "kalinuxta",
+            "kalispera",
+        ]
+        assert set(aggregator._B_to_A_map.values()) == set(side_A.items.keys())
+
+        # the snapshots were replayed too - nothing to do
+        side_B.calls.clear()
+        aggregator.sync()
+        assert {"add_item", "update_item", "delete_single_item"}.isdisjoint(side_B.calls)
+
+
+def test_aggregator_interrupted_update(config_dir: Path):
+    side_A, side_B = DictSide("A"), KilledDictSide("B")
+    for i, title in enumerate(("kalimera", "kalispera")):
+        side_A.items[f"A{i}"] = {"id": f"A{i}", "title": title, "done": False}
+    with make_aggregator(side_A, side_B) as aggregator:
+        aggregator.sync()
+
+    # interrupted after the first of the two updates, e.g., with Ctrl-C
+    side_A.items["A0"]["done"] = True
+    side_A.items["A1"]["done"] = True
+    side_B.updates_left = 1
+    with pytest.raises(Killed), make_aggregator(side_A, side_B) as aggregator:
+        aggregator.sync()
+    assert sorted(i["done"] for i in side_B.items.values()) == [False, True]
+
+    # the update that didn't go through is retried, the one that did isn't
+    side_B.updates_left = -1
+    side_B.calls.clear()
+    with make_aggregator(side_A, side_B) as aggregator:
+        aggregator.sync()
+    assert [i["done"] for i in side_B.items.values()] == [True, True]
+    assert side_B.calls.count("update_item") == 1
@@ -0,0 +1,73 @@
+import datetime
+
+from taskwarrior_syncall.google.gcal_side import GCalSide
+from taskwarrior_syncall.notion_side import NotionSide
+from taskwarrior_syncall.notion_todo_block import NotionTodoBlock
+from taskwarrior_syncall.taskwarrior_side import TaskWarriorSide
+
+tw_item = {
+    "description": "kalimera",
+    "status": "pending",
+    "uuid": "3e3fdd67-b8b7-4924-bd86-36daa2e9c1c9",
+    "due": datetime.datetime(2021, 12, 4, 10, 1),
+    "modified": datetime.datetime(2021, 12, 4, 10, 1),
+}
+
+
+def test_tw_fingerprint():
+    fingerprint = TaskWarriorSide.fingerprint(tw_item)
+    assert fingerprint == TaskWarriorSide.fingerprint({**tw_item, "annotations": []})
+    assert fingerprint == TaskWarriorSide.fingerprint({**tw_item, "urgency": 3.2})
+    assert fingerprint != TaskWarriorSide.fingerprint({**tw_item, "status": "completed"})
+    assert fingerprint != TaskWarriorSide.fingerprint({**tw_item, "annotations": ["a"]})
+
+    # ignored keys don't count - annotations are always compared
+    ignore_keys = ["uuid", "due"]
+    fingerprint = TaskWarriorSide.fingerprint(tw_item, ignore_keys=ignore_keys)
+    assert fingerprint == TaskWarriorSide.fingerprint(
+        {**tw_item, "due": datetime.datetime(2022, 1, 1)}, ignore_keys=ignore_keys
+    )
+    assert fingerprint != TaskWarriorSide.fingerprint(
+        {**tw_item, "annotations": ["a"]}, ignore_keys=[*ignore_keys, "annotations"]
+    )
+
+
+def test_tw_items_are_identical_doesnt_modify_items():
+    item1 = {**tw_item, "annotations": ["a"]}
+    item2 = {**tw_item, "annotations": ["a"]}
+    assert TaskWarriorSide.items_are_identical(item1, item2)
+    assert item1 == item2 == {**tw_item, "annotations": ["a"]}
+
+
+def test_gcal_fingerprint():
+    event = {
+        "id": "kalimera",
+        "summary": "kalimera",
+        "start": {"dateTime": "2021-11-14T22:07:49Z"},
+        "end": {"dateTime": "2021-11-14T23:07:49Z"},
+        "updated": "2021-11-14T23:07:49Z",
+    }
+    fingerprint = GCalSide.fingerprint(event)
+    assert fingerprint == GCalSide.fingerprint({**event, "updated": "2022-11-14T23:07:49Z"})
+    assert fingerprint != GCalSide.fingerprint({**event, "summary": "kalinuxta"})
+
+
+def test_notion_fingerprint():
+    block = NotionTodoBlock(
+        is_archived=False,
+        is_checked=False,
+        last_modified_date=datetime.datetime(2021, 12, 4, 10, 1),
+        plaintext="kalimera",
+        id="7de89eb6-4ee1-472c-abcd-8231049e9d8d",
+    )
+    other_block = NotionTodoBlock(
+        is_archived=False,
+        is_checked=False,
+        last_modified_date=datetime.datetime(2021, 12, 4, 10, 5),
+        plaintext="kalimera",
+        id="7de89eb6-4ee1-472c-abcd-8231049e9d8d",
+    )
+    assert NotionSide.fingerprint(block) != NotionSide.fingerprint(other_block)
+    assert NotionSide.fingerprint(
+        block, ignore_keys=["last_modified_date"]
+    ) == NotionSide.fingerprint(other_block, ignore_keys=["last_modified_date"])
@@ -0,0 +1,290 @@
+import json
+from typing import Any, Callable, Dict, List, Set, Tuple
+from unittest.mock import MagicMock
+
+import httplib2
+import pytest
+from googleapiclient.http import HttpError
+
+from taskwarrior_syncall.google.gcal_side import GCalSide
+from taskwarrior_syncall.google.google_side import google_error_info
+from taskwarrior_syncall.request_executor import RequestExecutor
+from taskwarrior_syncall.write_buffer import is_provisional_id
+
+
+class FakeRequest:
+    def __init__(self, fn: Callable[[], Any]):
+        self._fn = fn
+        self.headers: Dict[str, str] = {}
+
+    def execute(self, *args, **kargs):
+        return self._fn()
+
+
+class FakeEvents:
+    """Fake of the events() resource of the Google Calendar API - single page responses."""
+
+    def __init__(self, events: List[dict]):
+        self.events: Dict[str, dict] = {e["id"]: e for e in events}
+        self.cancelled: List[dict] = []
+        self.list_calls: List[dict] = []
+        self.expired_sync_token = False
+        self.get_calls = 0
+        # summaries of events whose insertion is rate limited once
+        self.rate_limited: Set[str] = set()
+        # IDs of events that can't be deleted
+        self.undeletable: Set[str] = set()
+
+    def list(self, **kargs):
+        self.list_calls.append(kargs)
+
+        def fn():
+            if "syncToken" in kargs:
+                if self.expired_sync_token:
+                    raise HttpError(httplib2.Response({"status": 410}), b"Gone")
+                items = self.cancelled
+            else:
+                items = list(self.events.values())
+            return {"items": items, "nextSyncToken": f"token{len(self.list_calls)}"}
+
+        return FakeRequest(fn)
+
+    def list_next(self, request, response):
+        return None
+
+    def insert(self, calendarId: str, body: dict):
+        def fn():
+            if body.get("summary") == "fail":
+                raise HttpError(httplib2.Response({"status": 400}), b"Bad Request")
+            if body.get("summary") in self.rate_limited:
+                self.rate_limited.remove(body["summary"])
+                raise HttpError(
+                    httplib2.Response({"status": 429, "retry-after": "1"}), b"Slow down"
+                )
+            event = {**body, "id": f"e{len(self.events)}", "status": "confirmed"}
+            self.events[event["id"]] = event
+            return event
+
+        return FakeRequest(fn)
+
+    def get(self, calendarId: str, eventId: str):
+        self.get_calls += 1
+        return FakeRequest(lambda: dict(self.events[eventId]))
+
+    def update(self, calendarId: str, eventId: str, body: dict):
+        def fn():
+            etag = request.headers.get("If-Match")
+            if etag is not None and etag != self.events[eventId].get("etag"):
+                raise HttpError(httplib2.Response({"status": 412}), b"Precondition Failed")
+            self.events[eventId] = {**body, "etag": f"{etag}+"}
+            return self.events[eventId]
+
+        request = FakeRequest(fn)
+        return request
+
+    def delete(self, calendarId: str, eventId: str):
+        def fn():
+            if eventId in self.undeletable:
+                raise HttpError(httplib2.Response({"status": 403}), b"Forbidden")
+            if eventId not in self.events:
+                raise HttpError(httplib2.Response({"status": 410}), b"Gone")
+            return self.events.pop(eventId) and ""
+
+        return FakeRequest(fn)
+
+
+class FakeBatch:
+    """Fake of BatchHttpRequest - executes the requests one by one."""
+
+    executed: List[int] = []
+
+    def __init__(self, callback: Callable):
+        self._callback = callback
+        self._requests: List[Tuple[str, FakeRequest]] = []
+
+    def add(self, request: FakeRequest, request_id: str):
+        self._requests.append((request_id, request))
+
+    def execute(self):
+        FakeBatch.executed.append(len(self._requests))
+        for request_id, request in self._requests:
+            try:
+                self._callback(request_id, request.execute(), None)
+            except HttpError as err:
+                self._callback(request_id, None, err)
+
+
+@pytest.fixture()
+def gcal_side() -> GCalSide:
+    side = GCalSide(client_secret=None, oauth_port=8081)
+    side._service = MagicMock()
+    side._calendar_id = "cal"
+    return side
+
+
+def test_gcal_items_delta(gcal_side: GCalSide):
+    events = FakeEvents(
+        [
+            {"id": "e0", "status": "confirmed", "summary": "kalimera"},
+            {"id": "e1", "status": "confirmed", "summary": "kalinuxta"},
+        ]
+    )
+    gcal_side._service.events.return_value = events
+
+    # no sync token yet - full listing
+    sync_state: Dict[str, Any] = {}
+    delta = gcal_side.get_items_delta(sync_state)
+    assert delta is not None
+    assert delta.all_ids == {"e0", "e1"}
+    assert sync_state == {"calendar_id": "cal", "sync_token": "token1"}
+
+    # incremental listing - cancelled events are deletions
+    events.cancelled = [{"id": "e1", "status": "cancelled"}]
+    delta = gcal_side.get_items_delta(sync_state)
+    assert delta is not None
+    assert events.list_calls[-1]["syncToken"] == "token1"
+    assert delta.all_ids is None
+    assert delta.items == []
+    assert delta.deleted_ids == {"e1"}
+    assert sync_state["sync_token"] == "token2"
+
+    # expired sync token - full listing again
+    events.expired_sync_token = True
+    delta = gcal_side.get_items_delta(sync_state)
+    assert delta is not None
+    assert delta.all_ids == {"e0", "e1"}
+    assert "syncToken" not in events.list_calls[-1]
+
+    # sync token of another calendar is ignored
+    sync_state = {"calendar_id": "another", "sync_token": "token1"}
+    gcal_side.get_items_delta(sync_state)
+    assert "syncToken" not in events.list_calls[-1]
+    assert sync_state["calendar_id"] == "cal"
+
+
+def test_gcal_batch_writes():
+    events = FakeEvents([{"id": "e0", "status": "confirmed", "summary": "kalimera"}])
+    side = GCalSide(client_secret=None, oauth_port=8081, batch_writes=True)
+    side._service = MagicMock()
+    side._calendar_id = "cal"
+    side._service.events.return_value = events
+    side._service.new_batch_http_request.side_effect = lambda callback: FakeBatch(callback)
+    FakeBatch.executed.clear()
+    sleeps: List[float] = []
+
+    # nothing is sent until flushing
+    side._items_cache["e0"] = {**events.events["e0"], "etag": "0"}
+    side.update_item("e0", summary="kalispera")
+    added = [side.add_item({"summary": summary}) for summary in ("kalinuxta", "fail")]
+    side.delete_single_item("e0")
+    assert FakeBatch.executed == []
+    assert all(is_provisional_id(item["id"]) for item in added)
+
+    resolved = side.flush()
+    assert FakeBatch.executed == [4]
+    assert resolved[added[0]["id"]]["summary"] == "kalinuxta"
+    assert resolved[added[1]["id"]] is None
+    assert [e["summary"] for e in events.events.values()] == ["kalinuxta"]
+    assert side.flush() == {}
+    # the update was rejected - the event changed since it was cached
+    assert side.pop_rejected_updates() == {"e0"}
+
+    # rate limited writes are sent again
+    side._executor = RequestExecutor(
+        name="test", error_info=google_error_info, rate=100, sleep=sleeps.append
+    )
+    events.rate_limited.add("kalo apogeuma")
+    added = [side.add_item({"summary": summary}) for summary in ("kalo apogeuma", "kalispera")]
+    resolved = side.flush()
+    assert FakeBatch.executed == [4, 2, 1]
+    assert [resolved[item["id"]]["summary"] for item in added] == [
+        "kalo apogeuma",
+        "kalispera",
+    ]
+    assert sleeps[0] == 1.0
+    FakeBatch.executed.clear()
+
+    # full queues are flushed right away
+    for i in range(GCalSide._batch_size + 1):
+        side.add_item({"summary": f"event {i}"})
+    assert FakeBatch.executed == [GCalSide._batch_size]
+    side.finish()
+    assert FakeBatch.executed == [GCalSide._batch_size, 1]
+
+
+def test_gcal_batch_delete_failure():
+    events = FakeEvents(
+        [
+            {"id": "e0", "status": "confirmed", "summary": "kalimera"},
+            {"id": "e1", "status": "confirmed", "summary": "kalinuxta"},
+        ]
+    )
+    events.undeletable.add("e0")
+    side = GCalSide(client_secret=None, oauth_port=8081, batch_writes=True)
+    side._service = MagicMock()
+    side._calendar_id = "cal"
+    side._service.events.return_value = events
+    side._service.new_batch_http_request.side_effect = lambda callback: FakeBatch(callback)
+
+    for event_id in ("e0", "e1", "e2"):
+        side.delete_single_item(event_id)
+    side.flush()
+
+    # reported so that the deletion is retried on the next run - already deleted events
+    # don't count
+    assert list(events.events.keys()) == ["e0"]
+    assert side.pop_failed_deletions() == {"e0"}
+    assert side.pop_failed_deletions() == set()
+    assert side._delete_requests == {}
+
+
+def test_google_error_info():
+    def http_error(status: int, content: bytes) -> HttpError:
+        return HttpError(httplib2.Response({"status": status}), content)
+
+    def quota_error(reason: str) -> bytes:
+        return json.dumps(
+            {"error": {"code": 403, "errors": [{"domain": "usageLimits", "reason": reason}]}}
+        ).encode()
+
+    assert google_error_info(http_error(403, quota_error("rateLimitExceeded"))) == (429, None)
+    assert google_error_info(http_error(403, quota_error("userRateLimitExceeded"))) == (
+        429,
+        None,
+    )
+    # other 403s and bodies that merely mention the reason aren't rate limits
+    assert google_error_info(http_error(403, quota_error("forbidden"))) == (403, None)
+    assert google_error_info(http_error(403, b"not rateLimitExceeded")) == (403, None)
+    assert google_error_info(http_error(403, b'{"error": "rateLimitExceeded"}')) == (403, None)
+    assert google_error_info(ConnectionError()) == (503, None)
+    assert google_error_info(ValueError()) is None
+
+
+def test_gcal_update_item(gcal_side: GCalSide):
+    events = FakeEvents(
+        [
+            {"id": "e0", "etag": "0", "status": "confirmed", "summary": "kalimera"},
+            {"id": "e1", "etag": "1", "status": "confirmed", "summary": "kalinuxta"},
+        ]
+    )
+    gcal_side._service.events.return_value = events
+    gcal_side.get_all_items()
+
+    # cached event - no need to fetch it again
+    gcal_side.update_item("e0", summary="kalispera")
+    assert events.get_calls == 0
+    assert events.events["e0"]["summary"] == "kalispera"
+    assert events.events["e0"]["status"] == "confirmed"
+
+    # modified after it was cached - don't overwrite it
+    events.events["e1"] = {**events.events["e1"], "etag": "2"}
+    gcal_side.update_item("e1", summary="kalo apogeuma")
+    assert events.events["e1"]["summary"] == "kalinuxta"
+    assert gcal_side.pop_rejected_updates() == {"e1"}
+    assert gcal_side.pop_rejected_updates() == set()
+
+    # event not cached - fetch it first
+    gcal_side._items_cache.clear()
+    gcal_side.update_item("e1", summary="kalo apogeuma")
+    assert events.get_calls == 1
+    assert events.events["e1"]["summary"] == "kalo apogeuma"
@@ -1,7 +1,13 @@
+import pickle
+import stat
+from pathlib import Path
+from unittest.mock import patch
+
 import pytest
 from bubop.time import format_datetime_tz
+from gkeepapi import APIAuth, Keep
 
-from taskwarrior_syncall import GKeepTodoItem, GKeepTodoSide
+from taskwarrior_syncall import GKeepSession, GKeepTodoItem, GKeepTodoSide
 from taskwarrior_syncall.tw_gkeep_utils import (
     convert_gkeep_todo_to_tw,
     convert_tw_to_gkeep_todo,
@@ -53,3 +59,121 @@ def test_gkeep_todo_item_creation_from_raw(gkeep_raw_item):
         format_datetime_tz(gkeep_item.last_modified_date)
         == gkeep_raw_item["timestamps"]["updated"]
     )
+
+
+# test state cache ----------------------------------------------------------------------------
+def test_gkeep_state_cache(tmp_path: Path):
+    keep = Keep()
+    auth = APIAuth(Keep.OAUTH_SCOPES)
+    auth.setMasterToken("master-token")
+    keep._keep_api.setAuth(auth)
+    keep.createList("Test Note").add("kalimera")
+
+    state_cache = tmp_path / "gkeep_state.json"
+    # leftover of an interrupted write, readable by everyone
+    tmp_file = tmp_path / "gkeep_state.json.tmp"
+    tmp_file.write_text("")
+    tmp_file.chmod(0o644)
+    GKeepSession(keep, "user@example.com").save_state(state_cache)
+    assert stat.S_IMODE(state_cache.stat().st_mode) == 0o600
+
+    # resume from the cache - only the changes are fetched, no password login
+    with patch.object(Keep, "resume", return_value=True) as resume, patch.object(
+        Keep, "sync"
+    ) as sync, patch.object(Keep, "login") as login:
+        GKeepSession.login("user@example.com", "passwd", state_cache=state_cache)
+
+    assert resume.call_args.args[:2] == ("user@example.com", "master-token")
+    sync.assert_called_once_with()
+    login.assert_not_called()
+
+    # resumed with the cached notes, not synchronized from scratch
+    assert resume.call_args.kwargs["sync"] is False
+    restored = Keep()
+    restored.restore(resume.call_args.kwargs["state"])
+    (note,) = [n for n in restored.all() if n.title == "Test Note"]
+    assert [child.text for child in note.children] == ["kalimera"]
+
+    # cache of another account - log in with the password
+    with patch.object(Keep, "resume") as resume, patch.object(
+        Keep, "login", return_value=True
+    ) as login:
+        GKeepSession.login("other@example.com", "passwd", state_cache=state_cache)
+
+    resume.assert_not_called()
+    login.assert_called_once_with("other@example.com", "passwd")
+
+
+def test_gkeep_session_index():
+    keep = Keep()
+    note = keep.createList("Test Note")
+    keep.createList("Trashed Note").trash()
+    label = keep.createLabel("tw_gkeep_sync")
+    session = GKeepSession(keep, "")
+
+    assert session.find_notes("Test Note") == [note]
+    assert session.find_notes("Trashed Note") == []
+    assert session.find_notes("Unknown Note") == []
+    assert session.get_label("tw_gkeep_sync") is label
+
+    # kept up to date with the notes and labels created via the session
+    new_note = session.create_list("Test Note")
+    new_label = session.create_label("other_label")
+    assert session.find_notes("Test Note") == [note, new_note]
+    assert session.get_label("other_label") is new_label
+
+    # and rebuilt after each sync, e.g., for the notes renamed remotely
+    note.title = "Renamed Note"
+    with patch.object(Keep, "sync"):
+        session.sync()
+    assert session.find_notes("Renamed Note") == [note]
+    assert session.find_notes("Test Note") == [new_note]
+
+
+# test side -----------------------------------------------------------------------------------
+def test_gkeep_side_items():
+    keep = Keep()
+    note = keep.createList("Test Note")
+    note.add("kalimera")
+    note.add("kalispera", checked=True)
+    # either a session or the credentials to log in with
+    with pytest.raises(ValueError):
+        GKeepTodoSide(note_title="Test Note")
+    side = GKeepTodoSide(note_title="Test Note", session=GKeepSession(keep, ""))
+    # the shared session is refreshed first
+    with patch.object(Keep, "sync") as sync:
+        side.start()
+    sync.assert_called_once()
+
+    # the same wrappers throughout the synchronization
+    items = side.get_all_items()
+    assert sorted(item.plaintext for item in items) == ["kalimera", "kalispera"]
+    for item in items:
+        assert side.get_item(item.id) is item
+    assert all(a is b for a, b in zip(side.get_all_items(), items))
+
+    new_item = side.add_item(GKeepTodoItem(plaintext="kalinuxta"))
+    assert side.get_item(new_item.id) is new_item
+
+    side.update_item(new_item.id, plaintext="kalinuxta sas", is_checked=True)
+    assert note.get(new_item.id).text == "kalinuxta sas"
+    assert side.get_item(new_item.id).is_checked
+
+    side.delete_single_item(new_item.id)
+    assert side.get_item(new_item.id) is None
+
+
+def test_gkeep_item_pickle():
+    list_item = Keep().createList("Test Note").add("kalimera", checked=True)
+    item = GKeepTodoItem.from_gkeep_list_item(list_item)
+
+    # pickled as its values only, without the ListItem
+    loaded = pickle.loads(pickle.dumps(item))
+    assert loaded._inner is None
+    assert dict(loaded) == dict(item)
+    assert GKeepTodoSide.items_are_identical(loaded, item)
+
+    # snapshots pickled before the item was slotted
+    legacy = GKeepTodoItem.__new__(GKeepTodoItem)
+    legacy.__setstate__({"_inner": list_item})
+    assert dict(legacy) == dict(item)
@@ -0,0 +1,62 @@
+import json
+import subprocess
+import sys
+from typing import Set
+
+import pytest
+
+import taskwarrior_syncall
+
+# SDKs of the services and other slow imports that the package import mustn't pay for
+HEAVY_MODULES = (
+    "bubop",
+    "gkeepapi",
+    "googleapiclient",
+    "notion_client",
+    "pkg_resources",
+    "taskw",
+)
+
+
+def _modules_loaded_by(statement: str) -> Set[str]:
+    """Names of the modules loaded after running the given statement in a fresh interpreter."""
+    code = f"""
+import json, sys
+{statement}
+print(json.dumps(sorted(sys.modules)))
+"""
+    proc = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return set(json.loads(proc.stdout))
+
+
+def test_package_import_is_lazy():
+    modules = _modules_loaded_by("import taskwarrior_syncall")
+    assert [mod for mod in HEAVY_MODULES if mod in modules] == []
+
+
+@pytest.mark.parametrize(
+    "script,other_sdks",
+    [
+        ("tw_gcal_sync", ("gkeepapi", "notion_client")),
+        ("tw_gkeep_sync", ("googleapiclient", "notion_client")),
+        ("tw_notion_sync", ("gkeepapi", "googleapiclient")),
+    ],
+)
+def test_script_imports_only_its_side(script: str, other_sdks):
+    modules = _modules_loaded_by(f"import taskwarrior_syncall.scripts.{script}")
+    assert [mod for mod in other_sdks if mod in modules] == []
+
+
+def test_lazy_exports():
+    assert set(taskwarrior_syncall.__all__) <= set(dir(taskwarrior_syncall))
+    for name in taskwarrior_syncall.__all__:
+        assert getattr(taskwarrior_syncall, name) is not None
+
+    from taskwarrior_syncall.aggregator import Aggregator
+
+    assert taskwarrior_syncall.Aggregator is Aggregator
+
+    with pytest.raises(AttributeError):
+        getattr(taskwarrior_syncall, "NotAnExport")
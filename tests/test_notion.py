@@ -1,8 +1,12 @@
+import asyncio
+import datetime
+from copy import deepcopy
 from typing import List
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
-from taskwarrior_syncall.notion_side import NotionSide
+from taskwarrior_syncall.notion_side import AsyncNotionSide, NotionSide
 from taskwarrior_syncall.notion_todo_block import NotionTodoBlock
 from taskwarrior_syncall.tw_notion_utils import convert_notion_to_tw, convert_tw_to_notion
 from taskwarrior_syncall.types import (
@@ -62,3 +66,105 @@ def test_find_todos_in_page(page_contents: NotionPageContents):
         assert todo.is_checked == is_checked[i]
         assert todo.is_archived == is_archived[i]
         assert todo.plaintext == plaintext[i]
+
+
+def _paginate(page_contents: NotionPageContents) -> dict:
+    # split the page contents into pages of 5 blocks, keyed by their cursor
+    blocks = page_contents["results"]
+    pages = {}
+    for i in range(0, len(blocks), 5):
+        has_more = i + 5 < len(blocks)
+        pages[None if i == 0 else f"cursor{i}"] = {
+            "object": "list",
+            "results": blocks[i : i + 5],
+            "next_cursor": f"cursor{i + 5}" if has_more else None,
+            "has_more": has_more,
+        }
+
+    return pages
+
+
+def test_iter_todos_paginated(page_contents: NotionPageContents):
+    pages = _paginate(page_contents)
+    client = MagicMock()
+    client.blocks.children.list.side_effect = lambda block_id, page_size, start_cursor=None: (
+        pages[start_cursor]
+    )
+    side = NotionSide(client=client, page_id="page_id")
+
+    todos = side.iter_todos()
+    # lazy - nothing is fetched until iterating
+    assert client.blocks.children.list.call_count == 0
+    next(todos)
+    assert client.blocks.children.list.call_count == 1
+
+    assert [todo.plaintext for todo in side.get_all_items()] == [
+        todo.plaintext for todo in NotionSide.find_todos(page_contents)
+    ]
+    assert client.blocks.children.list.call_count == 1 + len(pages)
+
+
+def test_async_get_all_items_paginated(page_contents: NotionPageContents):
+    pages = _paginate(page_contents)
+
+    async def list_children(block_id, page_size, start_cursor=None):
+        return pages[start_cursor]
+
+    client = MagicMock()
+    client.blocks.children.list = AsyncMock(side_effect=list_children)
+    side = AsyncNotionSide(client=client, page_id="page_id")
+
+    assert [todo.plaintext for todo in asyncio.run(side.get_all_items())] == [
+        todo.plaintext for todo in NotionSide.find_todos(page_contents)
+    ]
+    assert client.blocks.children.list.call_count == len(pages)
+
+
+def test_archived_items_dont_match(notion_simple_todo: NotionTodoBlockItem):
+    client = MagicMock()
+    client.blocks.retrieve.return_value = notion_simple_todo
+    side = NotionSide(client=client, page_id="page_id")
+    assert side.matches_filters(side.get_item(notion_simple_todo["id"]))
+
+    client.blocks.retrieve.return_value = {**notion_simple_todo, "archived": True}
+    assert not side.matches_filters(side.get_item(notion_simple_todo["id"]))
+
+
+def test_add_items_batched(notion_simple_todo: NotionTodoBlockItem):
+    def append(block_id, children):
+        results = []
+        for child in children:
+            block = deepcopy(notion_simple_todo)
+            block["id"] = f"block{client.blocks.children.append.call_count}-{len(results)}"
+            content = child["to_do"]["text"][0]["text"]["content"]
+            block["to_do"]["text"][0]["plain_text"] = content
+            results.append(block)
+        return {"object": "list", "results": results, "next_cursor": None, "has_more": False}
+
+    client = MagicMock()
+    client.blocks.children.append.side_effect = append
+    side = NotionSide(client=client, page_id="page_id", batch_writes=True)
+
+    added = [
+        side.add_item(
+            convert_tw_to_notion(
+                {
+                    "description": f"task {i}",
+                    "status": "pending",
+                    "modified": datetime.datetime.now(),
+                }
+            )
+        )
+        for i in range(150)
+    ]
+    # full chunk appended right away
+    assert client.blocks.children.append.call_count == 1
+    assert len(client.blocks.children.append.call_args.kwargs["children"]) == 100
+
+    resolved = side.flush()
+    assert client.blocks.children.append.call_count == 2
+    assert len(resolved) == 150
+    # actual blocks are mapped back to the added items in order
+    for item in added:
+        assert resolved[item.id].plaintext == item.plaintext
+    assert resolved[added[100].id].id == "block2-0"
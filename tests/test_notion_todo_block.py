@@ -1,4 +1,5 @@
 import datetime
+import pickle
 
 from dateutil.tz import tzutc
 
@@ -84,3 +85,16 @@ def test_notion_todo_block3(notion_simple_archived_todo: NotionTodoBlockItem):
     assert todo_block.is_archived == True
     assert todo_block.last_modified_date == simple_last_modified_date
     assert todo_block.id == "7de89eb6-4ee1-472c-abcd-8231049e9d8d"
+
+
+def test_notion_todo_block_pickle(notion_simple_todo: NotionTodoBlockItem):
+    n = NotionTodoBlock.from_raw_item(notion_simple_todo)
+    assert not hasattr(n, "__dict__")
+    assert pickle.loads(pickle.dumps(n)) == n
+    assert n.replace(id="other").id == "other"
+    assert n.replace(id="other").plaintext == n.plaintext
+
+    # snapshots pickled before the block was slotted
+    legacy = NotionTodoBlock.__new__(NotionTodoBlock)
+    legacy.__setstate__({key: n[key] for key in n})
+    assert legacy == n
@@ -0,0 +1,133 @@
+import asyncio
+from typing import List, Optional, Tuple
+
+import pytest
+
+from taskwarrior_syncall.request_executor import RequestExecutor, TokenBucket
+
+
+class FakeClock:
+    """Clock that only advances when sleeping."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps: List[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, secs: float):
+        self.sleeps.append(secs)
+        self.now += secs
+
+
+class FakeHTTPError(Exception):
+    def __init__(self, status: int, retry_after: Optional[float] = None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+def error_info(err: Exception) -> Optional[Tuple[int, Optional[float]]]:
+    if isinstance(err, FakeHTTPError):
+        return err.status, err.retry_after
+    return None
+
+
+def make_executor(clock: FakeClock, **kargs) -> RequestExecutor:
+    return RequestExecutor(
+        name="test", error_info=error_info, clock=clock, sleep=clock.sleep, **kargs
+    )
+
+
+def failing(*errors: Exception):
+    """Function that raises the given errors, one per call, then succeeds."""
+    remaining = list(errors)
+
+    def fn():
+        if remaining:
+            raise remaining.pop(0)
+        return "kalimera"
+
+    return fn
+
+
+def test_token_bucket():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=2, clock=clock, sleep=clock.sleep)
+
+    # burst up to the capacity, then one token every 0.5s
+    assert [bucket.acquire() for _ in range(4)] == [0, 0, 0.5, 0.5]
+    clock.now += 10
+    assert bucket.acquire() == 0
+
+    bucket.pause(3)
+    assert bucket.acquire() == pytest.approx(3.5)
+
+
+def test_request_executor_retries():
+    clock = FakeClock()
+    executor = make_executor(clock, rate=100, base_delay=1, max_delay=4)
+
+    # Retry-After is honoured, otherwise back off exponentially
+    fn = failing(FakeHTTPError(429, retry_after=7), FakeHTTPError(503), FakeHTTPError(500))
+    assert executor.execute(fn) == "kalimera"
+    # being rate limited also holds back the requests after the retry, hence the extra wait
+    backoffs = [secs for secs in clock.sleeps if secs > 0.1]
+    assert backoffs[0] == 7
+    assert 1 <= backoffs[1] <= 2
+    assert 2 <= backoffs[2] <= 4
+
+    metrics = executor.metrics
+    assert metrics.requests == 4
+    assert metrics.retries == 3
+    assert metrics.backoff_secs == pytest.approx(sum(backoffs))
+    assert metrics.throttled_secs == pytest.approx(sum(clock.sleeps) - sum(backoffs))
+
+
+def test_request_executor_gives_up():
+    clock = FakeClock()
+    executor = make_executor(clock, rate=100, max_retries=2)
+
+    # not retryable
+    with pytest.raises(FakeHTTPError):
+        executor.execute(failing(FakeHTTPError(404)))
+    with pytest.raises(KeyError):
+        executor.execute(failing(KeyError()))
+    assert executor.metrics.retries == 0
+
+    # too many retries
+    with pytest.raises(FakeHTTPError):
+        executor.execute(failing(*(FakeHTTPError(502) for _ in range(3))))
+    assert executor.metrics.retries == 2
+
+
+def test_request_executor_non_idempotent():
+    clock = FakeClock()
+    executor = make_executor(clock, rate=100)
+
+    # may have been applied despite the error - retrying could apply it twice
+    with pytest.raises(FakeHTTPError):
+        executor.execute(failing(FakeHTTPError(503)), idempotent=False)
+    assert executor.metrics.retries == 0
+
+    # rate limited - rejected without being applied
+    fn = failing(FakeHTTPError(429, retry_after=1))
+    assert executor.execute(fn, idempotent=False) == "kalimera"
+    assert executor.metrics.retries == 1
+
+
+def test_request_executor_async():
+    clock = FakeClock()
+    executor = make_executor(clock, rate=100, base_delay=0.01, max_delay=0.01)
+
+    fn = failing(FakeHTTPError(503), FakeHTTPError(502))
+
+    async def request():
+        return fn()
+
+    assert asyncio.run(executor.execute_async(request)) == "kalimera"
+    assert executor.metrics.requests == 3
+    assert executor.metrics.retries == 2
+    # waiting happens on the event loop, not via the blocking sleep
+    assert not clock.sleeps
@@ -0,0 +1,72 @@
+from pathlib import Path
+
+from bubop import pickle_dump
+
+from taskwarrior_syncall.snapshot_store import PickleDirSnapshotStore, SQLiteSnapshotStore
+
+
+def test_sqlite_snapshot_store_put_get(tmp_path: Path):
+    store = SQLiteSnapshotStore(serdes_dir=tmp_path, name="tw")
+    store.put("a", {"uuid": "a", "description": "kalimera"})
+    store.put("b", {"uuid": "b", "description": "kalinuxta"})
+
+    # pending writes are visible before committing
+    assert store.get("a") == {"uuid": "a", "description": "kalimera"}
+    store.commit()
+    store.close()
+
+    store = SQLiteSnapshotStore(serdes_dir=tmp_path, name="tw")
+    assert store.get_many(["a", "b", "c"]) == {
+        "a": {"uuid": "a", "description": "kalimera"},
+        "b": {"uuid": "b", "description": "kalinuxta"},
+    }
+    assert store.get("c") is None
+
+
+def test_sqlite_snapshot_store_discards_uncommitted(tmp_path: Path):
+    store = SQLiteSnapshotStore(serdes_dir=tmp_path, name="tw")
+    store.put("a", {"uuid": "a"})
+    store.commit()
+
+    store.delete(["a"])
+    store.put("b", {"uuid": "b"})
+    assert store.get("a") is None
+    store.close()
+
+    store = SQLiteSnapshotStore(serdes_dir=tmp_path, name="tw")
+    assert store.get_many(["a", "b"]) == {"a": {"uuid": "a"}}
+
+
+def test_sqlite_snapshot_store_many_items(tmp_path: Path):
+    store = SQLiteSnapshotStore(serdes_dir=tmp_path, name="gcal")
+    for i in range(1234):
+        store.put(str(i), {"id": str(i)})
+    store.commit()
+
+    items = store.get_many(str(i) for i in range(2000))
+    assert len(items) == 1234
+    assert items["1000"] == {"id": "1000"}
+
+
+def test_sqlite_snapshot_store_migrates_pickle_dir(tmp_path: Path):
+    legacy = PickleDirSnapshotStore(serdes_dir=tmp_path, name="tw")
+    legacy.put("a", {"uuid": "a"})
+    pickle_dump({"uuid": "b"}, tmp_path / "tw" / "b")
+
+    store = SQLiteSnapshotStore(serdes_dir=tmp_path, name="tw")
+    assert not (tmp_path / "tw").exists()
+    assert store.get_many(["a", "b"]) == {"a": {"uuid": "a"}, "b": {"uuid": "b"}}
+
+    # other sides are unaffected
+    assert SQLiteSnapshotStore(serdes_dir=tmp_path, name="gcal").get("a") is None
+
+
+def test_sqlite_snapshot_store_keeps_unreadable_pickles(tmp_path: Path):
+    (tmp_path / "tw").mkdir()
+    pickle_dump({"uuid": "a"}, tmp_path / "tw" / "a")
+    (tmp_path / "tw" / "b").write_bytes(b"not a pickle")
+
+    store = SQLiteSnapshotStore(serdes_dir=tmp_path, name="tw")
+    assert store.get_many(["a", "b"]) == {"a": {"uuid": "a"}}
+    assert not (tmp_path / "tw" / "a").exists()
+    assert (tmp_path / "tw" / "b").read_bytes() == b"not a pickle"
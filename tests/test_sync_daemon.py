@@ -0,0 +1,107 @@
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+from pathlib import Path
+from typing import List
+
+import pytest
+import yaml
+from click.testing import CliRunner
+
+from taskwarrior_syncall import SyncDaemon
+from taskwarrior_syncall.scripts.tw_syncall_daemon import main
+
+
+def test_sync_daemon_round():
+    lock = threading.Lock()
+    in_flight: List[int] = [0]
+    max_in_flight: List[int] = [0]
+    calls: List[str] = []
+
+    def job(name: str):
+        def fn():
+            with lock:
+                calls.append(name)
+                in_flight[0] += 1
+                max_in_flight[0] = max(max_in_flight[0], in_flight[0])
+            time.sleep(0.05)
+            with lock:
+                in_flight[0] -= 1
+            if name == "fail":
+                raise RuntimeError("Sync failed")
+
+        return fn
+
+    names = ["a", "b", "c", "d", "fail"]
+    rounds: List[int] = []
+    daemon = SyncDaemon(
+        jobs={name: job(name) for name in names},
+        interval=0,
+        max_concurrency=2,
+        before_round=lambda: rounds.append(len(calls)),
+    )
+
+    # a failing job doesn't affect the rest
+    assert daemon.run_round() == {"a": True, "b": True, "c": True, "d": True, "fail": False}
+    assert sorted(calls) == names
+    assert max_in_flight[0] == 2
+
+    daemon.run(rounds=2)
+    assert rounds == [0, 5, 10]
+    assert len(calls) == 15
+
+
+def test_sync_daemon_stop():
+    daemon = SyncDaemon(jobs={}, interval=60)
+    threading.Timer(0.1, daemon.stop).start()
+
+    started = time.monotonic()
+    daemon.run()
+    assert time.monotonic() - started < 10
+
+    with pytest.raises(ValueError):
+        SyncDaemon(jobs={}, interval=60, max_concurrency=0)
+
+
+def test_sync_daemon_rejects_zero_interval():
+    # rounds back to back would keep hitting the services
+    result = CliRunner().invoke(main, ["--interval", "0", "--once"])
+    assert result.exit_code == 2
+    assert "--interval" in result.output
+
+
+def test_sync_daemon_keeps_state_after_exit(tmp_path: Path):
+    # a new aggregator on the same preferences every round, like tw_syncall_daemon - run in a
+    # separate process, to check the preferences it leaves behind once it exits
+    code = textwrap.dedent(
+        """
+        import sys
+        from pathlib import Path
+        from unittest.mock import patch
+
+        from taskwarrior_syncall import SyncDaemon
+        from tests.test_aggregator import DictSide, make_aggregator
+
+        side_A, side_B = DictSide("A"), DictSide("B")
+        side_A.items["A0"] = {"id": "A0", "title": "kalimera", "done": False}
+
+        def sync():
+            with make_aggregator(side_A, side_B) as aggregator:
+                aggregator.sync()
+            side_A.items["A9"] = {"id": "A9", "title": "kalinuxta", "done": False}
+
+        with patch("bubop.common_dir.CommonDir.config", return_value=Path(sys.argv[1])):
+            SyncDaemon(jobs={"sync": sync}, interval=0).run(rounds=2)
+        """
+    )
+    subprocess.run(
+        [sys.executable, "-c", code, str(tmp_path)],
+        cwd=Path(__file__).parent.parent,
+        check=True,
+    )
+
+    config_file = next(tmp_path.glob("*/test_aggregator.yaml"))
+    prefs = yaml.load(config_file.read_text(), Loader=yaml.Loader)
+    assert sorted(prefs["B_A_ids"].values()) == ["A0", "A9"]
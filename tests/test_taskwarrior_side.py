@@ -0,0 +1,176 @@
+import datetime
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from taskw.exceptions import TaskwarriorError
+from taskw.task import Task
+
+from taskwarrior_syncall.taskwarrior_side import SharedTaskWarrior, TaskWarriorSide
+from taskwarrior_syncall.write_buffer import is_provisional_id
+
+existing_task = {
+    "id": 3,
+    "description": "kalimera",
+    "entry": datetime.datetime(2021, 12, 9, 8, 36, tzinfo=datetime.timezone.utc),
+    "modified": datetime.datetime(2021, 12, 9, 19, 2, tzinfo=datetime.timezone.utc),
+    "status": "pending",
+    "uuid": "a06f1c9d-237a-4692-8427-27bf6cad5ff1",
+    "tags": ["remindme"],
+    "urgency": 1.9,
+}
+
+
+@pytest.fixture()
+def tw_side():
+    with patch("taskwarrior_syncall.taskwarrior_side.TaskWarrior") as TaskWarrior:
+        tw = TaskWarrior.return_value
+        tw.config.get_udas.return_value = {}
+        tw.imported = []
+
+        def execute(*args):
+            assert args[0] == "import"
+            with open(args[1]) as f:
+                tw.imported.append(json.load(f))
+            return "", ""
+
+        tw._execute.side_effect = execute
+        side = TaskWarriorSide(tags=["remindme"], batch_writes=True)
+        side._items_cache[existing_task["uuid"]] = dict(existing_task)  # type: ignore
+        yield side
+
+
+def test_tw_batch_writes(tw_side: TaskWarriorSide):
+    tw: MagicMock = tw_side._tw  # type: ignore
+    added = [
+        tw_side.add_item(
+            {"description": title, "status": "pending", "annotations": ["a", "b"]}
+        )
+        for title in ("kalispera", "kalinuxta")
+    ]
+    assert all(is_provisional_id(item["uuid"]) for item in added)
+
+    tw_side.update_item(existing_task["uuid"], description="kalo apogeuma")
+    tw_side.delete_single_item(existing_task["uuid"])
+    tw.task_add.assert_not_called()
+    tw._execute.assert_not_called()
+
+    resolved = tw_side.flush()
+
+    # all the writes in a single import
+    assert tw._execute.call_count == 1
+    imported: List[Dict[str, Any]] = tw.imported[0]
+    assert [t["description"] for t in imported] == [
+        "kalispera",
+        "kalinuxta",
+        "kalo apogeuma",
+        "kalo apogeuma",
+    ]
+    assert imported[0]["tags"] == ["remindme"]
+    assert [a["description"] for a in imported[0]["annotations"]] == ["a", "b"]
+    assert len({a["entry"] for a in imported[0]["annotations"]}) == 2
+    assert imported[2]["uuid"] == imported[3]["uuid"] == existing_task["uuid"]
+    assert imported[3]["status"] == "deleted"
+    assert all("id" not in t and "urgency" not in t for t in imported)
+
+    # new tasks are reported with the UUIDs they were imported with
+    assert set(resolved.keys()) == {item["uuid"] for item in added}
+    assert sorted(item["uuid"] for item in resolved.values()) == sorted(  # type: ignore
+        t["uuid"] for t in imported[:2]
+    )
+
+    # the written tasks are known, e.g., to tell them apart in watch mode
+    assert tw_side.pop_written_uuids() == {t["uuid"] for t in imported}
+    assert tw_side.pop_written_uuids() == set()
+
+
+def test_tw_get_missing_item(tw_side: TaskWarriorSide):
+    tw: MagicMock = tw_side._tw  # type: ignore
+    tw.get_task.return_value = (None, {})
+    assert tw_side.get_item(str(uuid4()), use_cached=False) is None
+
+
+def test_tw_batch_writes_failure(tw_side: TaskWarriorSide):
+    tw: MagicMock = tw_side._tw  # type: ignore
+    tw._execute.side_effect = TaskwarriorError(["task", "import"], b"", b"", 1)
+
+    other_task = {**existing_task, "uuid": str(uuid4())}
+    tw_side._items_cache[other_task["uuid"]] = dict(other_task)  # type: ignore
+
+    added = tw_side.add_item({"description": "kalispera", "status": "pending"})
+    tw_side.update_item(existing_task["uuid"], description="kalo apogeuma")
+    tw_side.delete_single_item(other_task["uuid"])
+    assert tw_side.flush() == {added["uuid"]: None}
+
+    # reported, so that the Aggregator synchronizes them again on the next run
+    assert tw_side.pop_rejected_updates() == {existing_task["uuid"]}
+    assert tw_side.pop_failed_deletions() == {other_task["uuid"]}
+    assert tw_side.pop_rejected_updates() == tw_side.pop_failed_deletions() == set()
+    assert existing_task["uuid"] not in tw_side._items_cache
+
+
+def test_tw_read_modes(tmp_path: Path):
+    (tmp_path / "pending.data").write_text(
+        '[description:"kalimera" entry:"1639038960" modified:"1639038960" status:"pending"'
+        f' tags:"remindme" uuid:"{existing_task["uuid"]}"]\n'
+        '[description:"kalinuxta" entry:"1639038960" modified:"1639038960" status:"pending"'
+        f' uuid:"{uuid4()}"]\n'
+    )
+
+    with patch("taskwarrior_syncall.taskwarrior_side.TaskWarrior") as TaskWarrior:
+        tw = TaskWarrior.return_value
+        tw.config.get.return_value = {"location": str(tmp_path)}
+        tw.config.get_udas.return_value = {}
+
+        # only the tasks with the tag, without running the CLI
+        side = TaskWarriorSide(tags=["remindme"], read_mode="direct")
+        tasks = side.get_all_items()
+        assert [t["uuid"] for t in tasks] == [existing_task["uuid"]]
+        tw._get_task_objects.assert_not_called()
+
+        # the tasks of the CLI are used, compared with the ones read directly
+        cli_task = Task.from_stub(existing_task)
+        tw._get_task_objects.return_value = [cli_task]
+        side = TaskWarriorSide(tags=["remindme"], read_mode="cross-check")
+        with patch.object(side, "_cross_check", wraps=side._cross_check) as cross_check:
+            assert side.get_all_items() == [cli_task]
+        cross_check.assert_called_once()
+
+        direct_tasks = side._read_directly()
+        assert side._cross_check(cli_tasks=[cli_task], direct_tasks=direct_tasks)
+        assert not side._cross_check(
+            cli_tasks=[Task.from_stub({**existing_task, "description": "kalispera"})],
+            direct_tasks=direct_tasks,
+        )
+        assert not side._cross_check(cli_tasks=[], direct_tasks=direct_tasks)
+
+
+def test_tw_shared_tasks():
+    tasks = [
+        Task.from_stub(existing_task),
+        Task.from_stub({**existing_task, "uuid": str(uuid4()), "tags": ["other"]}),
+    ]
+    with patch("taskwarrior_syncall.taskwarrior_side.TaskWarrior") as TaskWarrior:
+        tw = TaskWarrior.return_value
+        tw._get_task_objects.return_value = tasks
+
+        # one load for all the sides, filtered by each one
+        shared = SharedTaskWarrior()
+        sides = [TaskWarriorSide(tags=[tag], shared=shared) for tag in ("remindme", "other")]
+        assert [[t["uuid"] for t in side.get_all_items()] for side in sides] == [
+            [str(tasks[0]["uuid"])],
+            [str(tasks[1]["uuid"])],
+        ]
+        assert TaskWarrior.call_count == 1
+        assert tw._get_task_objects.call_count == 1
+
+        # the sides don't modify the shared tasks
+        sides[0].get_item(existing_task["uuid"])["description"] = "kalispera"  # type: ignore
+        assert tasks[0]["description"] == "kalimera"
+
+        shared.reload()
+        TaskWarriorSide(tags=["remindme"], shared=shared).get_all_items()
+        assert tw._get_task_objects.call_count == 2
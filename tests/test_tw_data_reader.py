@@ -0,0 +1,82 @@
+import datetime
+import json
+import sqlite3
+from pathlib import Path
+from uuid import UUID
+
+from taskwarrior_syncall.tw_data_reader import TaskWarriorDataReader
+
+uuid_1 = "a06f1c9d-237a-4692-8427-27bf6cad5ff1"
+uuid_2 = "48d74cbd-d2ec-40ce-915b-d17bc7842fff"
+
+
+def check_tasks(reader: TaskWarriorDataReader):
+    tasks = {str(task["uuid"]): task for task in reader.iter_tasks()}
+    assert set(tasks.keys()) == {uuid_1, uuid_2}
+
+    task = tasks[uuid_1]
+    assert task["uuid"] == UUID(uuid_1)
+    assert task["description"] == 'kalimera "[kosme]"'
+    assert task["status"] == "pending"
+    assert task["project"] == "travelling"
+    assert sorted(task["tags"]) == ["remindme", "routine"]
+    assert task["entry"] == datetime.datetime(2021, 12, 9, 8, 36, tzinfo=datetime.timezone.utc)
+    assert task["annotations"] == ["first", "second"]
+    assert task["annotations"][0].entry == datetime.datetime(
+        2021, 12, 9, 8, 36, tzinfo=datetime.timezone.utc
+    )
+
+    assert tasks[uuid_2]["status"] == "completed"
+    assert "tags" not in tasks[uuid_2]
+
+
+def test_read_ff4(tmp_path: Path):
+    (tmp_path / "pending.data").write_text(
+        '[annotation_1639038961:"second" annotation_1639038960:"first"'
+        ' description:"kalimera \\"&open;kosme&close;\\"" entry:"1639038960"'
+        ' modified:"1639038960" project:"travelling" status:"pending"'
+        f' tags:"remindme,routine" uuid:"{uuid_1}"]\n'
+    )
+    (tmp_path / "completed.data").write_text(
+        '[description:"kalinuxta" end:"1639038960" entry:"1639038960"'
+        f' modified:"1639038960" status:"completed" uuid:"{uuid_2}"]\n'
+    )
+
+    reader = TaskWarriorDataReader(data_location=tmp_path)
+    assert not reader.is_taskchampion
+    check_tasks(reader)
+
+
+def test_read_taskchampion(tmp_path: Path):
+    conn = sqlite3.connect(tmp_path / "taskchampion.sqlite3")
+    conn.execute("CREATE TABLE tasks (uuid STRING PRIMARY KEY, data STRING)")
+    tasks = {
+        uuid_1: {
+            "annotation_1639038960": "first",
+            "annotation_1639038961": "second",
+            "description": 'kalimera "[kosme]"',
+            "entry": "1639038960",
+            "modified": "1639038960",
+            "project": "travelling",
+            "status": "pending",
+            "tag_remindme": "",
+            "tag_routine": "",
+        },
+        uuid_2: {
+            "description": "kalinuxta",
+            "end": "1639038960",
+            "entry": "1639038960",
+            "modified": "1639038960",
+            "status": "completed",
+        },
+    }
+    conn.executemany(
+        "INSERT INTO tasks VALUES (?, ?)",
+        [(uuid, json.dumps(data)) for uuid, data in tasks.items()],
+    )
+    conn.commit()
+    conn.close()
+
+    reader = TaskWarriorDataReader(data_location=tmp_path)
+    assert reader.is_taskchampion
+    check_tasks(reader)
@@ -0,0 +1,36 @@
+from uuid import uuid4
+
+from taskwarrior_syncall.tw_task_index import TaskIndex
+
+
+def test_task_index_query():
+    tags = ["remindme", "routine", "work"]
+    projects = ["", "travelling", "home"]
+    statuses = ["pending", "waiting", "completed"]
+    tasks = [
+        {
+            "uuid": uuid4(),
+            "tags": tags[: i % 4],
+            "project": projects[i % 3],
+            "status": statuses[i % 5 % 3],
+        }
+        for i in range(100)
+    ]
+    index = TaskIndex(tasks)
+    assert len(index) == 100
+
+    # same as scanning all the tasks, in the same order
+    for tags_ in ([], ["remindme"], ["routine", "remindme"], ["work", "unknown"]):
+        for project in (None, "travelling", "unknown"):
+            for statuses_ in (None, ["pending"], ["waiting", "completed"]):
+                expected = [
+                    t
+                    for t in tasks
+                    if set(tags_).issubset(t["tags"])
+                    and (not project or t["project"] == project)
+                    and (statuses_ is None or t["status"] in statuses_)
+                ]
+                assert index.query(tags=tags_, project=project, statuses=statuses_) == expected
+
+    assert index.get(str(tasks[0]["uuid"])) is tasks[0]
+    assert index.get(str(uuid4())) is None
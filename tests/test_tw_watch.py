@@ -0,0 +1,101 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from taskwarrior_syncall.tw_watch import TaskWarriorWatcher, install_hooks, uninstall_hooks
+
+
+def _run_hook(hook: Path, *tasks: dict) -> str:
+    proc = subprocess.run(
+        [sys.executable, str(hook)],
+        input="".join(f"{json.dumps(task)}\n" for task in tasks),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return proc.stdout
+
+
+def test_tw_hooks(tmp_path: Path):
+    hooks_location = tmp_path / "hooks"
+    queue_dir = tmp_path / "queue"
+    install_hooks(hooks_location, queue_dir=queue_dir)
+    # reinstalling is harmless
+    install_hooks(hooks_location, queue_dir=queue_dir)
+
+    hooks = sorted(hooks_location.iterdir())
+    assert [hook.name for hook in hooks] == [
+        "on-add.taskwarrior_syncall.py",
+        "on-modify.taskwarrior_syncall.py",
+    ]
+    assert all(os.access(hook, os.X_OK) for hook in hooks)
+
+    on_add, on_modify = hooks
+    original = {"uuid": "1", "description": "old"}
+    modified = {"uuid": "1", "description": "new"}
+
+    # nobody watches - tasks are passed on unchanged
+    assert json.loads(_run_hook(on_add, original)) == original
+    # nothing to pass on - don't fail the task command
+    assert _run_hook(on_add) == ""
+
+    queue_dir.mkdir()
+    queue_files = [queue_dir / "a.queue", queue_dir / "b.queue"]
+    for queue_file in queue_files:
+        queue_file.touch()
+
+    assert json.loads(_run_hook(on_add, original)) == original
+    assert json.loads(_run_hook(on_modify, original, modified)) == modified
+    for queue_file in queue_files:
+        assert queue_file.read_text() == "1\n1\n"
+
+    # only removed once nobody watches anymore
+    uninstall_hooks(hooks_location, queue_dir=queue_dir)
+    assert len(list(hooks_location.iterdir())) == 2
+    for queue_file in queue_files:
+        queue_file.unlink()
+    uninstall_hooks(hooks_location, queue_dir=queue_dir)
+    assert list(hooks_location.iterdir()) == []
+
+
+def test_tw_watcher(tmp_path: Path):
+    pending = tmp_path / "pending.data"
+    pending.write_text("")
+    queue_file = tmp_path / "queue" / "sync.queue"
+
+    with TaskWarriorWatcher(
+        data_location=tmp_path, queue_file=queue_file, debounce=0.1, poll_interval=0.01
+    ) as watcher:
+        assert queue_file.is_file()
+        assert watcher.wait(timeout=0.05) is None
+
+        # uuids recorded by the hooks
+        with queue_file.open("a") as f:
+            f.write("1\n2\n1\n")
+        assert watcher.wait(timeout=1) == {"1", "2"}
+        assert queue_file.read_text() == ""
+        assert watcher.wait(timeout=0.05) is None
+
+        # changes to the data files without hooks, e.g., on task sync
+        pending.write_text("[uuid:3]\n")
+        assert watcher.wait(timeout=1) == set()
+
+        # changes of the given tasks are ignored, e.g., the writes of the synchronization
+        pending.write_text("[uuid:3]\n[uuid:4]\n[uuid:5]\n")
+        with queue_file.open("a") as f:
+            f.write("4\n5\n")
+        watcher.ignore(["4"])
+        # but not those of others, reported right away
+        assert watcher.wait(timeout=0) == {"5"}
+        assert watcher.wait(timeout=0.05) is None
+
+        # changes made meanwhile are forgotten on reset
+        pending.write_text("[uuid:3]\n")
+        with queue_file.open("a") as f:
+            f.write("4\n")
+        watcher.reset()
+        assert watcher.wait(timeout=0.05) is None
+
+    assert not queue_file.exists()